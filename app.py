@@ -1,21 +1,35 @@
-from src.scheduling import (
-    FCFS,
-    PriorityScheduler,
-    PreemptivePriorityScheduler,
-    SmallestServiceFirst,
-    ShortestJobFirst,
-)
+from src.scheduling import SCHEDULERS
 from src.scheduling_ui import (
     get_scheduling_output,
-    render_scheduling_messages,
+    get_running_output,
+    get_time_stops,
+    get_time_window,
+    render_job_progress,
     generate_section_banner,
 )
 from src.metrics_ui import get_metrics_table
+from src.result_store import (
+    CACHE_THRESHOLD,
+    CACHE_TIMEOUT,
+    RESULT_BUDGET,
+    ResultStore,
+    private_directory,
+    result_key,
+)
+from src.jobs import JobPool, JobStatus
+from src.lod import MAX_ELEMENTS, build_lod, group_elements
+from src.timeline import (
+    MESSAGE_WINDOW,
+    build_timeline,
+    global_metrics,
+    job_count,
+    utilization_percent,
+)
 
 from src.dag import DAG
 from src.read_graph import parse_contents, read_yaml
 
-from dash import dcc, dash_table, html, MATCH, ALL
+from dash import dcc, dash_table, html, no_update, ClientsideFunction, MATCH, ALL
 
 import dash_daq as daq
 from dash_extensions.enrich import DashProxy, MultiplexerTransform, Input, Output, State
@@ -24,8 +38,11 @@ import dash_bootstrap_components as dbc
 
 
 import dash_cytoscape as cyto
+from flask_caching import Cache
 import logging
 import glob
+import os
+import uuid
 
 
 suffix_row = "_row"
@@ -37,6 +54,9 @@ suffix_ooc_g = "_OOC_graph"
 suffix_indicator = "_indicator"
 suffix_test = "_testing"
 
+# time steps played back per second
+PLAYBACK_SPEEDS = [1, 4, 10, 30]
+
 
 logging.basicConfig(
     format="%(asctime)s %(levelname)s: %(message)s",
@@ -57,9 +77,37 @@ app = DashProxy(
 
 app.config.suppress_callback_exceptions = True
 
-SCHEDULER = None
-
-cyto.load_extra_layouts()
+# session runs, job progress and LOD aggregates, shared by the server workers
+# through the cache directory; entries expire and the oldest are dropped
+# above the threshold
+cache_dir = os.environ.get(
+    "DAGSCHED_CACHE_DIR", os.path.join(app.server.instance_path, "cache")
+)
+cache = Cache(
+    app.server,
+    config={
+        "CACHE_TYPE": os.environ.get("DAGSCHED_CACHE_TYPE", "FileSystemCache"),
+        "CACHE_DIR": private_directory(cache_dir),
+        "CACHE_DEFAULT_TIMEOUT": int(
+            os.environ.get("DAGSCHED_CACHE_TIMEOUT", CACHE_TIMEOUT)
+        ),
+        "CACHE_THRESHOLD": int(
+            os.environ.get("DAGSCHED_CACHE_THRESHOLD", CACHE_THRESHOLD)
+        ),
+    },
+)
+# finished runs, evicted by size
+RESULTS = ResultStore(
+    os.environ.get(
+        "DAGSCHED_RESULT_DIR", os.path.join(app.server.instance_path, "results")
+    ),
+    cache,
+    int(os.environ.get("DAGSCHED_RESULT_BUDGET", RESULT_BUDGET)),
+)
+# runs in progress, their progress is polled by the UI
+JOBS = JobPool(RESULTS)
+# larger DAGs are shown as aggregate nodes expanded on click, see src/lod.py
+LOD_MAX_ELEMENTS = int(os.environ.get("DAGSCHED_MAX_ELEMENTS", MAX_ELEMENTS))
 
 base_cyto_stylesheet = [
     {
@@ -79,6 +127,16 @@ base_cyto_stylesheet = [
         "selector": ".parent[label]",
         "style": {"color": "white"},
     },
+    {
+        # tasks of a DAG too large to show, see assets/dag_status.js
+        "selector": ".aggregate",
+        "style": {
+            "shape": "round-rectangle",
+            "width": 60,
+            "height": 30,
+            "text-max-width": 160,
+        },
+    },
     {
         "selector": '[status = "RUNNING"]',
         "style": {
@@ -260,12 +318,9 @@ def build_dag_area():
         children=[
             cyto.Cytoscape(
                 id="cytoscape-elements-callbacks",
-                layout={
-                    "name": "dagre",
-                    # "animate": True,
-                    # "animationDuration": 1000,
-                    "rankDir": "LR",
-                },
+                # nodes come with positions, laid out once per DAG topology
+                # on the server (src/layout.py)
+                layout={"name": "preset"},
                 autoRefreshLayout=True,
                 stylesheet=base_cyto_stylesheet,
                 style={
@@ -297,7 +352,17 @@ def build_run_btn():
                 n_clicks=0,
                 color="danger",
                 className="fa-solid fa-rocket fa-sm",
-            )
+            ),
+            dbc.Button(
+                "Cancel",
+                id="cancel-run",
+                n_clicks=0,
+                color="secondary",
+                disabled=True,
+                style={"margin-left": "5px"},
+            ),
+            dcc.Interval(id="job-poll", interval=500, disabled=True),
+            html.Div(id="job-progress", style={"font-size": "10px"}),
         ],
         style={"float": "right", "padding": "10px"},
     )
@@ -417,6 +482,16 @@ def build_control_buttons(timestamp, scheduler_finished):
                         ),
                         style={"padding": "2px"},
                     ),
+                    dcc.Dropdown(
+                        id="playback-speed",
+                        options=[
+                            {"label": f"{speed} steps/s", "value": speed}
+                            for speed in PLAYBACK_SPEEDS
+                        ],
+                        value=PLAYBACK_SPEEDS[0],
+                        clearable=False,
+                        style={"width": "120px", "display": "inline-block"},
+                    ),
                 ]
             ),
         ],
@@ -429,46 +504,33 @@ def build_control_buttons(timestamp, scheduler_finished):
     )
 
 
-@app.callback(
+# playback, stepping and scrubbing run in the browser, see assets/timeline.js
+app.clientside_callback(
+    ClientsideFunction(namespace="timeline", function_name="step"),
+    Output("scheduling-times", "value"),
+    Output("scheduling-times", "min"),
+    Output("scheduling-times", "max"),
+    Output("scheduling-times", "marks"),
     Output("control-timer", "disabled"),
     Output("play-pause-btn", "className"),
+    Input("control-timer", "n_intervals"),
+    Input("increase-time", "n_clicks"),
+    Input("decrease-time", "n_clicks"),
+    Input("stop", "n_clicks"),
     Input("play-pause-btn", "n_clicks"),
+    Input("time-stops", "data"),
+    State("scheduling-times", "marks"),
+    State("scheduling-times", "value"),
     State("control-timer", "disabled"),
     prevent_initial_call=True,
 )
-def handle_play_pause_btn(n_clicks, disabled):
-    if not n_clicks:
-        raise PreventUpdate
-    if not disabled:
-        btn_class = "fa-solid fa-play"
-    else:
-        btn_class = "fa-solid fa-pause"
 
-    return not disabled, btn_class
-
-
-@app.callback(
-    Output("control-timer", "disabled"),
-    Output("scheduling-times-dropdown", "value"),
-    Input("stop", "n_clicks"),
-    State("scheduling-times-dropdown", "options"),
+app.clientside_callback(
+    ClientsideFunction(namespace="timeline", function_name="set_speed"),
+    Output("control-timer", "interval"),
+    Input("playback-speed", "value"),
     prevent_initial_call=True,
 )
-def handle_stop_btn(n_clicks, times):
-    return True, times[0]["value"]
-
-
-@app.callback(
-    Output("scheduling-times-dropdown", "value"),
-    Input("control-timer", "n_intervals"),
-    State("scheduling-times-dropdown", "options"),
-    State("scheduling-times-dropdown", "value"),
-    prevent_initial_call=True,
-)
-def handle_animation_timer(n_intervals, times, time):
-    values = [t["value"] for t in times]
-    index = values.index(time)
-    return values[(index + 1) % len(times)]
 
 
 def build_control_panel():
@@ -602,9 +664,7 @@ def build_user_stat_rows(usrcount, users):
     divlist = []
 
     for c in range(0, usrcount + 1):
-        divlist.append(
-            generate_metric_row_helper(stopped_interval, c, users=SCHEDULER.getUsers())
-        )
+        divlist.append(generate_metric_row_helper(stopped_interval, c, users=users))
 
     return divlist
 
@@ -688,71 +748,6 @@ def build_top_panel(stopped_interval):
     )
 
 
-def generate_ledbox(title, value):
-    return html.Div(
-        id="quick-stats",
-        className="row",
-        children=[
-            html.Div(
-                id="test",
-                children=[
-                    html.H2(title, style={"font-size": "14px"}),  #
-                    daq.LEDDisplay(
-                        id="operator-led",
-                        value=value,
-                        color="#92e0d3",
-                        backgroundColor="#1e2130",
-                        size=10,
-                    ),
-                ],
-            ),
-        ],
-    )  # div ends
-
-
-# spacing and float value change fix applied in css
-def generate_ledbox2(title, value):
-    return html.Div(
-        id="quick-stats",
-        className="row",
-        children=[
-            html.Div(
-                id="test1",
-                children=[
-                    html.H2(title, style={"font-size": "14px"}),  #
-                    daq.LEDDisplay(
-                        id="operator-led2",
-                        value=value,
-                        color="#92e0d3",
-                        backgroundColor="#1e2130",
-                        size=10,
-                    ),
-                ],
-            ),
-        ],
-    )  # div ends
-
-
-def render_global_jobcount(dags, users):
-    jobcount = 0
-    for user in users:
-        jobcount += len(dags[user["user"]].tasks)
-    return generate_ledbox("Global Job Count", jobcount)
-
-
-def render_utilization(cluster, utilization):
-    cpuusgperc = (utilization["cpus"] / cluster["cpus"]) * 100
-    ramusgperc = (utilization["ram"] / cluster["ram"]) * 100
-    # cpu_usage = f"Using {utilization['cpus']} out of { cluster['cpus']} cpus"
-    # ram_usage = f"Using {utilization['ram']} out of {cluster['ram']} ram"
-    return [
-        generate_ledbox("CPU utilization (%)", cpuusgperc),
-        # html.P(cpu_usage),
-        generate_ledbox("RAM utilization (%)", ramusgperc),
-        # html.P(ram_usage),
-    ]
-
-
 def build_running_stats_board():
 
     return html.Div(
@@ -776,42 +771,6 @@ def build_running_stats_board():
     )
 
 
-def render_global_metrics(cluster, metrics_t):
-
-    # queing_time = f"Queing_time:  {metrics_t.get_queuing_time()}"
-    completion_time = str(metrics_t.get_jct())
-    makespan = str(metrics_t.get_makespan())
-    if completion_time == "nan":
-        # print("came here nan")
-        completion_time = -1.0
-
-    elif completion_time == "inf":
-        # print("came here inf")
-        completion_time = 9999.0
-    else:
-        completion_time = metrics_t.get_jct()
-
-    if makespan == "nan":
-        # print("came here nan 2")
-        makespan = -1.0
-
-    elif makespan == "inf":
-        # print("came here inf")
-        makespan = 9999.0
-    else:
-        makespan = metrics_t.get_makespan()
-
-    return [
-        # html.H4(" GLobal Metrics"),
-        generate_ledbox2("Queing Time", metrics_t.get_queuing_time()),
-        generate_ledbox2("Job Completion Time", completion_time),
-        generate_ledbox2("DAG make-span", makespan),
-        html.P(
-            "*Value Conventioins: inf = 9999 and nan = -1 ", style={"font-size": "8px"}
-        ),
-    ]
-
-
 """ Stats Logic Ends"""
 
 
@@ -822,115 +781,271 @@ app.layout = html.Div(
         dcc.Store(id="session-dags", storage_type="session"),
         dcc.Store(id="session-users", storage_type="session"),
         dcc.Store(id="session-running", storage_type="session"),
+        # key of the session's runs in the result store
+        dcc.Store(id="session-id", storage_type="session"),
+        # id of the run in progress (see JobPool)
+        dcc.Store(id="session-job", storage_type="session"),
+        # task status changes of the shown time step and the status of every
+        # task shown, applied to the DAG topology in the browser
+        dcc.Store(id="status-diff"),
+        dcc.Store(id="dag-statuses"),
+        # run and time of the statuses shown in the browser
+        dcc.Store(id="shown-status"),
+        # aggregation of large DAGs and the aggregates expanded (see src/lod.py)
+        dcc.Store(id="session-lod", storage_type="session"),
+        dcc.Store(id="lod-expanded"),
+        dcc.Store(id="lod-groups"),
+        # timeline of the finished run shown, played back in the browser
+        dcc.Store(id="session-timeline"),
+        # time steps the timeline can't show are rendered by the server
+        dcc.Store(id="server-time"),
+        dcc.Store(id="server-frame"),
+        # time slider stops of the zoom window (see TimeIndex)
+        dcc.Store(id="time-stops"),
         build_banner(),
         build_tabs(),
     ]
 )
 
 
+@app.callback(
+    Output("session-id", "data"),
+    Input("session-id", "modified_timestamp"),
+    State("session-id", "data"),
+)
+def init_session_id(timestamp, session_id):
+    if session_id is not None:
+        raise PreventUpdate
+    return uuid.uuid4().hex
+
+
 @app.callback(
     Output("scheduling-output", "children"),
     Output("session-running", "data"),
+    Output("session-job", "data"),
+    Output("job-poll", "disabled"),
+    Output("cancel-run", "disabled"),
+    Output("session-timeline", "data"),
     Input("run-scheduler", "n_clicks"),
     [State("scheduler-dropdown", "value")],
     State("session-dags", "data"),
     State("session-users", "data"),
     State("session-cluster", "data"),
+    State("session-id", "data"),
+    State("session-job", "data"),
+    State("session-lod", "data"),
     prevent_initial_call=True,
 )
-def perform_scheduling(n_clicks, scheduler_type, dags, users, cluster):
-    global SCHEDULER
-
+def perform_scheduling(
+    n_clicks, scheduler_type, dags, users, cluster, session_id, previous_job, lod
+):
+    if previous_job is not None:
+        # replaced, dropped once its worker thread stopped
+        JOBS.cancel(previous_job)
+        JOBS.forget(previous_job)
     if isinstance(scheduler_type, list):
         scheduler_type = scheduler_type[0]
     try:
-        if scheduler_type == "FCFS":
-            SCHEDULER = FCFS(cluster, dags, users)
-        elif scheduler_type == "PRIO":
-            SCHEDULER = PriorityScheduler(cluster, dags, users)
-        elif scheduler_type == "SSF":
-            SCHEDULER = SmallestServiceFirst(cluster, dags, users)
-        elif scheduler_type == "PREPRIO":
-            SCHEDULER = PreemptivePriorityScheduler(cluster, dags, users)
-        elif scheduler_type == "SJF":
-            SCHEDULER = ShortestJobFirst(cluster, dags, users)
-        else:
+        if scheduler_type not in SCHEDULERS:
             logging.error(f"Invalid scheduler selected: {scheduler_type}")
             raise ValueError
-
-        if SCHEDULER:
-            SCHEDULER.run()
+        dags = workload_dags(dags, lod)
+        key = result_key(dags, scheduler_type, cluster)
+        scheduler = RESULTS.get(key)
+        if scheduler is None:
+            # run in the background, see poll_scheduling_job
+            job_id = JOBS.submit(
+                lambda: SCHEDULERS[scheduler_type](cluster, dags, users),
+                key,
+                session_id,
+            )
+            return get_running_output(), True, job_id, False, False, None
+        RESULTS.bind(session_id, key)
+        timeline = build_timeline(scheduler, key)
     except Exception:
-        SCHEDULER = None
+        scheduler = timeline = None
 
-    return get_scheduling_output(SCHEDULER), True
+    return get_scheduling_output(scheduler), True, None, True, True, timeline
 
 
 @app.callback(
-    Output("metrics-tbl", "data"),
-    Output("metrics-tbl", "columns"),
-    Input("scheduling-times-dropdown", "value"),
+    Output("job-progress", "children"),
+    Output("scheduling-window", "min"),
+    Output("scheduling-window", "max"),
+    Output("scheduling-window", "value"),
+    Output("scheduling-output", "children"),
+    Output("session-job", "data"),
+    Output("job-poll", "disabled"),
+    Output("cancel-run", "disabled"),
+    Output("session-timeline", "data"),
+    Input("job-poll", "n_intervals"),
+    State("session-job", "data"),
+    State("session-id", "data"),
+    State("scheduling-window", "value"),
+    State("scheduling-window", "max"),
     prevent_initial_call=True,
 )
-def render_metrics_table(time):
-    if SCHEDULER is None:
-        return None
+def poll_scheduling_job(n_intervals, job_id, session_id, shown_window, shown_max):
+    unchanged = (no_update,) * 3
+    progress = JOBS.progress(job_id)
+    if progress is None:
+        return None, *unchanged, no_update, None, True, True, no_update
+
+    status = JobStatus(progress["status"])
+    if status in (JobStatus.QUEUED, JobStatus.RUNNING):
+        # history so far, viewable with the time slider
+        window = JOBS.read(job_id, get_time_window)
+        if window is None:
+            window_outputs = unchanged
+        else:
+            # follow the end of the run unless zoomed in before it
+            value = window["value"]
+            if shown_window and shown_window[1] < (shown_max or 0):
+                value = no_update
+            window_outputs = (window["min"], window["max"], value)
+        return (
+            render_job_progress(progress),
+            *window_outputs,
+            no_update,
+            no_update,
+            False,
+            False,
+            no_update,
+        )
 
-    df = get_metrics_table(SCHEDULER, time)
+    progress_output = render_job_progress(progress)
+    if status == JobStatus.CANCELLED:
+        # the partial history stays viewable (from the server) until the next run
+        output = JOBS.read(job_id, get_scheduling_output) or no_update
+        return (
+            progress_output,
+            *unchanged,
+            output,
+            no_update,
+            True,
+            True,
+            no_update,
+        )
 
-    return df.to_dict("records"), [{"name": i, "id": i} for i in df.columns]
+    timeline = None
+    scheduler = None
+    if status == JobStatus.FINISHED:
+        scheduler = RESULTS.for_session(session_id)
+    if scheduler is not None:
+        timeline = build_timeline(scheduler, RESULTS.session_key(session_id))
+    JOBS.forget(job_id)
+    output = get_scheduling_output(scheduler)
+    return progress_output, *unchanged, output, None, True, True, timeline
 
 
 @app.callback(
-    Output("session-dags", "data"),
+    Output("cancel-run", "disabled"),
+    Input("cancel-run", "n_clicks"),
+    State("session-job", "data"),
+    prevent_initial_call=True,
+)
+def cancel_scheduling_job(n_clicks, job_id):
+    JOBS.cancel(job_id)
+    return True
+
+
+@app.callback(
+    Output("time-stops", "data"),
+    Input("scheduling-window", "value"),
+    State("scheduling-times", "value"),
+    State("session-id", "data"),
+    State("session-job", "data"),
+    prevent_initial_call=True,
+)
+def zoom_time_window(window, time, session_id, job_id):
+    if not window:
+        raise PreventUpdate
+    start, end = window
+    stops = read_scheduler(
+        session_id, job_id, lambda s: get_time_stops(s, start, end, time)
+    )
+    if stops is None:
+        raise PreventUpdate
+    return stops
+
+
+def read_scheduler(session_id, job_id, func):
+    """
+    func(scheduler) for the finished run of the session, or the run in
+    progress
+    """
+    if job_id is not None and JOBS.get(job_id) is not None:
+        return JOBS.read(job_id, func)
+    scheduler = RESULTS.for_session(session_id)
+    return None if scheduler is None else func(scheduler)
+
+
+app.clientside_callback(
+    ClientsideFunction(namespace="timeline", function_name="render"),
+    Output("server-time", "data"),
+    Output("status-diff", "data"),
     Output("scheduling-messages", "children"),
     Output("scheduling-utilization", "children"),
     Output("scheduling-metrics", "children"),
     Output("scheduling-jobcount", "children"),
-    Input("scheduling-times-dropdown", "value"),
-    State("session-dags", "data"),
+    Output("metrics-tbl", "data"),
+    Output("metrics-tbl", "columns"),
+    Input("scheduling-times", "value"),
+    Input("server-frame", "data"),
+    State("session-timeline", "data"),
+    State("dag-statuses", "data"),
+    State("shown-status", "data"),
     prevent_initial_call=True,
 )
-def render_state_from_scheduler_history(time, dags):
-    if SCHEDULER is None:
-        return dags, None, None
-
-    messages, dags, utilization = SCHEDULER.get_history(time)
-    metrics_t = SCHEDULER.get_history_metrics_at_t(time)  # returns a dictionary
-
-    return (
-        dags,
-        render_scheduling_messages(messages),
-        render_utilization(SCHEDULER.cluster, utilization),
-        render_global_metrics(SCHEDULER.cluster, metrics_t),
-        render_global_jobcount(SCHEDULER.dags, SCHEDULER.getUsers()),
-    )
 
 
 @app.callback(
-    Output("scheduling-times-dropdown", "value"),
-    Input("increase-time", "n_clicks"),
-    State("scheduling-times-dropdown", "options"),
-    State("scheduling-times-dropdown", "value"),
+    Output("server-frame", "data"),
+    Input("server-time", "data"),
+    State("shown-status", "data"),
+    State("session-id", "data"),
+    State("session-job", "data"),
     prevent_initial_call=True,
 )
-def increase_history_time(n_clicks, options, time):
-    values = [option["value"] for option in options]
-    index = values.index(time)
-    return values[(index + 1) % len(options)]
+def render_state_from_scheduler_history(time, shown, session_id, job_id):
+    """
+    Frame of a time step the timeline of the session can't show (no timeline
+    yet for runs in progress or cancelled), see render in assets/timeline.js
+    """
+    if time is None:
+        raise PreventUpdate
+    if job_id is not None and JOBS.get(job_id) is not None:
+        run = job_id
+    else:
+        run = RESULTS.session_key(session_id)
+    # statuses shown in the browser are diffed against if they are from this run
+    since = shown["time"] if shown and shown["run"] == run else None
+    frame = read_scheduler(session_id, job_id, lambda s: render_history(s, time, since))
+    if frame is None:
+        raise PreventUpdate
+    frame["diff"]["run"] = run
+    return frame
 
 
-@app.callback(
-    Output("scheduling-times-dropdown", "value"),
-    Input("decrease-time", "n_clicks"),
-    State("scheduling-times-dropdown", "options"),
-    State("scheduling-times-dropdown", "value"),
-    prevent_initial_call=True,
-)
-def decrease_history_time(n_clicks, options, time):
-    values = [option["value"] for option in options]
-    index = values.index(time)
-    return values[(index - 1) % len(options)]
+def render_history(scheduler, time, since=None):
+    messages, _, utilization = scheduler.get_history(time)
+    metrics_t = scheduler.get_history_metrics_at_t(time)  # returns a dictionary
+    df = get_metrics_table(scheduler, time)
+
+    return {
+        "time": time,
+        "diff": {
+            "time": time,
+            "reset": since is None,
+            "changes": scheduler.get_status_changes(time, since),
+        },
+        # the last ones, as in timelines
+        "messages": messages[-MESSAGE_WINDOW:],
+        "utilization": utilization_percent(scheduler.cluster, utilization),
+        "metrics": global_metrics(metrics_t),
+        "jobcount": job_count(scheduler),
+        "table": {"columns": list(df.columns), "data": df.to_dict("records")},
+    }
 
 
 @app.callback(Output("input-ui", "children"), [Input("input-dropdown", "value")])
@@ -1008,6 +1123,7 @@ def render_custom_user_tasks_ui(num_users):
     Output("session-cluster", "data"),
     Output("session-dags", "data"),
     Output("session-users", "data"),
+    Output("session-lod", "data"),
     [
         Input("submit-custom-dag", "n_clicks"),
         Input("input-cluster-cpus", "value"),
@@ -1036,14 +1152,15 @@ def handle_submit_custom_dag(n_clicks, cpus, ram, users, arrivals, tasks, task_f
     index = 0
 
     cluster = {"cpus": cpus, "ram": ram}
-    data = {}
+    dags = {}
     cluster_users = []
 
     for user, arrival, num_tasks in zip(users, arrivals, tasks):
-        index, data[user] = parse_tasks(index, user, arrival, num_tasks, task_form)
+        index, dags[user] = parse_tasks(index, user, arrival, num_tasks, task_form)
         cluster_users.append({"user": user, "name": user})
 
-    return cluster, data, cluster_users
+    data, lod = session_dags(dags)
+    return cluster, data, cluster_users, lod
 
 
 def parse_tasks(i, user, arrival, num_tasks, task_form):
@@ -1062,8 +1179,49 @@ def parse_tasks(i, user, arrival, num_tasks, task_form):
             "dependencies": deps,
         }
 
-    dag = DAG(dag)
-    return i, dag
+    return i, DAG(dag)
+
+
+def session_dags(dags):
+    """
+    session-dags and session-lod of the DAGs (user -> DAG)
+
+    DAGs with more than LOD_MAX_ELEMENTS elements are only sent as their
+    level of detail aggregation (see src/lod.py), computed once per workload:
+    the serialized DAGs stay in the cache under its key (see workload_dags)
+    and the tasks of expanded groups are fetched from there
+    (load_lod_groups).
+    """
+    data = {user: dag.to_dict() for user, dag in dags.items()}
+    elements = sum(len(dag["nodes"]) + len(dag["edges"]) for dag in data.values())
+    if elements <= LOD_MAX_ELEMENTS:
+        return data, None
+
+    workload = result_key(data, "lod", LOD_MAX_ELEMENTS)
+    lod = cache.get(f"lod:{workload}")
+    if lod is None:
+        lod = build_lod(dags, LOD_MAX_ELEMENTS)
+        lod["workload"] = workload
+        cache.set(f"lod:{workload}", lod)
+    cache.set(f"workload:{workload}", data)
+    names = {
+        user: {"name": dag["name"], "arrival_time": dag["arrival_time"]}
+        for user, dag in data.items()
+    }
+    return names, lod
+
+
+def workload_dags(dags, lod):
+    """
+    Serialized DAGs of the session, from the cache if only their aggregation
+    was sent
+    """
+    if not lod:
+        return dags
+    data = cache.get(f"workload:{lod['workload']}")
+    if data is None:
+        raise KeyError("The workload expired, please load it again")
+    return data
 
 
 @app.callback(
@@ -1173,6 +1331,7 @@ def get_users_in_session(time_stamp, data):
     Output("session-cluster", "data"),
     Output("session-dags", "data"),
     Output("session-users", "data"),
+    Output("session-lod", "data"),
     Input("upload-scheduling-spec", "contents"),
     State("upload-scheduling-spec", "filename"),
     State("upload-scheduling-spec", "last_modified"),
@@ -1180,7 +1339,7 @@ def get_users_in_session(time_stamp, data):
 def handle_file_upload(list_of_contents, list_of_names, list_of_dates):
     logging.info("handling upload")
     cluster = {}
-    data = {}
+    dags = {}
     users = []
 
     if list_of_contents is not None:
@@ -1194,68 +1353,100 @@ def handle_file_upload(list_of_contents, list_of_names, list_of_dates):
                 logging.info(f"Storing {filename} to session-dags")
                 cluster = spec["cluster"]
                 for user, tasks in spec["users"].items():
-                    data[user] = DAG(tasks)
-                    name = data[user].name
-                    users.append({"user": user, "name": name})
+                    dags[user] = DAG(tasks)
+                    users.append({"user": user, "name": dags[user].name})
             else:
                 logging.error(f"Failed to parse {filename}")
-    return cluster, data, users
+    data, lod = session_dags(dags)
+    return cluster, data, users, lod
 
 
 @app.callback(
     Output("session-cluster", "data"),
     Output("session-dags", "data"),
     Output("session-users", "data"),
+    Output("session-lod", "data"),
     Input("sample-file-dropdown", "value"),
 )
 def update_scheduling_tasks_from_sample(path):
     cluster = {}
-    data = {}
+    dags = {}
     users = []
 
     if not path:
-        return None, None, None
+        return None, None, None, None
 
     try:
         raw_data = read_yaml(path)
         cluster = raw_data["cluster"]
         for user, tasks in raw_data["users"].items():
-            data[user] = DAG(tasks)
-            name = data[user].name
-            users.append({"user": user, "name": name})
+            dags[user] = DAG(tasks)
+            users.append({"user": user, "name": dags[user].name})
     except Exception as e:
         logging.error(f"error: {e}")
         logging.error(f"Error reading sample file {path}")
 
-    return cluster, data, users
+    data, lod = session_dags(dags)
+    return cluster, data, users, lod
 
 
-@app.callback(
+# see assets/dag_status.js
+app.clientside_callback(
+    ClientsideFunction(namespace="dag", function_name="render_elements"),
     Output("cytoscape-elements-callbacks", "elements"),
+    Output("dag-statuses", "data"),
+    Output("shown-status", "data"),
+    Output("lod-expanded", "data"),
+    Input("status-diff", "data"),
     Input("user-dropdown", "value"),
     Input("session-dags", "data"),
+    Input("cytoscape-elements-callbacks", "tapNodeData"),
+    Input("lod-groups", "data"),
     State("session-users", "data"),
+    State("dag-statuses", "data"),
+    State("cytoscape-elements-callbacks", "elements"),
+    State("session-lod", "data"),
+    State("lod-expanded", "data"),
     prevent_initial_call=True,
 )
-def update_shown_dag(value, dags, users):
-    index = None
-    if not users:
-        return []
-    if value == "All Users":
-        elements = []
-        for _, dag in dags.items():
-            current_dag = DAG(dag, deserialize=True)
-            elements += current_dag.render_state()
-        return elements
-    for i, user in enumerate(users):
-        if user["name"] == value:
-            index = i
-            break
-    if index is None:
-        return []
-    user = users[index]["user"]
-    dag = DAG(dags[user], deserialize=True)
-    return dag.render_state()
+
+
+@app.callback(
+    Output("lod-groups", "data"),
+    Input("lod-expanded", "data"),
+    State("lod-groups", "data"),
+    State("session-lod", "data"),
+    prevent_initial_call=True,
+)
+def load_lod_groups(expanded, loaded, lod):
+    """
+    Task nodes and edges of the expanded groups of aggregated DAGs, see
+    assets/dag_status.js
+    """
+    if not lod or not expanded:
+        raise PreventUpdate
+    if not loaded or loaded["workload"] != lod["workload"]:
+        loaded = {"workload": lod["workload"], "groups": {}}
+    groups = {
+        group_id: loaded["groups"].get(group_id) for group_id in expanded["groups"]
+    }
+    if groups.keys() == loaded["groups"].keys():
+        raise PreventUpdate
+
+    data = None
+    for group_id, elements in groups.items():
+        if elements is not None:
+            continue
+        if data is None:
+            try:
+                data = workload_dags(None, lod)
+            except KeyError as e:
+                logging.error(e)
+                raise PreventUpdate
+        user, index = group_id.removeprefix("lod:").rsplit(":", 1)
+        tasks = lod["users"][user]["groups"][int(index)]["tasks"]
+        groups[group_id] = group_elements(data[user], tasks)
+    return {"workload": lod["workload"], "groups": groups}
 
 
 @app.callback(
@@ -1284,8 +1475,8 @@ def displayMouseOverNodeData(stylesheet, data):
         },
     }
 
-    if not data or "parent" not in data:
-        # no need to style compound nodes on hover:
+    if not data or "parent" not in data or "lod" in data:
+        # no need to style compound or aggregate nodes on hover:
         return stylesheet
 
     base_stylesheet = base_cyto_stylesheet
@@ -0,0 +1,313 @@
+/*
+ * Cytoscape elements of the shown DAGs, patched in the browser.
+ *
+ * The DAG topology (session-dags) is sent once per upload, each time step
+ * only sends the status changes since the shown time (status-diff, see
+ * render in assets/timeline.js). dag-statuses holds the status of every
+ * task at the shown time and shown-status its run and time, which the server
+ * diffs against.
+ *
+ * Element lists are kept per (run, user filter, time): nodes without a
+ * status are shared with the topology, so scrubbing back and forth through
+ * a run reuses them instead of patching or rebuilding. Nodes come with
+ * positions laid out on the server (src/layout.py), the DAGs of several users
+ * are stacked top to bottom.
+ *
+ * DAGs with more than max_elements elements are shown at a coarser level of
+ * detail (session-lod, see src/lod.py) and session-dags only holds their
+ * names: each user's DAG is one aggregate node, clicking it expands it into
+ * a node per group of tasks of neighbouring dependency levels and clicking
+ * a group shows its tasks, as long as at most max_elements elements are
+ * shown. Clicking an expanded aggregate collapses it. lod-expanded holds the
+ * expanded users and groups, the server then sends the task nodes and edges
+ * of the expanded groups (lod-groups, see load_lod_groups in app.py).
+ */
+
+// vertical space between the DAGs of two users
+const DAG_SPACING = 120;
+// aggregates shown with the status of their most active task
+const STATUS_ORDER = ["RUNNING", "PREEMPTED", "READY", "BLOCKED", "FINISHED"];
+
+// element lists kept, least recently used are evicted first
+const ELEMENT_CACHE_SIZE = 32;
+const elementCache = new Map();
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    dag: {
+        render_elements: function (
+            diff, value, dags, tapped, loaded, users, statuses, elements, lod, expanded
+        ) {
+            const noUpdate = window.dash_clientside.no_update;
+            const triggered = dash_clientside.callback_context.triggered.map(
+                (t) => t.prop_id
+            );
+            const diffChanged = triggered.includes("status-diff.data");
+            const shownChanged = triggered.some((id) => id !== "status-diff.data");
+
+            if (triggered.includes("session-dags.data")) {
+                elementCache.clear();
+                expanded = null;
+            }
+            expanded = expanded || { users: [], groups: [] };
+            const shownUsers = selectUsers(value, dags, users);
+            const detailed = !lod;
+            // task elements of the expanded groups fetched for this workload
+            const groups = !detailed && loaded && loaded.workload === lod.workload
+                ? loaded.groups
+                : {};
+            if (triggered.includes("cytoscape-elements-callbacks.tapNodeData")) {
+                const toggled = detailed ? null : toggle(expanded, tapped);
+                if (toggled === null) {
+                    return [noUpdate, noUpdate, noUpdate, noUpdate];
+                }
+                if (countAggregates(shownUsers, lod, toggled) > lod.max_elements) {
+                    // too many elements to expand it
+                    return [noUpdate, noUpdate, noUpdate, noUpdate];
+                }
+                expanded = toggled;
+            }
+            if (!diff || triggered.includes("session-dags.data")) {
+                // new topology, no run shown yet
+                statuses = {};
+            } else if (diffChanged) {
+                statuses = Object.assign({}, diff.reset ? {} : statuses, diff.changes);
+            }
+
+            const shown = diff && !triggered.includes("session-dags.data")
+                ? { run: diff.run, time: diff.time }
+                : null;
+            const detail = detailed
+                ? ""
+                : `|${JSON.stringify(expanded)}|${Object.keys(groups)}`;
+            const key = shown ? `${diff.run}|${value}|${diff.time}${detail}` : null;
+            if (key !== null && elementCache.has(key)) {
+                const cached = elementCache.get(key);
+                elementCache.delete(key);
+                elementCache.set(key, cached);
+                return [cached, statuses, shown, expanded];
+            }
+
+            if (!detailed) {
+                // aggregates count the statuses of their tasks, rebuilt
+                elements = buildAggregates(shownUsers, lod, expanded, groups, statuses);
+            } else if (diffChanged && !shownChanged && !diff.reset && elements) {
+                // only the nodes whose status changed are replaced
+                elements = elements.map((element) =>
+                    element.data.id in diff.changes
+                        ? withStatus(element, diff.changes[element.data.id])
+                        : element
+                );
+            } else {
+                elements = buildElements(shownUsers, dags, statuses);
+            }
+            if (key !== null) {
+                elementCache.set(key, elements);
+                if (elementCache.size > ELEMENT_CACHE_SIZE) {
+                    elementCache.delete(elementCache.keys().next().value);
+                }
+            }
+            return [elements, statuses, shown, expanded];
+        },
+    },
+});
+
+function withStatus(element, status) {
+    const data = Object.assign({}, element.data);
+    if (status) {
+        data.status = status;
+    } else {
+        delete data.status;
+    }
+    return Object.assign({}, element, { data: data });
+}
+
+// ids of the users whose DAGs are shown
+function selectUsers(value, dags, users) {
+    if (!users || !users.length || !dags) {
+        return [];
+    }
+    if (value === "All Users") {
+        return Object.keys(dags);
+    }
+    const user = users.find((u) => u.name === value);
+    return user && dags[user.user] ? [user.user] : [];
+}
+
+// [top, bottom] of the nodes of dag
+function extent(dag) {
+    let top = 0;
+    let bottom = 0;
+    for (const node of dag.nodes) {
+        if (node.position) {
+            top = Math.min(top, node.position.y);
+            bottom = Math.max(bottom, node.position.y);
+        }
+    }
+    return [top, bottom];
+}
+
+// vertical offsets stacking the extents ([top, bottom]) of the DAGs shown
+function offsets(extents) {
+    let next = extents.length ? extents[0][0] : 0;
+    return extents.map(([top, bottom]) => {
+        const offset = next - top;
+        next = offset + bottom + DAG_SPACING;
+        return offset;
+    });
+}
+
+function moved(node, offset) {
+    if (!offset || !node.position) {
+        return node;
+    }
+    const position = { x: node.position.x, y: node.position.y + offset };
+    return Object.assign({}, node, { position: position });
+}
+
+function buildElements(shownUsers, dags, statuses) {
+    const elements = [];
+    const shown = shownUsers.map((user) => dags[user]);
+    const shifts = offsets(shown.map(extent));
+    shown.forEach((dag, i) => {
+        for (const node of dag.nodes) {
+            elements.push(
+                moved(
+                    node.data.id in statuses
+                        ? withStatus(node, statuses[node.data.id])
+                        : node,
+                    shifts[i]
+                )
+            );
+        }
+        elements.push(...dag.edges);
+    });
+    return elements;
+}
+
+// expansions after clicking node, null if it is not an aggregate
+function toggle(expanded, node) {
+    if (!node || !node.lod) {
+        return null;
+    }
+    const key = node.lod === "user" ? "users" : "groups";
+    const toggled = { users: expanded.users, groups: expanded.groups };
+    toggled[key] = toggled[key].includes(node.id)
+        ? toggled[key].filter((id) => id !== node.id)
+        : toggled[key].concat([node.id]).sort();
+    return toggled;
+}
+
+function aggregateData(id, label, tasks, statuses) {
+    const counts = {};
+    for (const task of tasks) {
+        const status = statuses[task];
+        if (status) {
+            counts[status] = (counts[status] || 0) + 1;
+        }
+    }
+    const lines = [`${label}: ${tasks.length} tasks`].concat(
+        STATUS_ORDER.filter((s) => counts[s]).map((s) => `${s}: ${counts[s]}`)
+    );
+    const data = { id: id, label: lines.join("\n") };
+    const status = counts.FINISHED === tasks.length
+        ? "FINISHED"
+        : STATUS_ORDER.find((s) => s !== "FINISHED" && counts[s]);
+    if (status) {
+        data.status = status;
+    }
+    return data;
+}
+
+// elements shown with expanded, with the task nodes and edges of the
+// expanded groups
+function countAggregates(shownUsers, lod, expanded) {
+    let count = 0;
+    for (const user of shownUsers) {
+        const userId = `lod:${user}`;
+        count += 1;
+        if (!expanded.users.includes(userId)) {
+            continue;
+        }
+        const aggregate = lod.users[user];
+        count += aggregate.edges.length;
+        aggregate.groups.forEach((group, i) => {
+            count += 1;
+            if (expanded.groups.includes(`${userId}:${i}`)) {
+                count += group.elements;
+            }
+        });
+    }
+    return count;
+}
+
+function buildAggregates(shownUsers, lod, expanded, loaded, statuses) {
+    const elements = [];
+    // node shown for each task of an expanded group: itself or the group
+    const shownAs = {};
+    const edges = new Set();
+    const addEdge = (source, target) => {
+        const id = `${source}->${target}`;
+        if (source !== target && !edges.has(id)) {
+            edges.add(id);
+            elements.push({ data: { id: id, source: source, target: target } });
+        }
+    };
+    // edges of the tasks shown, added once every task is placed
+    const taskEdges = [];
+    // collapsed users take a single row
+    const shifts = offsets(
+        shownUsers.map((user) =>
+            expanded.users.includes(`lod:${user}`) ? lod.users[user].extent : [0, 0]
+        )
+    );
+    shownUsers.forEach((user, u) => {
+        const aggregate = lod.users[user];
+        const userId = `lod:${user}`;
+        const tasks = aggregate.groups.flatMap((group) => group.tasks);
+        const node = aggregateData(userId, aggregate.name, tasks, statuses);
+        node.lod = "user";
+        node.user = user;
+        if (!expanded.users.includes(userId)) {
+            const position = { x: 0, y: shifts[u] };
+            elements.push({ data: node, position: position, classes: "aggregate" });
+            return;
+        }
+        elements.push({ data: node, classes: "parent" });
+
+        const groupIds = aggregate.groups.map((group, i) => `${userId}:${i}`);
+        // groups stay collapsed until their tasks arrive
+        const open = groupIds.map((id) => expanded.groups.includes(id) && id in loaded);
+        aggregate.groups.forEach((group, i) => {
+            const groupId = groupIds[i];
+            const [first, last] = group.levels;
+            const label = first === last ? `Level ${first}` : `Levels ${first}-${last}`;
+            const data = aggregateData(groupId, label, group.tasks, statuses);
+            data.lod = "group";
+            data.parent = userId;
+            if (!open[i]) {
+                const position = { x: group.position.x, y: group.position.y + shifts[u] };
+                elements.push({ data: data, position: position, classes: "aggregate" });
+                group.tasks.forEach((task) => (shownAs[task] = groupId));
+                return;
+            }
+            elements.push({ data: data, classes: "parent" });
+            for (const task of loaded[groupId].nodes) {
+                const taskNode = withStatus(moved(task, shifts[u]), statuses[task.data.id]);
+                taskNode.data.parent = groupId;
+                elements.push(taskNode);
+                shownAs[task.data.id] = task.data.id;
+            }
+            taskEdges.push(...loaded[groupId].edges);
+        });
+        // edges between collapsed groups, the others come with the tasks
+        for (const [source, target] of aggregate.edges) {
+            if (!open[source] && !open[target]) {
+                addEdge(groupIds[source], groupIds[target]);
+            }
+        }
+    });
+    for (const edge of taskEdges) {
+        addEdge(shownAs[edge.data.source], shownAs[edge.data.target]);
+    }
+    return elements;
+}
@@ -0,0 +1,229 @@
+/*
+ * Playback of the scheduling timeline in the browser.
+ *
+ * Finished runs come with a timeline (session-timeline, built once per run
+ * by src/timeline.py): the task status changes, utilization, global metrics,
+ * last messages and metrics table row changes of every time step. Stepping
+ * through it and rendering a time step happen here,
+ * without a server round trip. Time steps of runs without a timeline (in
+ * progress or cancelled) are sent to the server through server-time and
+ * rendered from the frame it sends back (server-frame).
+ *
+ * The time slider only stops at the times binned by the server for the zoom
+ * window (see src/time_index.py), stepping and playback move between them.
+ */
+
+// statuses and table rows at the last replayed step, playback moves forward
+// so the next step only applies its own changes
+let replayed = null;
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    timeline: {
+        step: function (n_intervals, increase, decrease, stop, play, stops, marks, value, disabled) {
+            const noUpdate = window.dash_clientside.no_update;
+            const unchanged = [noUpdate, noUpdate, noUpdate, noUpdate];
+            const triggered = dash_clientside.callback_context.triggered.map(
+                (t) => t.prop_id
+            );
+            if (triggered.includes("time-stops.data")) {
+                // zoomed, see zoom_time_window in app.py
+                if (!stops) {
+                    return unchanged.concat([noUpdate, noUpdate]);
+                }
+                return [stops.value, stops.min, stops.max, stops.marks, noUpdate, noUpdate];
+            }
+            if (triggered.includes("play-pause-btn.n_clicks")) {
+                if (!play) {
+                    return unchanged.concat([noUpdate, noUpdate]);
+                }
+                return unchanged.concat([
+                    !disabled,
+                    disabled ? "fa-solid fa-pause" : "fa-solid fa-play",
+                ]);
+            }
+
+            // the slider stops are its marks
+            const values = Object.keys(marks || {})
+                .map(Number)
+                .sort((a, b) => a - b);
+            if (!values.length) {
+                return unchanged.concat([noUpdate, noUpdate]);
+            }
+            if (triggered.includes("stop.n_clicks")) {
+                return [values[0], noUpdate, noUpdate, noUpdate, true, "fa-solid fa-play"];
+            }
+            const index = values.indexOf(value);
+            const step = triggered.includes("decrease-time.n_clicks") ? -1 : 1;
+            const next = (index + step + values.length) % values.length;
+            return [values[next], noUpdate, noUpdate, noUpdate, noUpdate, noUpdate];
+        },
+
+        set_speed: function (speed) {
+            return 1000 / speed;
+        },
+
+        render: function (time, serverFrame, timeline, statuses, shown) {
+            const noUpdate = window.dash_clientside.no_update;
+            const triggered = dash_clientside.callback_context.triggered.map(
+                (t) => t.prop_id
+            );
+
+            let frame;
+            if (triggered.includes("server-frame.data")) {
+                if (!serverFrame || serverFrame.time !== time) {
+                    // the shown time changed since it was requested
+                    return Array(8).fill(noUpdate);
+                }
+                frame = serverFrame;
+            } else {
+                if (time === null || time === undefined) {
+                    return Array(8).fill(noUpdate);
+                }
+                const step = timeline ? timeline.times.indexOf(time) : -1;
+                if (step < 0) {
+                    return [time].concat(Array(7).fill(noUpdate));
+                }
+                frame = timelineFrame(timeline, step, statuses || {}, shown);
+            }
+
+            return [
+                noUpdate,
+                frame.diff,
+                frame.messages.map((message) => component("P", { children: message })),
+                [
+                    ledbox("CPU utilization (%)", frame.utilization.cpus),
+                    ledbox("RAM utilization (%)", frame.utilization.ram),
+                ],
+                [
+                    ledbox2("Queing Time", frame.metrics[0]),
+                    ledbox2("Job Completion Time", frame.metrics[1]),
+                    ledbox2("DAG make-span", frame.metrics[2]),
+                    component("P", {
+                        children: "*Value Conventioins: inf = 9999 and nan = -1 ",
+                        style: { fontSize: "8px" },
+                    }),
+                ],
+                ledbox("Global Job Count", frame.jobcount),
+                frame.table.data,
+                frame.table.columns.map((column) => ({ name: column, id: column })),
+            ];
+        },
+    },
+});
+
+function replay(timeline, step) {
+    const tasks = timeline.tasks.length;
+    if (
+        replayed === null ||
+        replayed.run !== timeline.run ||
+        replayed.codes.length !== tasks ||
+        replayed.step > step
+    ) {
+        replayed = { run: timeline.run, step: -1, codes: new Int8Array(tasks), rows: [] };
+    }
+    for (let i = replayed.step + 1; i <= step; i++) {
+        const changes = timeline.changes[i];
+        for (let j = 0; j < changes.length; j += 2) {
+            replayed.codes[changes[j]] = changes[j + 1];
+        }
+        for (const [position, row] of timeline.table_changes[i]) {
+            replayed.rows[position] = row;
+        }
+    }
+    replayed.step = step;
+    return replayed;
+}
+
+// positions of the tasks whose status changed after step from and up to step to
+function changedTasks(timeline, from, to) {
+    const tasks = new Set();
+    for (let i = from + 1; i <= to; i++) {
+        const changes = timeline.changes[i];
+        for (let j = 0; j < changes.length; j += 2) {
+            tasks.add(changes[j]);
+        }
+    }
+    return tasks;
+}
+
+function timelineFrame(timeline, step, statuses, shown) {
+    const { codes, rows } = replay(timeline, step);
+    // statuses shown are diffed against, only the tasks changed between the
+    // shown step and this one if they are from this run, all of them otherwise
+    const shownStep =
+        shown && shown.run === timeline.run ? timeline.times.indexOf(shown.time) : -1;
+    const tasks =
+        shownStep < 0
+            ? timeline.tasks.keys()
+            : changedTasks(timeline, Math.min(shownStep, step), Math.max(shownStep, step));
+    const changes = {};
+    for (const i of tasks) {
+        const id = timeline.tasks[i];
+        const status = timeline.statuses[codes[i]];
+        if ((statuses[id] ?? null) !== status) {
+            changes[id] = status;
+        }
+    }
+
+    const columns = timeline.table_columns;
+    return {
+        time: timeline.times[step],
+        diff: { run: timeline.run, time: timeline.times[step], reset: false, changes: changes },
+        messages: timeline.messages.slice(
+            Math.max(0, timeline.message_ends[step] - timeline.message_window),
+            timeline.message_ends[step]
+        ),
+        utilization: {
+            cpus: timeline.utilization.cpus[step],
+            ram: timeline.utilization.ram[step],
+        },
+        metrics: timeline.metrics[step],
+        jobcount: timeline.jobcount,
+        table: {
+            columns: columns,
+            data: rows.map((row) =>
+                Object.fromEntries(columns.map((column, i) => [column, row[i]]))
+            ),
+        },
+    };
+}
+
+function component(type, props, namespace) {
+    return { type: type, namespace: namespace || "dash_html_components", props: props };
+}
+
+// LED boxes, the ids are styled in spc-custom-styles.css
+function led(title, value, boxId, ledId) {
+    return component("Div", {
+        id: "quick-stats",
+        className: "row",
+        children: [
+            component("Div", {
+                id: boxId,
+                children: [
+                    component("H2", { children: title, style: { fontSize: "14px" } }),
+                    component(
+                        "LEDDisplay",
+                        {
+                            id: ledId,
+                            value: value,
+                            color: "#92e0d3",
+                            backgroundColor: "#1e2130",
+                            size: 10,
+                        },
+                        "dash_daq"
+                    ),
+                ],
+            }),
+        ],
+    });
+}
+
+function ledbox(title, value) {
+    return led(title, value, "test", "operator-led");
+}
+
+// spacing and float value change fix applied in css
+function ledbox2(title, value) {
+    return led(title, value, "test1", "operator-led2");
+}
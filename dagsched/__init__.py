@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the simulator modules in src import each other by top-level name
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.append(SRC)
@@ -0,0 +1,12 @@
+"""
+Headless entry point, e.g.
+
+python -m dagsched run data/simple_dag.yml --scheduler SJF -o metrics.csv
+"""
+import sys
+
+import dagsched  # noqa: F401
+from cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
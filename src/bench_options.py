@@ -0,0 +1,31 @@
+# choices of the bench command, kept out of benchmark so that the CLI parses
+# its arguments without importing the benchmarks (see benchmark.py)
+
+# metric -> True if larger values are better
+METRICS = {
+    "wall_time": False,
+    "events_per_sec": True,
+    "peak_rss": False,
+    "history_bytes": False,
+    "payload_bytes": False,
+}
+
+# histories the schedulers are benchmarked with (see HISTORIES)
+HISTORY_MODES = ("full", "ring", "off")
+
+# micro benchmarks, in the order they run (see MICRO)
+MICRO_BENCHMARKS = (
+    "event_calendar",
+    "status_changes",
+    "scrubbing",
+    "mlfq",
+    "victim_search",
+    "metrics_queries",
+    "kll_sketch",
+    "records_summary",
+    "timeline_playback",
+    "time_slider",
+    "lod_payload",
+    "layout",
+    "spec_loading",
+)
@@ -0,0 +1,653 @@
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict, deque
+
+import orjson
+import yaml
+
+from bench_options import METRICS
+from dag import DAG, TaskStatus
+from events import EventCalendar, EventType
+from history import RingBuffer, SchedulerHistory
+from layout import layouts
+from lod import build_lod
+from mlfq import MultiLevelFeedbackQueue
+from read_graph import read_yaml, specs
+from records import summarize
+from running import RunningIndex
+from scheduling import FCFS, SCHEDULERS
+from simulation import EventLog, simulate
+from sketch import KLLSketch
+from time_index import marks
+from timeline import MESSAGE_WINDOW, build_timeline, global_metrics
+from workload import build_workload, generate_workload
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# fields telling benchmark cases apart
+CASE_FIELDS = ("benchmark", "variant", "scheduler", "size", "history")
+
+# users of 100 map-reduce tasks arriving often enough to keep the cluster busy
+TASKS_PER_USER = 100
+WORKLOAD = {
+    "tasks": TASKS_PER_USER,
+    "shape": "mapreduce",
+    "arrival": "poisson",
+    "rate": 0.05,
+    "duration": "uniform:1,20",
+    "cpus": "uniform:1,4",
+    "ram": "uniform:1,8",
+    "priority": "uniform:0,10",
+    "cluster": (64, 256),
+}
+
+# full: SchedulerHistory as used by the UI, its size grows with
+# tasks x events; ring: only the last 100 events are kept; off: no history
+HISTORIES = {
+    "full": lambda: SchedulerHistory(),
+    "ring": lambda: SchedulerHistory(retention=RingBuffer(100)),
+    "off": lambda: EventLog(enabled=False),
+}
+
+
+class CountingHistory:
+    """
+    Counts scheduling events and forwards them to another history
+    """
+
+    def __init__(self, history) -> None:
+        self.history = history
+        self.events = 0
+
+    def add_event(self, *args, **kwargs):
+        self.events += 1
+        self.history.add_event(*args, **kwargs)
+
+
+def peak_rss():
+    """
+    Peak resident set size of this process in bytes
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def run_case(scheduler, size, history_mode="ring", seed=0):
+    """
+    Benchmark one scheduler on a generated workload of size tasks
+    """
+    users = max(1, size // TASKS_PER_USER)
+    data = build_workload(users=users, seed=seed, **WORKLOAD)
+
+    history = CountingHistory(HISTORIES[history_mode]())
+    # without a history nothing reads the scheduler messages
+    message_level = None if history_mode == "off" else logging.DEBUG
+    instance, elapsed = simulate(
+        data, scheduler, history=history, message_level=message_level
+    )
+
+    return {
+        "scheduler": scheduler,
+        "size": users * TASKS_PER_USER,
+        "history": history_mode,
+        "wall_time": elapsed,
+        "events": history.events,
+        "events_per_sec": history.events / elapsed if elapsed else float("inf"),
+        "peak_rss": peak_rss(),
+        "history_bytes": getattr(history.history, "bytes", 0),
+        "end_time": instance.time,
+    }
+
+
+def run_suite(schedulers=None, sizes=None, history_mode="ring", isolate=True):
+    """
+    Run every (scheduler, size) case, each in a fresh process when isolate
+    is set so that peak_rss is not inflated by previous cases
+    """
+    cases = [
+        (scheduler, size, history_mode)
+        for size in sizes or SIZES
+        for scheduler in schedulers or list(SCHEDULERS)
+    ]
+    if not isolate:
+        return [run_case(*case) for case in cases]
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for case in cases:
+        with context.Pool(1, maxtasksperchild=1) as pool:
+            results.append(pool.apply(run_case, case))
+    return results
+
+
+def save_results(path, results):
+    """
+    Write results to a JSON baseline file
+    """
+    baseline = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(baseline, option=orjson.OPT_INDENT_2))
+
+
+def load_results(path):
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())["results"]
+
+
+def case_key(result):
+    return tuple(result.get(field) for field in CASE_FIELDS)
+
+
+def compare(baseline, results, metric="wall_time", threshold=0.2):
+    """
+    Cases where metric is more than threshold (relative) worse than in the
+    baseline ("regressed"), and cases only in the baseline ("missing") or
+    only in the results ("new"), so a partial run never passes silently
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric}")
+    higher_is_better = METRICS[metric]
+
+    previous = {case_key(result): result.get(metric) for result in baseline}
+    current = {case_key(result): result.get(metric) for result in results}
+    regressions = []
+    for key in list(previous) + [key for key in current if key not in previous]:
+        old, new = previous.get(key), current.get(key)
+        if old is None or new is None:
+            reason, change = "missing" if new is None else "new", None
+        else:
+            change = (new - old) / old if old else 0.0
+            if higher_is_better:
+                change = -change
+            if change <= threshold:
+                continue
+            reason = "regressed"
+        case = {f: v for f, v in zip(CASE_FIELDS, key) if v is not None}
+        case.update(
+            metric=metric, baseline=old, value=new, change=change, reason=reason
+        )
+        regressions.append(case)
+    return regressions
+
+
+def format_results(results):
+    lines = [
+        f"{'scheduler':<10}{'size':>10}{'wall (s)':>10}{'events/s':>12}"
+        f"{'rss (MB)':>10}{'history (MB)':>14}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r['scheduler']:<10}{r['size']:>10}{r['wall_time']:>10.2f}"
+            f"{r['events_per_sec']:>12.0f}{r['peak_rss'] / 1e6:>10.1f}"
+            f"{r['history_bytes'] / 1e6:>14.1f}"
+        )
+    return "\n".join(lines)
+
+
+# micro benchmarks of single components: name -> function(scale) returning
+# {variant: {"wall_time": seconds, ...}}, workload sizes are multiplied by
+# scale
+MICRO = {}
+
+
+def micro(name):
+    """
+    Register a micro benchmark (see MICRO)
+    """
+
+    def register(func):
+        MICRO[name] = func
+        return func
+
+    return register
+
+
+def scaled(n, scale):
+    return max(1, int(n * scale))
+
+
+def timed(func, repeat=1):
+    """
+    (mean wall time of func() over repeat calls, what the last call returned)
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        value = func()
+    return (time.perf_counter() - start) / repeat, value
+
+
+def run_micro(names=None, scale=1.0):
+    """
+    Run the micro benchmarks (all by default), one result per variant
+    """
+    results = []
+    for name in names or list(MICRO):
+        for variant, metrics in MICRO[name](scale).items():
+            results.append({"benchmark": name, "variant": variant, **metrics})
+    return results
+
+
+def format_micro(results):
+    lines = [f"{'benchmark':<20}{'variant':<24}{'wall (ms)':>12}{'payload (KB)':>14}"]
+    for r in results:
+        payload = r.get("payload_bytes")
+        lines.append(
+            f"{r['benchmark']:<20}{r['variant']:<24}{r['wall_time'] * 1e3:>12.2f}"
+            f"{'' if payload is None else f'{payload / 1024:.1f}':>14}"
+        )
+    return "\n".join(lines)
+
+
+@micro("event_calendar")
+def bench_event_calendar(scale):
+    """
+    Finding the next finish event by scanning every running task (before the
+    event calendar) against popping it from the event calendar
+    """
+    concurrent, events = scaled(2000, scale), scaled(2000, scale)
+    rng = random.Random(42)
+    finish_times = [rng.uniform(1, 100) for _ in range(concurrent)]
+
+    def scan():
+        rng = random.Random(0)
+        running = dict(enumerate(finish_times))
+        key = len(running)
+        for _ in range(events):
+            now = min(running.values())
+            for k in [k for k, t in running.items() if t <= now]:
+                del running[k]
+                running[key] = now + rng.uniform(1, 100)
+                key += 1
+
+    def calendar():
+        rng = random.Random(0)
+        calendar = EventCalendar()
+        for key, t in enumerate(finish_times):
+            calendar.push(t, EventType.FINISH, key)
+        key = len(finish_times)
+        for _ in range(events):
+            now = calendar.next_time()
+            for _ in calendar.pop_due(now):
+                calendar.push(now + rng.uniform(1, 100), EventType.FINISH, key)
+                key += 1
+
+    return {
+        "scan": {"wall_time": timed(scan)[0]},
+        "calendar": {"wall_time": timed(calendar)[0]},
+    }
+
+
+def finished_run(users, tasks, seed=2):
+    """
+    FCFS scheduler with a full history, run to the end
+    """
+    data = build_workload(users=users, tasks=tasks, rate=0.05, seed=seed)
+    users = list(data["users"])
+    scheduler = FCFS(data["cluster"], data["users"], users, deserialize=False)
+    scheduler.run()
+    return scheduler
+
+
+@micro("status_changes")
+def bench_status_changes(scale):
+    """
+    What a time step sends to the browser: every DAG (before status diffs)
+    against the status changes since the previous step
+    """
+    scheduler = finished_run(scaled(20, scale), 100)
+    times = sorted(scheduler.history.times)[1:40]
+
+    def full(prev, t):
+        _, dags, _ = scheduler.get_history(t)
+        return {user: dag.to_dict() for user, dag in dags.items()}
+
+    results = {}
+    for variant, payload in (
+        ("full_dags", full),
+        ("diff", scheduler.get_status_changes),
+    ):
+        elapsed, size = timed(
+            lambda: sum(
+                len(orjson.dumps(payload(prev, t))) for prev, t in zip(times, times[1:])
+            )
+        )
+        results[variant] = {"wall_time": elapsed, "payload_bytes": size}
+    return results
+
+
+@micro("scrubbing")
+def bench_scrubbing(scale):
+    """
+    Scrubbing back and forth over a few time steps with only the last
+    rebuilt event kept against the events of the window kept
+    """
+    scheduler = finished_run(scaled(20, scale), 100)
+    history = scheduler.history
+    window = sorted(history.times)[10:14]
+    steps = (window + window[::-1]) * 5
+
+    def scrub():
+        for t in steps:
+            scheduler.get_history(t)
+            scheduler.get_history_metrics_at_t(t)
+
+    results = {}
+    for variant, kept in (("last_event", 1), ("window_kept", len(window))):
+        history.rebuilt.size = kept
+        history.rebuilt.clear()
+        results[variant] = {"wall_time": timed(scrub)[0]}
+    return results
+
+
+class ScanQueue:
+    """
+    Multi level queue before the heap of levels, finds the highest level
+    with max()
+    """
+
+    def __init__(self) -> None:
+        self.levels = defaultdict(deque)
+        self.size = 0
+
+    def put(self, item, priority):
+        self.size += 1
+        self.levels[priority].appendleft(item)
+
+    def get(self):
+        max_prio = max(self.levels.keys())
+        result = self.levels[max_prio].pop()
+        self.size -= 1
+        if not self.levels[max_prio]:
+            del self.levels[max_prio]
+        return result
+
+
+@micro("mlfq")
+def bench_mlfq(scale):
+    """
+    put/get with many distinct priority levels (e.g. priorities computed
+    from task durations), and put_many
+    """
+    rng = random.Random(0)
+    priorities = [rng.randrange(2000) for _ in range(scaled(20000, scale))]
+
+    def run(queue):
+        for i, priority in enumerate(priorities):
+            queue.put(i, priority)
+            if i % 2:
+                queue.get()
+        while queue.size:
+            queue.get()
+
+    def put_many():
+        MultiLevelFeedbackQueue().put_many(enumerate(priorities))
+
+    return {
+        "scan": {"wall_time": timed(lambda: run(ScanQueue()))[0]},
+        "heap": {"wall_time": timed(lambda: run(MultiLevelFeedbackQueue()))[0]},
+        "put_many": {"wall_time": timed(put_many)[0]},
+    }
+
+
+@micro("victim_search")
+def bench_victim_search(scale):
+    """
+    Preemption victim searches by sorting every running task (before the
+    running index) against the running index
+    """
+    rng = random.Random(0)
+    tasks = {
+        key: (rng.randrange(100), rng.uniform(0, 100), rng.randint(1, 4), 1)
+        for key in range(scaled(2000, scale))
+    }
+    rng = random.Random(1)
+    queries = [
+        (rng.randrange(100), rng.randint(1, 1000)) for _ in range(scaled(500, scale))
+    ]
+
+    def sort():
+        for priority, cpus in queries:
+            freed = 0
+            for prio, _, key in sorted((t[0], t[1], key) for key, t in tasks.items()):
+                if prio >= priority:
+                    break
+                freed += tasks[key][2]
+                if freed >= cpus:
+                    break
+
+    index = RunningIndex()
+    for key, (priority, started, cpus, ram) in tasks.items():
+        index.add(key, priority, started, cpus, ram)
+
+    def search():
+        for i, (priority, cpus) in enumerate(queries):
+            index.victims(priority, cpus, 0)
+            # running set changes between searches
+            key = i % len(tasks)
+            index.remove(key)
+            index.add(key, *tasks[key])
+
+    return {
+        "sort": {"wall_time": timed(sort)[0]},
+        "running_index": {"wall_time": timed(search)[0]},
+    }
+
+
+@micro("metrics_queries")
+def bench_metrics_queries(scale):
+    """
+    Global metrics queries over the per task values (before running
+    aggregates) against the aggregates
+    """
+    metrics = finished_run(scaled(50, scale), 200, seed=1).metrics
+
+    def per_task():
+        metrics.get_jct()
+        metrics.get_makespan()
+        metrics.get_queuing_time()
+
+    def aggregates():
+        metrics.get_mean_jct()
+        metrics.get_makespan()
+        metrics.get_mean_queuing_time()
+
+    return {
+        "per_task": {"wall_time": timed(per_task, 50)[0]},
+        "aggregates": {"wall_time": timed(aggregates, 50)[0]},
+    }
+
+
+@micro("kll_sketch")
+def bench_kll_sketch(scale):
+    """
+    Quantiles of many values: sorting every value against a KLL sketch, the
+    payload is what a sweep cell stores to merge quantiles later
+    """
+    rng = random.Random(4)
+    values = [rng.random() for _ in range(scaled(200_000, scale))]
+
+    def exact():
+        ordered = sorted(values)
+        return [ordered[int(q * (len(ordered) - 1))] for q in (0.5, 0.9, 0.99)]
+
+    def sketched():
+        sketch = KLLSketch()
+        for value in values:
+            sketch.update(value)
+        sketch.percentiles()
+        return sketch
+
+    elapsed, sketch = timed(sketched)
+    return {
+        "sorted": {
+            "wall_time": timed(exact)[0],
+            "payload_bytes": len(orjson.dumps(values)),
+        },
+        "kll": {
+            "wall_time": elapsed,
+            "payload_bytes": len(orjson.dumps(sketch.to_dict())),
+        },
+    }
+
+
+@micro("records_summary")
+def bench_records_summary(scale):
+    """
+    Global metrics of a run through the per task values against a numpy
+    group-by over the task records
+    """
+    metrics = finished_run(scaled(40, scale), 500, seed=3).metrics
+
+    def per_task():
+        metrics.get_jct()
+        metrics.get_queuing_time()
+        metrics.get_makespan()
+
+    return {
+        "per_task": {"wall_time": timed(per_task, 5)[0]},
+        "records": {"wall_time": timed(lambda: summarize(metrics.records), 5)[0]},
+    }
+
+
+@micro("timeline_playback")
+def bench_timeline_playback(scale):
+    """
+    Time steps of a finished run rendered by the server one frame at a time
+    against the whole timeline sent once and played back in the browser
+    """
+    scheduler = finished_run(scaled(20, scale), 100)
+    times = sorted(scheduler.history.times)[:100]
+
+    def frames():
+        size = 0
+        for since, t in zip([None] + times, times):
+            messages, _, utilization = scheduler.get_history(t)
+            frame = {
+                "diff": scheduler.get_status_changes(t, since),
+                "messages": messages[-MESSAGE_WINDOW:],
+                "utilization": utilization,
+                "metrics": global_metrics(scheduler.get_history_metrics_at_t(t)),
+            }
+            size += len(orjson.dumps(frame))
+        return size
+
+    elapsed, timeline = timed(lambda: orjson.dumps(build_timeline(scheduler)))
+    frames_time, frames_size = timed(frames)
+    return {
+        "server_frames": {"wall_time": frames_time, "payload_bytes": frames_size},
+        "timeline": {"wall_time": elapsed, "payload_bytes": len(timeline)},
+    }
+
+
+@micro("time_slider")
+def bench_time_slider(scale):
+    """
+    Time step picker of a run: a dropdown option per event time against the
+    slider stops binned by the time index
+    """
+    history = finished_run(scaled(100, scale), 100, seed=3).history
+
+    def dropdown():
+        options = [
+            {"label": "Initial" if t == -1 else f"Time={t}", "value": t}
+            for t in sorted(history.times)
+        ]
+        return orjson.dumps(options)
+
+    def slider():
+        history.time_index = None
+        stops = history.get_time_index().bins()
+        return orjson.dumps(marks(stops), option=orjson.OPT_NON_STR_KEYS)
+
+    results = {}
+    for variant, func in (("dropdown", dropdown), ("slider", slider)):
+        elapsed, payload = timed(func, 5)
+        results[variant] = {"wall_time": elapsed, "payload_bytes": len(payload)}
+    return results
+
+
+@micro("lod_payload")
+def bench_lod_payload(scale):
+    """
+    DAGs sent to the browser: every task node and edge against the level of
+    detail aggregation sent for DAGs over the element budget
+    """
+    data = build_workload(users=scaled(20, scale), tasks=500, rate=0.05, seed=3)
+    dags = {user: DAG(tasks) for user, tasks in data["users"].items()}
+
+    def full():
+        return orjson.dumps({user: dag.to_dict() for user, dag in dags.items()})
+
+    def aggregated():
+        return orjson.dumps(build_lod(dags))
+
+    results = {}
+    for variant, func in (("dags", full), ("lod", aggregated)):
+        elapsed, payload = timed(func)
+        results[variant] = {"wall_time": elapsed, "payload_bytes": len(payload)}
+    return results
+
+
+@micro("layout")
+def bench_layout(scale):
+    """
+    Rendering a DAG laid out from scratch against rendering it again after a
+    status change, which reuses the layout cached for its topology
+    """
+    data = build_workload(users=1, tasks=scaled(5000, scale), rate=0.05, seed=3)
+    dag = DAG(next(iter(data["users"].values())))
+    task = next(iter(dag.tasks.values()))
+
+    def first():
+        layouts.clear()
+        return dag.render_state()
+
+    def status_change():
+        running = task.status is TaskStatus.RUNNING
+        task.status = TaskStatus.READY if running else TaskStatus.RUNNING
+        return dag.render_state()
+
+    first_time = timed(first)[0]
+    return {
+        "layout": {"wall_time": first_time},
+        "cached": {"wall_time": timed(status_change, 3)[0]},
+    }
+
+
+@micro("spec_loading")
+def bench_spec_loading(scale):
+    """
+    Loading a workload file: yaml.safe_load, a first load through
+    read_graph (libyaml's loader when available) and a repeated load of
+    the unchanged file from the spec cache
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "workload.yml")
+        with open(path, "w") as f:
+            generate_workload(f, users=scaled(4, scale), tasks=500, rate=0.05, seed=3)
+
+        def safe_load():
+            with open(path) as f:
+                return yaml.safe_load(f)
+
+        def first():
+            specs.clear()
+            return read_yaml(path)
+
+        return {
+            "safe_load": {"wall_time": timed(safe_load)[0]},
+            "read_yaml": {"wall_time": timed(first)[0]},
+            "cached": {"wall_time": timed(lambda: read_yaml(path), 10)[0]},
+        }
@@ -0,0 +1,311 @@
+import argparse
+import logging
+import sys
+
+import orjson
+
+from bench_options import HISTORY_MODES, METRICS, MICRO_BENCHMARKS
+from read_graph import read_yaml
+from scheduling import SCHEDULERS
+from simulation import (
+    EventLog,
+    simulate,
+    sketch_state,
+    summarize,
+    user_summaries,
+    write_rows,
+)
+from sketch import merge_sketches
+from sweep import make_grid, parse_cluster, run_sweep
+from workload import ARRIVALS, SHAPES, generate_workload
+
+
+def print_json(data):
+    sys.stdout.write(orjson.dumps(data).decode() + "\n")
+
+
+def run(args):
+    data = read_yaml(args.spec)
+    log = EventLog(enabled=args.events is not None)
+    # messages are only kept when the event log is written
+    message_level = getattr(logging, args.message_level) if args.events else None
+    scheduler, elapsed = simulate(
+        data,
+        args.scheduler,
+        history=log,
+        profile=args.profile,
+        message_level=message_level,
+    )
+
+    summary = {"spec": args.spec, "scheduler": args.scheduler}
+    summary.update(summarize(scheduler, elapsed))
+    if args.profile:
+        summary["profile"] = scheduler.profile()
+    print_json(summary)
+    if args.output:
+        write_rows(args.output, user_summaries(scheduler))
+    if args.events:
+        write_rows(args.events, log.records)
+    if args.tasks:
+        write_rows(args.tasks, scheduler.metrics.records.rows(scheduler.dags))
+    if args.sketches:
+        with open(args.sketches, "wb") as f:
+            f.write(orjson.dumps(sketch_state(scheduler.metrics)))
+    return 0
+
+
+def quantiles(args):
+    states = []
+    for path in args.sketches:
+        with open(path, "rb") as f:
+            states.append(orjson.loads(f.read()))
+    metrics = sorted({metric for state in states for metric in state})
+    print_json(
+        {
+            metric: merge_sketches(
+                state[metric] for state in states if metric in state
+            ).percentiles()
+            for metric in metrics
+        }
+    )
+    return 0
+
+
+def sweep(args):
+    clusters = [parse_cluster(cluster) for cluster in args.clusters or []]
+    cells = make_grid(args.workloads, args.schedulers, clusters)
+    report = run_sweep(cells, args.output, args.jobs)
+    print_json(report)
+    return 1 if report["failed"] else 0
+
+
+def generate(args):
+    options = {
+        key: getattr(args, key)
+        for key in (
+            "users",
+            "tasks",
+            "shape",
+            "arrival",
+            "rate",
+            "burst",
+            "duration",
+            "cpus",
+            "ram",
+            "priority",
+            "width",
+            "edge_prob",
+            "seed",
+        )
+    }
+    options["cluster"] = parse_cluster(args.cluster)
+    if args.output == "-":
+        generate_workload(sys.stdout, **options)
+    else:
+        with open(args.output, "w") as f:
+            generate_workload(f, **options)
+    return 0
+
+
+def bench(args):
+    # the benchmarks import most of the package
+    from benchmark import (
+        compare,
+        format_micro,
+        format_results,
+        load_results,
+        run_micro,
+        run_suite,
+        save_results,
+    )
+
+    if args.micro is not None:
+        results = run_micro(args.micro)
+        print(format_micro(results))
+    else:
+        results = run_suite(args.schedulers, args.sizes, args.history, args.isolate)
+        print(format_results(results))
+    if args.save:
+        save_results(args.save, results)
+    if not args.compare:
+        return 0
+
+    regressions = compare(
+        load_results(args.compare), results, args.metric, args.threshold
+    )
+    for regression in regressions:
+        print_json(regression)
+    return 1 if regressions else 0
+
+
+COMMANDS = {
+    "run": run,
+    "quantiles": quantiles,
+    "sweep": sweep,
+    "generate": generate,
+    "bench": bench,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="dagsched", description="Run DAG scheduling simulations without the UI"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--log-level", default="WARNING")
+
+    run_parser = commands.add_parser(
+        "run", parents=[common], help="simulate a YAML spec"
+    )
+    run_parser.add_argument("spec", help="YAML file with the cluster and user DAGs")
+    run_parser.add_argument(
+        "--scheduler", type=str.upper, choices=list(SCHEDULERS), default="FCFS"
+    )
+    run_parser.add_argument(
+        "-o", "--output", help="write per user metrics to a .jsonl or .csv file"
+    )
+    run_parser.add_argument(
+        "--events", help="write the event log to a .jsonl or .csv file"
+    )
+    run_parser.add_argument(
+        "--tasks",
+        help="write per task records (ready, start, end, preemptions, queue "
+        "time) to a .jsonl or .csv file",
+    )
+    run_parser.add_argument(
+        "--sketches",
+        help="write the quantile sketches of the run to a JSON file, "
+        "see the quantiles command",
+    )
+    run_parser.add_argument(
+        "--message-level",
+        type=str.upper,
+        choices=["DEBUG", "INFO"],
+        default="DEBUG",
+        help="lowest level of the messages in the event log (DEBUG: ready tasks)",
+    )
+    run_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="add time spent in each scheduling phase to the summary",
+    )
+
+    sweep_parser = commands.add_parser(
+        "sweep",
+        parents=[common],
+        help="simulate every (workload, scheduler, cluster) combination",
+        description="Cells already in the output file are not run again",
+    )
+    sweep_parser.add_argument("workloads", nargs="+", help="YAML specs")
+    sweep_parser.add_argument(
+        "--schedulers",
+        nargs="+",
+        type=str.upper,
+        choices=list(SCHEDULERS),
+        help="defaults to every scheduler",
+    )
+    sweep_parser.add_argument(
+        "--clusters",
+        nargs="+",
+        help="cluster sizes as CPUSxRAM, defaults to the cluster of each spec",
+    )
+    sweep_parser.add_argument(
+        "-o", "--output", required=True, help="results .jsonl or .csv file"
+    )
+    sweep_parser.add_argument(
+        "-j", "--jobs", type=int, help="worker processes, defaults to all cores"
+    )
+
+    quantiles_parser = commands.add_parser(
+        "quantiles",
+        parents=[common],
+        help="merge the sketches of several runs and print their percentiles",
+    )
+    quantiles_parser.add_argument(
+        "sketches", nargs="+", help="JSON files written by run --sketches"
+    )
+
+    generate_parser = commands.add_parser(
+        "generate",
+        parents=[common],
+        help="write a synthetic workload",
+        description="Distributions are given as const:V, uniform:LO,HI, exp:MEAN "
+        "or lognormal:MU,SIGMA",
+    )
+    generate_parser.add_argument("output", help="YAML file to write, - for stdout")
+    generate_parser.add_argument("--users", type=int, default=1)
+    generate_parser.add_argument("--tasks", type=int, default=10, help="per user")
+    generate_parser.add_argument(
+        "--shape",
+        choices=list(SHAPES),
+        default="chain",
+        help="; ".join(f"{name}: {desc}" for name, desc in SHAPES.items()),
+    )
+    generate_parser.add_argument(
+        "--arrival",
+        choices=list(ARRIVALS),
+        default="poisson",
+        help="; ".join(f"{name}: {desc}" for name, desc in ARRIVALS.items()),
+    )
+    generate_parser.add_argument("--rate", type=float, default=0.1)
+    generate_parser.add_argument("--burst", type=float, default=5)
+    generate_parser.add_argument("--duration", default="uniform:1,20")
+    generate_parser.add_argument("--cpus", default="const:1")
+    generate_parser.add_argument("--ram", default="const:1")
+    generate_parser.add_argument("--priority", help="tasks have no priority if unset")
+    generate_parser.add_argument("--width", type=int, default=8)
+    generate_parser.add_argument("--edge-prob", type=float, default=0.1)
+    generate_parser.add_argument("--cluster", default="20x100", help="CPUSxRAM")
+    generate_parser.add_argument("--seed", type=int, default=0)
+
+    bench_parser = commands.add_parser(
+        "bench",
+        parents=[common],
+        help="benchmark schedulers on generated workloads",
+        description="Exits with 1 if --compare finds a regression, or a case "
+        "missing from the results or the baseline",
+    )
+    bench_parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[1_000, 10_000], help="tasks"
+    )
+    bench_parser.add_argument(
+        "--schedulers", nargs="+", type=str.upper, choices=list(SCHEDULERS)
+    )
+    bench_parser.add_argument("--history", choices=HISTORY_MODES, default="ring")
+    bench_parser.add_argument(
+        "--no-isolate",
+        dest="isolate",
+        action="store_false",
+        help="run every case in this process (peak RSS is then cumulative)",
+    )
+    bench_parser.add_argument(
+        "--micro",
+        nargs="*",
+        choices=MICRO_BENCHMARKS,
+        help="run the micro benchmarks of single components (all by default) "
+        "instead of the schedulers",
+    )
+    bench_parser.add_argument("--save", help="write results to a JSON baseline")
+    bench_parser.add_argument("--compare", help="JSON baseline to compare against")
+    bench_parser.add_argument("--metric", choices=list(METRICS), default="wall_time")
+    bench_parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed relative regression"
+    )
+    return parser
+
+
+def main(argv=None):
+    """
+    Summary of the run or sweep is printed to stdout as a JSON line
+    """
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        format="%(asctime)s %(levelname)s: %(message)s",
+        level=args.log_level.upper(),
+    )
+    return COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
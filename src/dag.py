@@ -1,7 +1,13 @@
 import orjson
-from dataclasses import dataclass
+from array import array
+from collections.abc import Mapping
 from enum import Enum
 
+from layout import layered_layout
+
+# stored in the DAG arrays in place of None
+MISSING = -(2**63)
+
 
 class TaskStatus(Enum):
     READY = 1
@@ -11,89 +17,192 @@ class TaskStatus(Enum):
     PREEMPTED = 5
 
 
-@dataclass
+STATUSES = {status.value: status for status in TaskStatus}
+
+
+class Column:
+    """
+    Exposes one entry of a DAG array as a Task attribute
+
+    Arrays start out as 64 bit integers when every input is an integer and
+    are widened to floats the first time a float is stored in them.
+    """
+
+    def __init__(self, optional=True):
+        self.optional = optional
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, task, owner=None):
+        if task is None:
+            return self
+        value = getattr(task.dag, self.name)[task.index]
+        if self.optional and value == MISSING:
+            return None
+        return value
+
+    def __set__(self, task, value):
+        if value is None:
+            value = MISSING
+        values = getattr(task.dag, self.name)
+        try:
+            values[task.index] = value
+        except TypeError:
+            values = task.dag.widen(self.name)
+            values[task.index] = value
+
+
 class Task:
     """
-    Needs to be serializable to JSON to be useable in dash and cytoscape
+    View on a single task stored in a DAG
+
+    The task data lives in the arrays of its DAG, a Task only stores the
+    DAG and its integer index in it, so views are created on demand.
 
     status is tracked by TaskStatus enum
-    properties that are available in the front-end must be stored in the props dict
+    props builds the dict of properties shown in the front-end
     """
 
+    __slots__ = ("dag", "index")
+
     required = ["label", "duration"]
     optional = {"cpus": 1, "ram": 1}
-    status = None
+
+    duration = Column(optional=False)
+    cpus = Column(optional=False)
+    ram = Column(optional=False)
+    priority = Column()
     # used to track when a task started to be ready
-    ready_time = None
-    start = None
-    end = None
-    runtime = 0
+    ready_time = Column()
+    start = Column()
+    end = Column()
+    runtime = Column(optional=False)
     # used for preemption to know how long a task ran for
-    prev_runtime = None
-    priority = None
+    prev_runtime = Column()
+    # number of dependencies that have not finished yet
+    remaining_dependencies = Column()
 
-    def __init__(self, name, props, status=None):
-        """
-        Build task
-        """
-        self.id = name
-        self.validate(props)
+    def __init__(self, dag, index):
+        self.dag = dag
+        self.index = index
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Task)
+            and self.dag is other.dag
+            and self.index == other.index
+        )
+
+    def __hash__(self):
+        return hash((id(self.dag), self.index))
+
+    def __repr__(self):
+        return f"Task({self.id!r}, status={self.status})"
+
+    @property
+    def id(self):
+        return self.dag.ids[self.index]
+
+    @property
+    def label(self):
+        return self.dag.labels[self.index]
 
-        # used for visible properties in cytoscape
-        self.props = self.add_defaults(props)
-        self.status = status
+    @property
+    def status(self):
+        return STATUSES.get(self.dag.status[self.index])
 
-    def validate(self, props):
-        for req in self.required:
+    @status.setter
+    def status(self, status):
+        self.dag.status[self.index] = status.value if status else 0
+
+    @classmethod
+    def validate(cls, props):
+        for req in cls.required:
             if req not in props:
                 raise ValueError(f"Missing {req} in task definition")
 
-    def add_defaults(self, props):
-        for opt, val in self.optional.items():
-            if opt not in props:
-                props[opt] = val
-        props["id"] = self.id
-
-        if self.status:
-            props["status"] = self.status
-        if "priority" in props:
-            self.priority = props["priority"]
-        return props
+    @property
+    def props(self):
+        return self.dag.get_props(self.index)
 
     def get_props(self):
-        if self.status and isinstance(self.status, TaskStatus):
-            self.props["status"] = self.status.name
         return self.props
 
     def toJSON(self):
-        return orjson.dumps(self)
+        return orjson.dumps(self.props)
+
+
+class TaskMap(Mapping):
+    """
+    Read-only task id -> Task mapping over the tasks of a DAG
+    """
+
+    __slots__ = ("dag",)
+
+    def __init__(self, dag):
+        self.dag = dag
+
+    def __getitem__(self, task_id):
+        return Task(self.dag, self.dag.index[task_id])
+
+    def __iter__(self):
+        return iter(self.dag.ids)
+
+    def __len__(self):
+        return len(self.dag.ids)
+
+    def __contains__(self, task_id):
+        return task_id in self.dag.index
 
 
-@dataclass
 class DAG:
     """
-    Must be JSON serializable to be accessible in Dash state
+    Must be JSON serializable to be accessible in Dash state (see to_dict)
 
-    Stores metadata about DAG (e.g. name of user, arrival time, nodes and edges)
+    Stores metadata about DAG (e.g. name of user, arrival time) and its tasks
+    in a columnar layout: task i is described by entry i of the duration,
+    cpus, ram, status, ... arrays, dependencies are stored as CSR arrays
+    (parents of task i are parent_indices[parent_indptr[i]:parent_indptr[i+1]],
+    children likewise).
 
-    render_state method returns nodes and edges in cytoscape js format
+    render_state method returns nodes and edges in cytoscape js format, they
+    are only built when requested. Nodes come with preset positions (see
+    src/layout.py).
     """
 
     layout = None
 
+    # input columns
+    inputs = ("duration", "cpus", "ram", "priority")
+    # columns changed while scheduling
+    state = ("ready_time", "start", "end", "runtime", "prev_runtime")
+    # task properties that are not shown in the front-end as is
+    known_keys = {"label", "id", "parent", "status", "dependencies"} | set(inputs)
+
     def __init__(self, dag, deserialize=False):
-        self.nodes = []
-        self.edges = []
         self.name = dag["name"]
         self.arrival_time = dag["arrival_time"]
-        self.tasks = {}
-        # add compound parent nodes
-        self.nodes.append(
-            {
-                "data": {"id": self.name, "label": self.name},
-                "classes": "parent",
-            }
-        )
+
+        self.ids = []
+        self.labels = []
+        self.index = {}
+        for column in self.inputs + self.state:
+            setattr(self, column, array("q"))
+        self.status = array("b")
+        self.remaining_dependencies = array("q")
+
+        # dependencies as given for each task, resolved to CSR arrays lazily
+        self.dependencies = []
+        self.parent_indptr = None
+        self.parent_indices = None
+        self.child_indptr = None
+        self.child_indices = None
+
+        # task index -> dependencies on tasks that are not in the DAG
+        self.unresolved = {}
+        # task index -> extra properties from the input file
+        self.extra = {}
 
         if deserialize:
             # if the task came from Dash, we need to
@@ -104,45 +213,238 @@ class DAG:
                     # skip parent nodes to construct compound nodes
                     continue
                 name = data["id"]
-                if name in dag["tasks"]:
+                status = data.get("status")
+                if name in dag.get("tasks", {}):
                     status = dag["tasks"][name]["status"]
                     if status:
                         status = TaskStatus(status).name
-                    data["status"] = status
                 self.add_task(name, data)
+                if status:
+                    self.status[-1] = TaskStatus[status].value
             return
         for name, task in dag["tasks"].items():
             self.add_task(name, task)
 
-    def add_task(self, name, task):
+    def task_id(self, name):
         if self.name not in name:
             name = f"{self.name},{name}"
-        task = Task(name, task)
-        self.tasks[name] = task
+        return name
 
-        props = task.get_props()
-        props["parent"] = self.name
-        node = {"data": props}
-        self.nodes.append(node)
+    def add_task(self, name, task):
+        name = self.task_id(name)
+        Task.validate(task)
+
+        index = len(self.ids)
+        self.index[name] = index
+        self.ids.append(name)
+        self.labels.append(task["label"])
+        for column in self.inputs:
+            value = task.get(column, Task.optional.get(column))
+            self.append(column, MISSING if value is None else value)
+        for column in self.state:
+            getattr(self, column).append(MISSING)
+        self.runtime[-1] = 0
+        self.status.append(0)
+        self.remaining_dependencies.append(MISSING)
+
+        if not task.keys() <= self.known_keys:
+            self.extra[index] = {
+                key: value for key, value in task.items() if key not in self.known_keys
+            }
+
+        if self.parent_indptr is not None:
+            self.thaw()
+        dependencies = task.get("dependencies")
+        self.dependencies.append(list(dependencies) if dependencies else ())
+
+    def append(self, column, value):
+        values = getattr(self, column)
+        try:
+            values.append(value)
+        except TypeError:
+            self.widen(column).append(value)
+
+    def widen(self, column):
+        """
+        Switch an integer column to floats
+        """
+        values = array("d", getattr(self, column))
+        setattr(self, column, values)
+        return values
+
+    def build_dependencies(self):
+        """
+        Resolve dependency names to task indices and build the CSR arrays
+        """
+        parents = []
+        self.unresolved = {}
+        for index, dependencies in enumerate(self.dependencies):
+            resolved = []
+            for dependency in dependencies:
+                parent = self.index.get(self.task_id(dependency))
+                if parent is None:
+                    self.unresolved.setdefault(index, []).append(dependency)
+                else:
+                    resolved.append(parent)
+            parents.append(resolved)
+
+        children = [[] for _ in parents]
+        for index, resolved in enumerate(parents):
+            for parent in resolved:
+                children[parent].append(index)
+
+        self.parent_indptr, self.parent_indices = to_csr(parents)
+        self.child_indptr, self.child_indices = to_csr(children)
+        self.dependencies = None
+
+    def thaw(self):
+        """
+        Go back to per task dependency lists so that tasks can be added
+        """
+        self.dependencies = [
+            [self.ids[parent] for parent in self.parents(index)]
+            + self.unresolved.get(index, [])
+            for index in range(len(self.ids))
+        ]
+        self.parent_indptr = None
+
+    def csr(self):
+        if self.parent_indptr is None:
+            self.build_dependencies()
+
+    def parents(self, index):
+        self.csr()
+        return self.parent_indices[
+            self.parent_indptr[index] : self.parent_indptr[index + 1]
+        ]
+
+    def child_indices_of(self, index):
+        self.csr()
+        return self.child_indices[
+            self.child_indptr[index] : self.child_indptr[index + 1]
+        ]
+
+    def children(self, task_id):
+        """
+        ids of the tasks that depend on task_id
+        """
+        return [self.ids[i] for i in self.child_indices_of(self.index[task_id])]
+
+    def dependency_counts(self):
+        """
+        Number of dependencies of each task that are part of this DAG
+
+        Dependencies on tasks that do not exist never block a task.
+        """
+        self.csr()
+        indptr = self.parent_indptr
+        return {
+            task_id: indptr[i + 1] - indptr[i] for i, task_id in enumerate(self.ids)
+        }
+
+    def reset_state(self):
+        """
+        Forget any scheduling state (e.g. statuses of a deserialized DAG)
+        """
+        n = len(self.ids)
+        for column in self.state:
+            setattr(self, column, array("q", [MISSING]) * n)
+        self.runtime = array("q", [0]) * n
+        self.status = array("b", [0]) * n
+        self.remaining_dependencies = array("q", [MISSING]) * n
+
+    @property
+    def tasks(self):
+        return TaskMap(self)
+
+    def task(self, index):
+        return Task(self, index)
+
+    def get_props(self, index):
+        """
+        Properties of a task shown in the front-end
+        """
+        self.csr()
+        props = {"label": self.labels[index]}
+        for column in self.inputs:
+            value = getattr(self, column)[index]
+            if value != MISSING:
+                props[column] = value
+        dependencies = [self.ids[i].split(",")[-1] for i in self.parents(index)]
+        dependencies += self.unresolved.get(index, [])
+        if dependencies:
+            props["dependencies"] = dependencies
+        props.update(self.extra.get(index, {}))
+        props["id"] = self.ids[index]
+        status = STATUSES.get(self.status[index])
+        if status:
+            props["status"] = status.name
+        return props
 
-        if "dependencies" in props and props["dependencies"]:
-            for dependency in props["dependencies"]:
-                if self.name not in dependency:
-                    dependency = f"{self.name},{dependency}"
-                edge = {"data": {"source": dependency, "target": name}}
-                self.edges.append(edge)
+    @property
+    def nodes(self):
+        # add compound parent nodes
+        nodes = [
+            {
+                "data": {"id": self.name, "label": self.name},
+                "classes": "parent",
+            }
+        ]
+        for index, (x, y) in enumerate(layered_layout(self)):
+            props = self.get_props(index)
+            props["parent"] = self.name
+            nodes.append({"data": props, "position": {"x": x, "y": y}})
+        return nodes
+
+    @property
+    def edges(self):
+        self.csr()
+        edges = []
+        for index, target in enumerate(self.ids):
+            for parent in self.parents(index):
+                edges.append({"data": {"source": self.ids[parent], "target": target}})
+        return edges
 
     def render_state(self):
         """
-        Given events that have taken place, render current graph
+        Given events that have taken place, render current graph, laid out
+        once per topology
         """
 
         return self.nodes + self.edges
 
+    def to_dict(self):
+        """
+        Serialized form that DAG(data, deserialize=True) reads back
+        """
+        return {
+            "name": self.name,
+            "arrival_time": self.arrival_time,
+            "nodes": self.nodes,
+            "edges": self.edges,
+            "tasks": {
+                task_id: {"status": self.status[i] or None}
+                for i, task_id in enumerate(self.ids)
+            },
+        }
+
+    def to_plotly_json(self):
+        # used by dash when a DAG is stored in a dcc.Store
+        return self.to_dict()
+
     def toJSON(self):
         # needed because of dash limitation where it requires
         # classes to be json serializable to be stored in a client-side dcc.Store
-        return orjson.dumps(self)
+        return orjson.dumps(self.to_dict())
+
+
+def to_csr(lists):
+    indptr = array("q", [0])
+    indices = array("q")
+    for values in lists:
+        indices.extend(values)
+        indptr.append(len(indices))
+    return indptr, indices
 
 
 if __name__ == "__main__":
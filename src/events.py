@@ -0,0 +1,81 @@
+import heapq
+from enum import Enum
+
+
+class EventType(Enum):
+    ARRIVAL = 1
+    FINISH = 2
+
+
+class EventCalendar:
+    """
+    Priority queue of future simulation events (DAG arrivals, task finishes)
+
+    Events are ordered by (time, insertion order) so events happening at the
+    same time are processed in the order they were scheduled.
+
+    Cancelling an event (e.g. when a running task is preempted) does not
+    touch the heap: the live sequence number of each key is tracked and stale
+    heap entries are skipped when they reach the top (lazy invalidation).
+
+    example:
+    calendar = EventCalendar()
+    calendar.push(5, EventType.FINISH, ("user", "task_1"))
+    calendar.push(3, EventType.ARRIVAL, "user2")
+    calendar.next_time() # returns 3
+    calendar.pop_due(3) # returns [(3, EventType.ARRIVAL, "user2")]
+    """
+
+    def __init__(self) -> None:
+        self.heap = []
+        # key -> sequence number of the live event for that key
+        self.live = {}
+        self.seq = 0
+
+    def __len__(self):
+        return len(self.live)
+
+    def push(self, time, kind, key):
+        """
+        Schedule an event, replacing any pending event with the same key
+        """
+        self.seq += 1
+        self.live[key] = self.seq
+        heapq.heappush(self.heap, (time, self.seq, kind, key))
+
+    def cancel(self, key):
+        """
+        Invalidate the pending event for key (no-op if there is none)
+        """
+        self.live.pop(key, None)
+
+    def _discard_stale(self):
+        heap = self.heap
+        while heap:
+            _, seq, _, key = heap[0]
+            if self.live.get(key) == seq:
+                return
+            heapq.heappop(heap)
+
+    def next_time(self):
+        """
+        Time of the next pending event, or inf if there are none left
+        """
+        self._discard_stale()
+        if not self.heap:
+            return float("inf")
+        return self.heap[0][0]
+
+    def pop_due(self, time):
+        """
+        Remove and return all pending events happening at or before time
+        """
+        due = []
+        heap = self.heap
+        while True:
+            self._discard_stale()
+            if not heap or heap[0][0] > time:
+                return due
+            event_time, _, kind, key = heapq.heappop(heap)
+            del self.live[key]
+            due.append((event_time, kind, key))
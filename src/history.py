@@ -0,0 +1,463 @@
+from copy import deepcopy
+from bisect import bisect_right
+
+from lru import LRUCache
+from messages import format_message
+from metrics import SchedulingMetrics
+from time_index import TimeIndex
+
+# task attributes that change while scheduling
+TASK_STATE_FIELDS = (
+    "status",
+    "ready_time",
+    "start",
+    "end",
+    "runtime",
+    "prev_runtime",
+    "remaining_dependencies",
+    "priority",
+)
+
+# rough per-object sizes used to estimate the memory held by the history
+EVENT_BYTES = 300
+DELTA_ENTRY_BYTES = 400
+CHECKPOINT_ENTRY_BYTES = 100
+METRICS_TASK_BYTES = 500
+MESSAGE_BYTES = 200
+
+# rebuilt events (DAGs and metrics) and task status maps kept, scrubbing
+# through the timeline reads the same few events over and over
+REBUILT_EVENTS = 8
+STATUS_MAPS = 64
+
+
+def get_task_state(task):
+    return tuple(getattr(task, field) for field in TASK_STATE_FIELDS)
+
+
+def set_task_state(task, state):
+    for field, value in zip(TASK_STATE_FIELDS, state):
+        setattr(task, field, value)
+
+
+class KeepAll:
+    """
+    Retention policy keeping every event time
+
+    All policies take an optional memory_budget (estimated bytes), when the
+    history grows past it the oldest events are dropped.
+    """
+
+    mode = "keep-all"
+
+    def __init__(self, memory_budget=None) -> None:
+        self.memory_budget = memory_budget
+
+    def max_events(self):
+        return None
+
+    def keep(self, seq):
+        """
+        Should the seq-th event added to the history be kept once a newer
+        event exists (the most recent event is always kept)
+        """
+        return True
+
+
+class RingBuffer(KeepAll):
+    """
+    Keep the last size event times
+    """
+
+    mode = "ring"
+
+    def __init__(self, size, memory_budget=None) -> None:
+        super().__init__(memory_budget)
+        if size < 1:
+            raise ValueError("Ring buffer size must be at least 1")
+        self.size = size
+
+    def max_events(self):
+        return self.size
+
+
+class Stride(KeepAll):
+    """
+    Keep every stride-th event time
+    """
+
+    mode = "stride"
+
+    def __init__(self, stride, memory_budget=None) -> None:
+        super().__init__(memory_budget)
+        if stride < 1:
+            raise ValueError("Stride must be at least 1")
+        self.stride = stride
+
+    def keep(self, seq):
+        return seq % self.stride == 0
+
+
+class LogSpaced(KeepAll):
+    """
+    Keep event times at logarithmically spaced positions (0, 1, 2, 4, 8, ...
+    for base 2) so that the history grows with log(number of events)
+    """
+
+    mode = "log"
+
+    def __init__(self, base=2, memory_budget=None) -> None:
+        super().__init__(memory_budget)
+        if base <= 1:
+            raise ValueError("Log spacing base must be greater than 1")
+        self.base = base
+        self.points = {0, 1}
+        self.last_point = 1
+
+    def keep(self, seq):
+        while self.last_point < seq:
+            self.last_point = max(self.last_point + 1, int(self.last_point * self.base))
+            self.points.add(self.last_point)
+        return seq in self.points
+
+
+RETENTION_POLICIES = {
+    policy.mode: policy for policy in (KeepAll, RingBuffer, Stride, LogSpaced)
+}
+
+
+class SchedulerHistory:
+    """
+    Store history of scheduler.
+
+    Instead of copying all scheduling state at every event time, the history
+    is an append-only log: for each event we store the tasks whose state
+    changed since the previous event (and their scheduling metrics), the
+    number of messages logged so far and the cluster utilization.
+
+    Every checkpoint_interval events a full snapshot of the task states is
+    stored. The state at time t is rebuilt by replaying the log from the
+    closest checkpoint before t. Snapshots hold the metrics of every task,
+    so the scheduling metrics are rebuilt from them and never copied.
+
+    The retention policy decides which event times are kept (see KeepAll).
+    Dropping an event folds its changes into the next kept event, or into
+    the base snapshot if it was the oldest one, so kept times are always
+    rebuilt exactly. Messages logged before the oldest kept event are dropped
+    along with it.
+    """
+
+    def __init__(self, checkpoint_interval=100, retention=None) -> None:
+        self.checkpoint_interval = checkpoint_interval
+        self.retention = retention if retention is not None else KeepAll()
+
+        # log of message records (see messages.py), messages_offset older
+        # messages were dropped
+        self.messages = []
+        self.messages_offset = 0
+
+        # one entry per kept event, ordered by seq (order the events were added)
+        self.seqs = []
+        self.event_times = []
+        # (user, label) -> (task state, task metrics) changed at that event
+        self.deltas = []
+        # number of messages logged at that event
+        self.message_counts = []
+        # cluster resources used
+        self.utilizations = []
+
+        # seq -> (user, label) -> (task state, task metrics)
+        self.checkpoints = {}
+        # sorted seqs that have a checkpoint
+        self.checkpoint_seqs = []
+
+        # state before the oldest kept event
+        self.base_seq = -1
+        self.base_states = {}
+
+        # DAGs as they were at the first event, used to rebuild DAG objects
+        self.template = None
+
+        # time -> seq of the (last) event stored at that time
+        self.index = {}
+
+        # times stored
+        self.times = set()
+
+        # estimated memory held by the history
+        self.bytes = 0
+        self.dropped_events = 0
+        self.dropped_bytes = 0
+
+        self.next_seq = 0
+
+        # seq -> (dags, metrics) and seq -> task statuses of the most
+        # recently read events
+        self.rebuilt = LRUCache(REBUILT_EVENTS)
+        self.statuses = LRUCache(STATUS_MAPS)
+        # ((next_seq, dropped_events), TimeIndex of times) when last built
+        self.time_index = None
+
+    def __getstate__(self):
+        # rebuilt events are not worth storing with the history
+        state = self.__dict__.copy()
+        state["rebuilt"] = LRUCache(self.rebuilt.size)
+        state["statuses"] = LRUCache(self.statuses.size)
+        state["time_index"] = None
+        return state
+
+    def add_event(self, t, messages, dags, utilization, metrics, changed=None):
+        """
+        Store scheduling state at time t
+
+        changed is the set of (user, label) of tasks that changed since the
+        previous event, if it is None every task is stored
+        """
+        if self.template is None:
+            self.template = deepcopy(dags)
+        if changed is None or self.next_seq == 0:
+            changed = [
+                (user, label) for user, dag in dags.items() for label in dag.tasks
+            ]
+
+        delta = {}
+        for user, label in changed:
+            task = dags[user].tasks[label]
+            delta[(user, label)] = (
+                get_task_state(task),
+                metrics.get_task_state(user, task.id),
+            )
+
+        seq = self.next_seq
+        self.next_seq += 1
+        self.seqs.append(seq)
+        self.event_times.append(t)
+        self.deltas.append(delta)
+        new_messages = messages[self.messages_offset + len(self.messages) :]
+        self.messages.extend(new_messages)
+        self.message_counts.append(len(messages))
+        self.utilizations.append(dict(utilization))
+        self.index[t] = seq
+        self.times.add(t)
+        self.bytes += (
+            EVENT_BYTES
+            + DELTA_ENTRY_BYTES * len(delta)
+            + MESSAGE_BYTES * len(new_messages)
+        )
+
+        if seq % self.checkpoint_interval == 0:
+            self.add_checkpoint(seq)
+
+        self.apply_retention()
+
+    def add_checkpoint(self, seq):
+        self.checkpoints[seq] = states = self.replay(seq)
+        self.checkpoint_seqs.append(seq)
+        self.bytes += self.checkpoint_bytes(states)
+
+    def checkpoint_bytes(self, states):
+        return (CHECKPOINT_ENTRY_BYTES + METRICS_TASK_BYTES) * len(states)
+
+    def apply_retention(self):
+        policy = self.retention
+        if len(self.seqs) > 1 and not policy.keep(self.seqs[-2]):
+            self.drop(len(self.seqs) - 2)
+
+        max_events = policy.max_events()
+        if max_events is not None:
+            while len(self.seqs) > max_events:
+                self.drop(0)
+
+        if policy.memory_budget is not None:
+            while self.bytes > policy.memory_budget and len(self.seqs) > 1:
+                self.drop(0)
+
+    def drop(self, position):
+        """
+        Forget the event at position, the most recent event can't be dropped
+        """
+        seq, t = self.seqs[position], self.event_times[position]
+        delta = self.deltas[position]
+        if self.index.get(t) == seq:
+            if position and self.event_times[position - 1] == t:
+                # another kept event happened at the same time
+                self.index[t] = self.seqs[position - 1]
+            else:
+                del self.index[t]
+                self.times.discard(t)
+        freed = EVENT_BYTES + DELTA_ENTRY_BYTES * len(delta)
+
+        if position == 0:
+            # fold into the base snapshot, older checkpoints are now useless
+            self.base_seq = seq
+            base = len(self.base_states)
+            self.base_states.update(delta)
+            # the base snapshot holds one entry per task folded into it
+            freed -= DELTA_ENTRY_BYTES * (len(self.base_states) - base)
+            while self.checkpoint_seqs and self.checkpoint_seqs[0] <= seq:
+                checkpoint = self.checkpoint_seqs.pop(0)
+                freed += self.checkpoint_bytes(self.checkpoints.pop(checkpoint))
+
+            # messages up to this event are no longer reachable
+            count = self.message_counts[position] - self.messages_offset
+            if count > 0:
+                freed += MESSAGE_BYTES * count
+                del self.messages[:count]
+                self.messages_offset += count
+        else:
+            kept = len(self.deltas[position + 1])
+            merged = dict(delta)
+            merged.update(self.deltas[position + 1])
+            self.deltas[position + 1] = merged
+            # entries of both deltas are freed, the merged one is kept
+            freed = EVENT_BYTES + DELTA_ENTRY_BYTES * (len(delta) + kept - len(merged))
+
+        for values in (
+            self.seqs,
+            self.event_times,
+            self.deltas,
+            self.message_counts,
+            self.utilizations,
+        ):
+            del values[position]
+
+        self.bytes -= freed
+        self.dropped_events += 1
+        self.dropped_bytes += freed
+        self.rebuilt.clear()
+        self.statuses.clear()
+
+    def retention_report(self):
+        """
+        How much of the history was kept and dropped by the retention policy
+        """
+        return {
+            "mode": self.retention.mode,
+            "memory_budget": self.retention.memory_budget,
+            "kept_events": len(self.seqs),
+            "dropped_events": self.dropped_events,
+            "estimated_bytes": self.bytes,
+            "dropped_bytes": self.dropped_bytes,
+        }
+
+    def replay(self, seq):
+        """
+        (task state, task metrics) of every task at event seq
+        """
+        i = bisect_right(self.checkpoint_seqs, seq) - 1
+        if i >= 0:
+            start = self.checkpoint_seqs[i]
+            states = dict(self.checkpoints[start])
+        else:
+            start = self.base_seq
+            states = dict(self.base_states)
+
+        first = bisect_right(self.seqs, start)
+        last = bisect_right(self.seqs, seq)
+        for delta in self.deltas[first:last]:
+            states.update(delta)
+        return states
+
+    def get_time_index(self):
+        """
+        TimeIndex of the times stored, rebuilt when events were added or
+        dropped
+        """
+        version = (self.next_seq, self.dropped_events)
+        if self.time_index is None or self.time_index[0] != version:
+            self.time_index = (version, TimeIndex(self.times))
+        return self.time_index[1]
+
+    def get_seq(self, t):
+        if t not in self.times:
+            raise KeyError(f"Time {t} not in scheduler history")
+        return self.index[t]
+
+    def rebuild(self, seq):
+        """
+        Rebuild DAGs and metrics as they were at an event
+        """
+        rebuilt = self.rebuilt.get(seq)
+        if rebuilt is not None:
+            return rebuilt
+
+        states = self.replay(seq)
+        dags = deepcopy(self.template)
+        metrics = SchedulingMetrics(dags)
+        for (user, label), (task_state, task_metrics) in states.items():
+            task = dags[user].tasks[label]
+            set_task_state(task, task_state)
+            metrics.set_task_state(user, task.id, task_metrics)
+
+        self.rebuilt.put(seq, (dags, metrics))
+        return dags, metrics
+
+    def get_statuses(self, seq):
+        """
+        task id -> status name (None for no status) at an event
+        """
+        statuses = self.statuses.get(seq)
+        if statuses is not None:
+            return statuses
+
+        statuses = {
+            label: state[0].name if state[0] else None
+            for (_, label), (state, _) in self.replay(seq).items()
+        }
+        self.statuses.put(seq, statuses)
+        return statuses
+
+    def get_events_at_time_t(self, t):
+        seq = self.get_seq(t)
+        dags, _ = self.rebuild(seq)
+        position = bisect_right(self.seqs, seq) - 1
+        count = self.message_counts[position] - self.messages_offset
+        messages = [format_message(record) for record in self.messages[:count]]
+        return messages, dags, dict(self.utilizations[position])
+
+    def get_status_changes(self, t, since=None):
+        """
+        task id -> status name (None for no status) of the tasks whose
+        status at time t differs from their status at time since, every task
+        if since is None or no longer kept
+
+        Only the tasks changed by the events between since and t are
+        compared, the DAGs are not rebuilt.
+        """
+        seq = self.get_seq(t)
+        statuses = self.get_statuses(seq)
+        if since is None or since not in self.times:
+            return dict(statuses)
+
+        since_seq = self.index[since]
+        previous = self.get_statuses(since_seq)
+        low, high = sorted((since_seq, seq))
+        first = bisect_right(self.seqs, low)
+        last = bisect_right(self.seqs, high)
+        changes = {}
+        for delta in self.deltas[first:last]:
+            for _, label in delta:
+                if statuses[label] != previous[label]:
+                    changes[label] = statuses[label]
+        return changes
+
+    def get_metrics(self, t):
+        _, metrics = self.rebuild(self.get_seq(t))
+        return metrics
+
+    def get_all_metrics(self):
+        """
+        Metrics at every stored time, replaying the whole log once
+        """
+        all_metrics = {}
+        if self.template is None:
+            return all_metrics
+        metrics = SchedulingMetrics(self.template)
+        for (user, label), (_, task_metrics) in self.base_states.items():
+            metrics.set_task_state(user, label, task_metrics)
+        for seq, t, delta in zip(self.seqs, self.event_times, self.deltas):
+            for (user, label), (_, task_metrics) in delta.items():
+                metrics.set_task_state(user, label, task_metrics)
+            if self.index[t] == seq:
+                all_metrics[t] = metrics.copy()
+        return all_metrics
@@ -0,0 +1,219 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+
+# rounds are simulated in slices of about this many seconds, the lock
+# guarding the scheduler is released (for readers) between slices
+SLICE = 0.1
+# jobs run at the same time, more are queued
+WORKERS = 2
+# seconds a done job is kept for its session to collect
+JOB_TTL = 10 * 60
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    FINISHED = "finished"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+
+class Job:
+    """
+    A simulation run in the background
+
+    create builds the scheduler (without running it). The scheduler is
+    stepped round by round in slices, holding lock, so it can be read in
+    between (see JobPool.read) while it runs.
+    """
+
+    def __init__(self, create, key=None, session_id=None) -> None:
+        self.id = uuid.uuid4().hex
+        self.create = create
+        self.key = key
+        self.session_id = session_id
+        self.status = JobStatus.QUEUED
+        self.scheduler = None
+        self.error = None
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+        self.rounds = 0
+        self.total_tasks = 0
+        self.started = None
+        self.elapsed = 0
+        # time.monotonic() when the job was done
+        self.ended = None
+        self.future = None
+
+    def progress(self):
+        """
+        Simulated time, tasks finished and scheduling rounds (events) per
+        second of wall time so far
+        """
+        scheduler = self.scheduler
+        finished = 0
+        if scheduler is not None:
+            finished = sum(
+                totals.finished for totals in scheduler.metrics.totals.values()
+            )
+        return {
+            "id": self.id,
+            "status": self.status.value,
+            "time": scheduler.time if scheduler is not None else 0,
+            "tasks_finished": finished,
+            "tasks": self.total_tasks,
+            "events": self.rounds,
+            "events_per_sec": self.rounds / self.elapsed if self.elapsed else 0,
+            "wall_time": self.elapsed,
+            "error": self.error,
+        }
+
+
+class JobPool:
+    """
+    Runs simulations on a pool of worker threads
+
+    Finished schedulers are put in store (a ResultStore) under the key of
+    their job and bound to its session. The progress of every job is also
+    published to the cache of the store so other server processes can poll
+    it, the scheduler of a running job can only be read in the process that
+    runs it.
+
+    Jobs are dropped when forgotten (once done) or ttl seconds after they
+    are done, for sessions that never collect them.
+    """
+
+    def __init__(self, store=None, workers=WORKERS, ttl=JOB_TTL) -> None:
+        self.store = store
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="dagsched")
+        self.ttl = ttl
+        self.jobs = {}
+
+    def submit(self, create, key=None, session_id=None):
+        self.expire()
+        job = Job(create, key, session_id)
+        self.jobs[job.id] = job
+        self.publish(job)
+        job.future = self.executor.submit(self.execute, job)
+        return job.id
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def progress(self, job_id):
+        """
+        Progress of job_id (see Job.progress), None if it is unknown
+        """
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.progress()
+        if self.store is not None and job_id is not None:
+            return self.store.cache.get(f"job:{job_id}")
+        return None
+
+    def cancel(self, job_id):
+        """
+        Stop job_id after its current slice, returns False if it is unknown
+        or already done
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+            return False
+        job.cancelled.set()
+        return True
+
+    def read(self, job_id, func):
+        """
+        func(scheduler) of job_id between two slices, None if the job has
+        no scheduler in this process
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.scheduler is None:
+            return None
+        with job.lock:
+            return func(job.scheduler)
+
+    def execute(self, job):
+        if job.cancelled.is_set():
+            job.ended = time.monotonic()
+            self.finish(job, JobStatus.CANCELLED)
+            return
+        job.status = JobStatus.RUNNING
+        job.started = time.perf_counter()
+        status = JobStatus.FAILED
+        try:
+            scheduler = job.create()
+            job.total_tasks = sum(len(dag.tasks) for dag in scheduler.dags.values())
+            job.scheduler = scheduler
+            finished = False
+            while not finished:
+                if job.cancelled.is_set():
+                    status = JobStatus.CANCELLED
+                    return
+                with job.lock:
+                    deadline = time.perf_counter() + SLICE
+                    while not finished and time.perf_counter() < deadline:
+                        finished = scheduler.perform_scheduling_round()
+                        job.rounds += 1
+                job.elapsed = time.perf_counter() - job.started
+                self.publish(job)
+
+            if self.store is not None and job.key is not None:
+                self.store.put(job.key, scheduler)
+                if job.session_id is not None:
+                    self.store.bind(job.session_id, job.key)
+            status = JobStatus.FINISHED
+        except Exception as e:
+            logging.exception("Job %s failed", job.id)
+            job.error = f"{type(e).__name__}: {e}"
+        finally:
+            job.elapsed = time.perf_counter() - job.started
+            job.ended = time.monotonic()
+            self.finish(job, status)
+
+    def finish(self, job, status):
+        # published before it is set, a job seen done in this process has
+        # its final progress in the cache
+        self.publish(job, status)
+        job.status = status
+
+    def publish(self, job, status=None):
+        if self.store is not None:
+            progress = job.progress()
+            if status is not None:
+                progress["status"] = status.value
+            self.store.cache.set(f"job:{job.id}", progress)
+
+    def forget(self, job_id):
+        """
+        Drop job_id (a finished scheduler is in the store), once it is done
+        if it still runs: cancel it first to stop it
+        """
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.future.add_done_callback(lambda future: self.drop(job_id))
+
+    def drop(self, job_id):
+        self.jobs.pop(job_id, None)
+        if self.store is not None:
+            self.store.cache.delete(f"job:{job_id}")
+
+    def expire(self):
+        """
+        Drop the jobs done more than ttl seconds ago
+        """
+        now = time.monotonic()
+        # copied, jobs are dropped from the worker threads
+        for job_id, job in list(self.jobs.items()):
+            if job.ended is not None and now - job.ended > self.ttl:
+                self.drop(job_id)
+
+    def shutdown(self, cancel=True):
+        if cancel:
+            for job in list(self.jobs.values()):
+                job.cancelled.set()
+        self.executor.shutdown(wait=True)
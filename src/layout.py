@@ -0,0 +1,120 @@
+from collections import deque
+from hashlib import blake2b
+
+from lru import LRUCache
+
+# distance between dependency levels (left to right) and between the tasks
+# of a level (top to bottom), in cytoscape pixels
+LEVEL_SPACING = 120
+TASK_SPACING = 60
+# barycenter sweeps (down and up) reducing edge crossings
+SWEEPS = 4
+# layouts kept, least recently used are evicted first
+LAYOUTS = 64
+
+layouts = LRUCache(LAYOUTS)
+
+
+def dependency_levels(dag):
+    """
+    Level of each task of dag: 0 for tasks without dependencies, else one
+    more than the highest level of its dependencies (longest path from a
+    root). Tasks on a dependency cycle are put one level below the others.
+    """
+    n = len(dag.ids)
+    dag.csr()
+    remaining = [dag.parent_indptr[i + 1] - dag.parent_indptr[i] for i in range(n)]
+    levels = [0] * n
+    queue = deque(i for i in range(n) if not remaining[i])
+    visited = 0
+    while queue:
+        index = queue.popleft()
+        visited += 1
+        for child in dag.child_indices_of(index):
+            levels[child] = max(levels[child], levels[index] + 1)
+            remaining[child] -= 1
+            if not remaining[child]:
+                queue.append(child)
+
+    if visited < n:
+        cycle_level = 1 + max(
+            (level for i, level in enumerate(levels) if not remaining[i]), default=-1
+        )
+        for index in range(n):
+            if remaining[index]:
+                levels[index] = cycle_level
+    return levels
+
+
+def topology_key(dag):
+    """
+    Hash of the tasks of dag and their dependencies
+    """
+    dag.csr()
+    digest = blake2b(digest_size=16)
+    digest.update("\n".join(dag.ids).encode())
+    digest.update(dag.parent_indptr.tobytes())
+    digest.update(dag.parent_indices.tobytes())
+    return digest.hexdigest()
+
+
+def barycenter_sweep(layers, position, neighbours):
+    """
+    Reorder each layer (in place) by the mean position of the neighbours
+    of its tasks, tasks without neighbours keep their position
+    """
+    for layer in layers:
+        keys = {}
+        for index in layer:
+            adjacent = neighbours(index)
+            if len(adjacent):
+                keys[index] = sum(position[i] for i in adjacent) / len(adjacent)
+            else:
+                keys[index] = position[index]
+        layer.sort(key=keys.__getitem__)
+        for i, index in enumerate(layer):
+            position[index] = i
+
+
+def layer_orders(dag, levels, sweeps=SWEEPS):
+    """
+    Tasks of each level in the order they are drawn, alternately sorted by
+    the positions of their dependencies and of their dependents
+    """
+    layers = [[] for _ in range(max(levels, default=-1) + 1)]
+    for index, level in enumerate(levels):
+        layers[level].append(index)
+    position = [0] * len(levels)
+    for layer in layers:
+        for i, index in enumerate(layer):
+            position[index] = i
+
+    for _ in range(sweeps):
+        barycenter_sweep(layers[1:], position, dag.parents)
+        barycenter_sweep(layers[-2::-1], position, dag.child_indices_of)
+    return layers
+
+
+def layered_layout(dag):
+    """
+    (x, y) position of each task of dag, Sugiyama style: tasks are put in
+    columns by dependency level (longest path), then the tasks of each
+    column are ordered to reduce edge crossings and centered
+
+    Layouts only depend on the topology and are cached by its hash, so
+    status changes never lay a DAG out again.
+    """
+    key = topology_key(dag)
+    positions = layouts.get(key)
+    if positions is not None:
+        return positions
+
+    levels = dependency_levels(dag)
+    positions = [None] * len(levels)
+    for level, layer in enumerate(layer_orders(dag, levels)):
+        middle = (len(layer) - 1) / 2
+        for i, index in enumerate(layer):
+            positions[index] = (level * LEVEL_SPACING, (i - middle) * TASK_SPACING)
+
+    layouts.put(key, positions)
+    return positions
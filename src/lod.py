@@ -0,0 +1,99 @@
+from layout import dependency_levels, layered_layout
+
+# cytoscape elements shown before DAGs are collapsed into aggregate nodes
+MAX_ELEMENTS = 2000
+# tasks are aggregated by dependency level in groups of at most this many,
+# a group is expanded at once
+GROUP_SIZE = 100
+
+
+def level_groups(levels, ids, group_size=GROUP_SIZE, order=None):
+    """
+    Tasks (ids) grouped by dependency level: consecutive levels share a
+    group while it has at most group_size tasks, larger levels are split in
+    order (task indices, by default the tasks' order)
+    """
+    by_level = {}
+    for index in range(len(levels)) if order is None else order:
+        by_level.setdefault(levels[index], []).append(ids[index])
+
+    groups = []
+    for level in sorted(by_level):
+        tasks = by_level[level]
+        last = groups[-1] if groups else None
+        if last and len(last["tasks"]) + len(tasks) <= group_size:
+            last["levels"][1] = level
+            last["tasks"] += tasks
+            continue
+        for start in range(0, len(tasks), group_size):
+            chunk = tasks[start : start + group_size]
+            groups.append({"levels": [level, level], "tasks": chunk})
+    return groups
+
+
+def build_lod(dags, max_elements=MAX_ELEMENTS, group_size=GROUP_SIZE):
+    """
+    Level of detail aggregation of the DAGs (user -> DAG) for the cytoscape
+    view, computed from their structure only
+
+    Each user's DAG collapses into one aggregate node, expanded into a node
+    per group of tasks of neighbouring dependency levels, each expanded into
+    its tasks. The browser counts the statuses of the tasks of each
+    aggregate and only expands as long as it shows at most max_elements
+    elements.
+
+    Aggregates are drawn without the tasks: users come with the extent
+    ([top, bottom]) of their layout and the edges between their groups (by
+    position in groups), groups with their position (the middle of their
+    tasks) and elements, the number of task nodes and edges fetched when
+    they are expanded (see group_elements).
+    """
+    users = {}
+    for user, dag in dags.items():
+        # split levels top to bottom, so groups are drawn apart
+        positions = layered_layout(dag)
+        order = sorted(range(len(positions)), key=positions.__getitem__)
+        groups = level_groups(dependency_levels(dag), dag.ids, group_size, order)
+
+        index = {task: i for i, task in enumerate(dag.ids)}
+        group_of = [0] * len(dag.ids)
+        for g, group in enumerate(groups):
+            xs, ys = zip(*(positions[index[task]] for task in group["tasks"]))
+            group["position"] = {"x": sum(xs) / len(xs), "y": sum(ys) / len(ys)}
+            group["elements"] = len(group["tasks"])
+            for task in group["tasks"]:
+                group_of[index[task]] = g
+
+        edges = set()
+        for target in range(len(dag.ids)):
+            for source in dag.parents(target):
+                pair = (group_of[source], group_of[target])
+                groups[pair[0]]["elements"] += 1
+                if pair[0] != pair[1]:
+                    groups[pair[1]]["elements"] += 1
+                    edges.add(pair)
+
+        ys = [y for _, y in positions]
+        users[user] = {
+            "name": dag.name,
+            "extent": [min(ys, default=0), max(ys, default=0)],
+            "groups": groups,
+            "edges": sorted(edges),
+        }
+    return {"max_elements": max_elements, "users": users}
+
+
+def group_elements(data, tasks):
+    """
+    Cytoscape nodes of tasks (ids) of a serialized DAG (DAG.to_dict) and the
+    edges from or to them
+    """
+    tasks = set(tasks)
+    return {
+        "nodes": [node for node in data["nodes"] if node["data"]["id"] in tasks],
+        "edges": [
+            edge
+            for edge in data["edges"]
+            if edge["data"]["source"] in tasks or edge["data"]["target"] in tasks
+        ],
+    }
@@ -0,0 +1,41 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Cache of the size most recently used entries
+
+    get and put mark an entry as used, put then evicts the least recently
+    used entries. Iterating goes over the keys, least recently used first.
+    """
+
+    def __init__(self, size) -> None:
+        self.size = size
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def get(self, key, default=None):
+        if key not in self.entries:
+            return default
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self.entries.pop(key, default)
+
+    def clear(self):
+        self.entries.clear()
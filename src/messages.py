@@ -0,0 +1,96 @@
+import logging
+from enum import Enum
+
+
+class MessageKind(Enum):
+    TEXT = 0
+    READY = 1
+    READY_PRIORITY = 2
+    SCHEDULED = 3
+    FINISHED = 4
+    PREEMPTED = 5
+
+
+# kind -> (level, template), templates are formatted with the record fields
+# (time, user, task) and the positional args of the record
+MESSAGE_FORMATS = {
+    MessageKind.TEXT: (logging.INFO, "{0}"),
+    MessageKind.READY: (
+        logging.DEBUG,
+        "Added {user} task {task} to ready queue with duration {0}",
+    ),
+    MessageKind.READY_PRIORITY: (
+        logging.DEBUG,
+        "Added {user} task {task} to ready queue with priority {0} and duration {1}",
+    ),
+    MessageKind.SCHEDULED: (
+        logging.INFO,
+        "Scheduled {user} task {task} with {0} cpus and {1} ram",
+    ),
+    MessageKind.FINISHED: (
+        logging.INFO,
+        "Finished user: {user} task: {task} at time={time}",
+    ),
+    MessageKind.PREEMPTED: (
+        logging.INFO,
+        "Pre-empting user {user} task {task} with priority: {0}",
+    ),
+}
+
+logger = logging.getLogger("scheduler")
+
+
+def format_message(record):
+    time, kind, user, task, args = record
+    _, template = MESSAGE_FORMATS[kind]
+    return template.format(*args, time=time, user=user, task=task)
+
+
+class MessageLog:
+    """
+    Scheduler messages stored as compact records
+
+    A record is a (time, kind, user, task, args) tuple, the message text is
+    only built by format_message when it is shown (e.g. in the UI or an
+    export). Messages below level are not stored, level=None stores nothing.
+
+    Records are also forwarded to the "scheduler" logger, formatted only if
+    that logger is enabled for the level of the message.
+
+    Supports len() and indexing/slicing (returning records) like the list of
+    strings it replaces.
+    """
+
+    def __init__(self, level=logging.DEBUG) -> None:
+        self.level = level
+        self.records = []
+        self.kinds = {
+            kind
+            for kind, (kind_level, _) in MESSAGE_FORMATS.items()
+            if level is not None and kind_level >= level
+        }
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def add(self, time, kind, user, task, *args):
+        level = MESSAGE_FORMATS[kind][0]
+        if logger.isEnabledFor(level):
+            logger.log(level, format_message((time, kind, user, task, args)))
+        if kind in self.kinds:
+            self.records.append((time, kind, user, task, args))
+
+    def append(self, message, time=None):
+        """
+        Add a free form message
+        """
+        self.add(time, MessageKind.TEXT, None, None, message)
+
+    def formatted(self, start=0, stop=None):
+        return [format_message(record) for record in self.records[start:stop]]
@@ -1,6 +1,52 @@
+import random
 from statistics import mean
 from collections import defaultdict
 
+from records import TaskRecords
+from sketch import KLLSketch
+
+INF = float("inf")
+
+# per task metrics with a quantile sketch per user and a global one,
+# makespan (one value per user) only has a global sketch
+TASK_SKETCHES = ("jct", "queue_time", "slowdown")
+SKETCHES = TASK_SKETCHES + ("makespan",)
+
+
+def average(total, count):
+    """
+    total / count, an int when it divides exactly like statistics.mean
+    """
+    if isinstance(total, int) and total % count == 0:
+        return total // count
+    return total / count
+
+
+class UserTotals:
+    """
+    Running aggregates over the tasks of a user
+    """
+
+    __slots__ = (
+        "tasks",
+        "finished",
+        "completion_time",
+        "queue_time",
+        "preemptions",
+        "max_end",
+        "max_stale",
+    )
+
+    def __init__(self, tasks) -> None:
+        self.tasks = tasks
+        self.finished = 0
+        self.completion_time = 0
+        self.queue_time = 0
+        self.preemptions = 0
+        self.max_end = -INF
+        # set when the task with the max end time was reset (history replay)
+        self.max_stale = False
+
 
 class SchedulingMetrics:
     """
@@ -11,6 +57,19 @@ class SchedulingMetrics:
 
     We provide additional helper functions to compute queries
     on that set of information.
+
+    Per user sums and counts (see UserTotals), the max finish time and the
+    total number of preemptions are updated as tasks are stored, so the
+    mean and total queries (e.g. get_mean_jct, get_local_total_jct) don't go
+    over every task. get_jct and the other queries taking functions apply
+    them to the per task values.
+
+    Quantiles (e.g. p99 JCT) come from KLL sketches (see sketch.py) updated
+    as tasks finish, so they take bounded memory whatever the number of
+    tasks. Slowdown is (queuing time + duration) / duration.
+
+    Finished tasks are also appended to columnar records (see records.py)
+    for post-run analysis.
     """
 
     def __init__(self, dags):
@@ -26,18 +85,138 @@ class SchedulingMetrics:
         # for each user, for each job, track job queuing time
         self.job_queue_time = defaultdict(dict)
 
+        # for each user, running aggregates of the above
+        self.totals = {}
+        self.total_preemptions = 0
+        self.max_finish_time = -INF
+        self.max_stale = False
+
+        # durations are read from the DAGs for slowdowns
+        self.dags = dags
+        # for each user, metric -> sketch, created when a task finishes
+        self.sketches = {}
+        self.rng = random.Random(0)
+        self.global_sketches = {metric: KLLSketch(rng=self.rng) for metric in SKETCHES}
+        # set when a finished task was reset, sketches can't remove values
+        self.sketches_stale = False
+
+        # columnar records of the tasks finished while scheduling
+        self.records = TaskRecords(dags)
+
         for user, dag in dags.items():
             self.arrivals[user] = dag.arrival_time
+            self.totals[user] = UserTotals(len(dag.tasks))
             for task_id in dag.tasks.keys():
                 self.preemptions[user][task_id] = 0
                 self.job_completion_time[user][task_id] = {
-                    "start": float("inf"),
-                    "end": float("inf"),
+                    "start": INF,
+                    "end": INF,
                 }
                 self.job_queue_time[user][task_id] = 0
 
+    def copy(self):
+        """
+        Independent copy, cheaper than a deepcopy since the per task
+        completion times are replaced when stored, never modified
+
+        The per task dicts are still copied, it takes O(tasks).
+        """
+        metrics = SchedulingMetrics.__new__(SchedulingMetrics)
+        metrics.arrivals = self.arrivals
+        for name in ("preemptions", "job_completion_time", "job_queue_time"):
+            values = defaultdict(dict)
+            for user, tasks in getattr(self, name).items():
+                values[user] = dict(tasks)
+            setattr(metrics, name, values)
+        metrics.totals = {}
+        for user, totals in self.totals.items():
+            copied = UserTotals.__new__(UserTotals)
+            for slot in UserTotals.__slots__:
+                setattr(copied, slot, getattr(totals, slot))
+            metrics.totals[user] = copied
+        metrics.total_preemptions = self.total_preemptions
+        metrics.max_finish_time = self.max_finish_time
+        metrics.max_stale = self.max_stale
+        metrics.dags = self.dags
+        metrics.rng = random.Random()
+        metrics.rng.setstate(self.rng.getstate())
+        metrics.sketches = {
+            user: {
+                metric: sketch.copy(metrics.rng) for metric, sketch in sketches.items()
+            }
+            for user, sketches in self.sketches.items()
+        }
+        metrics.global_sketches = {
+            metric: sketch.copy(metrics.rng)
+            for metric, sketch in self.global_sketches.items()
+        }
+        metrics.sketches_stale = self.sketches_stale
+        metrics.records = self.records
+        return metrics
+
+    def get_task_state(self, user, task_id):
+        """
+        Metrics stored for a single task, see set_task_state
+        """
+        return (
+            self.preemptions[user][task_id],
+            self.job_completion_time[user][task_id],
+            self.job_queue_time[user][task_id],
+        )
+
+    def set_task_state(self, user, task_id, state):
+        preemptions, completion_time, queue_time = state
+        totals = self.totals[user]
+
+        change = preemptions - self.preemptions[user][task_id]
+        self.preemptions[user][task_id] = preemptions
+        totals.preemptions += change
+        self.total_preemptions += change
+
+        previous = self.job_completion_time[user][task_id]
+        if (
+            previous == completion_time
+            and queue_time == self.job_queue_time[user][task_id]
+        ):
+            return
+
+        self.remove_completion_time(user, previous)
+        totals.queue_time += queue_time - self.job_queue_time[user][task_id]
+        self.job_queue_time[user][task_id] = queue_time
+        self.job_completion_time[user][task_id] = completion_time
+        self.add_completion_time(user, task_id, completion_time)
+
+    def add_completion_time(self, user, task_id, times):
+        end = times["end"]
+        if end == INF:
+            return
+        totals = self.totals[user]
+        totals.finished += 1
+        totals.completion_time += end - times["start"]
+        if end > totals.max_end:
+            totals.max_end = end
+        if end > self.max_finish_time:
+            self.max_finish_time = end
+        if not self.sketches_stale:
+            self.add_to_sketches(user, task_id, times)
+
+    def remove_completion_time(self, user, times):
+        end = times["end"]
+        if end == INF:
+            return
+        totals = self.totals[user]
+        self.sketches_stale = True
+        totals.finished -= 1
+        totals.completion_time -= end - times["start"]
+        if end == totals.max_end:
+            totals.max_stale = True
+        if end == self.max_finish_time:
+            self.max_stale = True
+
     def store_preemption(self, user, task):
         self.preemptions[user][task.id] += 1
+        self.totals[user].preemptions += 1
+        self.total_preemptions += 1
 
     def get_makespan(self, func=mean):
         """
@@ -57,16 +236,122 @@ class SchedulingMetrics:
         """
         get makespan per user (time to complete dag)
         """
-        arrival_time = self.arrivals[user]
-        max_finish_time = -float("inf")
+        totals = self.totals[user]
+        if totals.finished < totals.tasks:
+            return INF - self.arrivals[user]
+        return self.get_local_max_finish_time(user) - self.arrivals[user]
 
-        for _, times in self.job_completion_time[user].items():
-            max_finish_time = max(max_finish_time, times["end"])
-
-        return max_finish_time - arrival_time
+    def get_local_max_finish_time(self, user):
+        """
+        latest end time of the finished tasks of user
+        """
+        totals = self.totals[user]
+        if totals.max_stale:
+            totals.max_end = max(
+                (
+                    times["end"]
+                    for times in self.job_completion_time[user].values()
+                    if times["end"] != INF
+                ),
+                default=-INF,
+            )
+            totals.max_stale = False
+        return totals.max_end
+
+    def get_max_finish_time(self):
+        """
+        latest end time of any finished task
+        """
+        if self.max_stale:
+            self.max_finish_time = max(
+                (self.get_local_max_finish_time(user) for user in self.totals),
+                default=-INF,
+            )
+            self.max_stale = False
+        return self.max_finish_time
 
     def store_task_finish_time(self, user, task):
-        self.job_completion_time[user][task.id] = {"start": task.start, "end": task.end}
+        self.remove_completion_time(user, self.job_completion_time[user][task.id])
+        times = {"start": task.start, "end": task.end}
+        self.job_completion_time[user][task.id] = times
+        self.add_completion_time(user, task.id, times)
+        self.records.add(
+            user,
+            task,
+            task.end,
+            self.preemptions[user][task.id],
+            self.job_queue_time[user][task.id],
+        )
+
+    def add_to_sketches(self, user, task_id, times):
+        sketches = self.sketches.get(user)
+        if sketches is None:
+            sketches = self.sketches[user] = {
+                metric: KLLSketch(rng=self.rng) for metric in TASK_SKETCHES
+            }
+        values = {
+            "jct": times["end"] - times["start"],
+            "queue_time": self.job_queue_time[user][task_id],
+        }
+        dag = self.dags[user]
+        duration = dag.duration[dag.index[task_id]]
+        if duration > 0:
+            values["slowdown"] = (values["queue_time"] + duration) / duration
+        for metric, value in values.items():
+            sketches[metric].update(value)
+            self.global_sketches[metric].update(value)
+
+        totals = self.totals[user]
+        if totals.finished == totals.tasks:
+            self.global_sketches["makespan"].update(self.get_local_makespan(user))
+
+    def rebuild_sketches(self):
+        """
+        Sketch the per task values again, after finished tasks were reset
+        """
+        self.sketches = {}
+        self.global_sketches = {metric: KLLSketch(rng=self.rng) for metric in SKETCHES}
+        self.sketches_stale = False
+        for user, tasks in self.job_completion_time.items():
+            totals = self.totals[user]
+            finished, totals.finished = totals.finished, 0
+            for task_id, times in tasks.items():
+                if times["end"] != INF:
+                    totals.finished += 1
+                    self.add_to_sketches(user, task_id, times)
+            totals.finished = finished
+
+    def get_sketch(self, metric, user=None):
+        """
+        Quantile sketch of metric (see SKETCHES) for user or all users
+        """
+        if self.sketches_stale:
+            self.rebuild_sketches()
+        if user is None:
+            return self.global_sketches[metric]
+        if metric not in TASK_SKETCHES:
+            raise ValueError(f"No per user sketch of {metric}")
+        if user not in self.sketches:
+            return KLLSketch(rng=self.rng)
+        return self.sketches[user][metric]
+
+    def get_quantile(self, metric, q):
+        """
+        estimated q quantile (e.g. 0.99) of metric over all users
+        """
+        return self.get_sketch(metric).quantile(q)
+
+    def get_local_quantile(self, user, metric, q):
+        return self.get_sketch(metric, user).quantile(q)
+
+    def get_percentiles(self, user=None):
+        """
+        metric -> {"p50": ..., "p90": ..., "p99": ...} for user or all users
+        """
+        metrics = SKETCHES if user is None else TASK_SKETCHES
+        return {
+            metric: self.get_sketch(metric, user).percentiles() for metric in metrics
+        }
 
     def get_jct(self, local_func=mean, global_func=mean):
         """
@@ -85,6 +370,12 @@ class SchedulingMetrics:
 
         return global_func(jct)
 
+    def get_mean_jct(self):
+        """
+        mean over users of get_local_mean_jct, same as get_jct()
+        """
+        return mean(self.get_local_mean_jct(user) for user in self.totals)
+
     def get_local_jct(self, user, func=mean):
         """
         get how long tasks takes to complete on average for user
@@ -96,9 +387,31 @@ class SchedulingMetrics:
 
         return func(times)
 
+    def get_local_mean_jct(self, user):
+        """
+        mean completion time of the tasks of user from the running totals,
+        nan until they all finished like get_local_jct(user)
+        """
+        totals = self.totals[user]
+        if totals.finished < totals.tasks or not totals.tasks:
+            # unfinished tasks take inf - inf
+            return float("nan")
+        return average(totals.completion_time, totals.tasks)
+
+    def get_local_total_jct(self, user):
+        """
+        total completion time of the tasks of user from the running totals,
+        nan until they all finished like get_local_jct(user, sum)
+        """
+        totals = self.totals[user]
+        if totals.finished < totals.tasks:
+            return float("nan")
+        return totals.completion_time
+
     def store_task_queue_time(self, user, task, time):
         queue_time = time - task.ready_time
         self.job_queue_time[user][task.id] += queue_time
+        self.totals[user].queue_time += queue_time
 
     def get_queuing_time(self, local_func=mean, global_func=mean):
         """
@@ -111,6 +424,13 @@ class SchedulingMetrics:
 
         return global_func(queue_times)
 
+    def get_mean_queuing_time(self):
+        """
+        mean over users of get_local_mean_queuing_time, same as
+        get_queuing_time()
+        """
+        return mean(self.get_local_mean_queuing_time(user) for user in self.totals)
+
     def get_local_queuing_time(self, user, local_func=mean):
         """
         get how long tasks are queued by user
@@ -122,11 +442,26 @@ class SchedulingMetrics:
 
         return local_func(queue_times)
 
+    def get_local_mean_queuing_time(self, user):
+        """
+        mean queuing time of the tasks of user from the running totals
+        """
+        totals = self.totals[user]
+        if not totals.tasks:
+            return float("nan")
+        return average(totals.queue_time, totals.tasks)
+
+    def get_local_total_queuing_time(self, user):
+        """
+        total queuing time of the tasks of user from the running totals
+        """
+        return self.totals[user].queue_time
+
     def get_preemptions(self):
         return self.preemptions
 
     def get_local_preemptions(self, user):
-        total = 0
-        for _, preemptions in self.preemptions[user].items():
-            total += preemptions
-        return preemptions
+        return self.totals[user].preemptions
+
+    def get_total_preemptions(self):
+        return self.total_preemptions
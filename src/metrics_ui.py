@@ -1,11 +1,12 @@
 import pandas as pd
 from src.scheduling import Scheduler
+from src.timeline import TABLE_COLUMNS as COLUMNS
 
 
 def get_metrics_table(scheduler: Scheduler, time: int):
     if scheduler is None:
         return None
-    metrics = scheduler.get_history_metrics_at_t(time)  # returns a dictionary
+    metrics = scheduler.get_history_metrics_at_t(time)
 
     data = []
 
@@ -16,21 +17,10 @@ def get_metrics_table(scheduler: Scheduler, time: int):
             len(scheduler.dags[user_id].tasks),
             scheduler.dags[user_id].arrival_time,
             metrics.get_local_preemptions(user_id),
-            metrics.get_local_jct(user_id),
-            metrics.get_local_queuing_time(user_id, sum),
+            metrics.get_local_mean_jct(user_id),
+            metrics.get_local_total_queuing_time(user_id),
             metrics.get_local_makespan(user_id),
         ]
         data.append(row)
 
-    return pd.DataFrame(
-        data,
-        columns=[
-            "User",
-            "Jobs Count",
-            "Arrival Time",
-            "Total Preemptions",
-            "Avg. Job Completion Time",
-            "Job Queuing Time",
-            "Makespan",
-        ],
-    )
+    return pd.DataFrame(data, columns=COLUMNS)
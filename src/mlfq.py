@@ -1,4 +1,5 @@
-from collections import defaultdict, deque
+import heapq
+from collections import deque
 
 
 class MultiLevelFeedbackQueue:
@@ -9,6 +10,11 @@ class MultiLevelFeedbackQueue:
     as a stable priority queue (see its usage in the non preemptive
     priority scheduler)
 
+    Each priority level is a FIFO deque. The active levels are indexed by a
+    heap of (negated) priorities so that finding the highest level is
+    O(log L) instead of scanning every level. Emptied levels are removed from
+    the heap lazily, when they reach its top.
+
     example:
     mlfq = MultiLevelFeedbackQueue()
     mlfq.put("a", 1)
@@ -23,22 +29,64 @@ class MultiLevelFeedbackQueue:
     """
 
     def __init__(self) -> None:
-        self.levels = defaultdict(deque)
+        # priority -> deque of items, only non-empty levels are kept
+        self.levels = {}
+        # negated priorities of levels, may contain levels that were emptied
+        self.heap = []
+        self.in_heap = set()
         self.size = 0
 
+    def __len__(self):
+        return self.size
+
     def put(self, item, priority):
         self.size += 1
-        self.levels[priority].appendleft(item)
+        level = self.levels.get(priority)
+        if level is None:
+            level = self.levels[priority] = deque()
+            if priority not in self.in_heap:
+                self.in_heap.add(priority)
+                heapq.heappush(self.heap, -priority)
+        level.appendleft(item)
+
+    def put_many(self, items):
+        """
+        Insert (item, priority) pairs, in order
+        """
+        new_levels = []
+        for item, priority in items:
+            self.size += 1
+            level = self.levels.get(priority)
+            if level is None:
+                level = self.levels[priority] = deque()
+                if priority not in self.in_heap:
+                    self.in_heap.add(priority)
+                    new_levels.append(-priority)
+            level.appendleft(item)
+
+        if len(new_levels) > len(self.heap):
+            self.heap.extend(new_levels)
+            heapq.heapify(self.heap)
+        else:
+            for priority in new_levels:
+                heapq.heappush(self.heap, priority)
+
+    def max_level(self):
+        heap = self.heap
+        while -heap[0] not in self.levels:
+            self.in_heap.discard(-heapq.heappop(heap))
+        return -heap[0]
 
     def get(self):
         if not self.size:
             raise ValueError("Size of MLFQ is 0")
 
-        max_prio = max(self.levels.keys())
-        result = self.levels[max_prio].pop()
+        max_prio = self.max_level()
+        level = self.levels[max_prio]
+        result = level.pop()
         self.size -= 1
 
-        if not len(self.levels[max_prio]):
+        if not level:
             del self.levels[max_prio]
         return result
 
@@ -46,6 +94,6 @@ class MultiLevelFeedbackQueue:
         if not self.size:
             raise ValueError("Size of MLFQ is 0")
 
-        max_prio = max(self.levels.keys())
+        max_prio = self.max_level()
         result = self.levels[max_prio][-1]  # grab last element
         return result
@@ -0,0 +1,168 @@
+from time import perf_counter_ns
+
+# scheduler methods timed separately in every scheduling round
+PHASES = (
+    "remove_finished_tasks",
+    "get_ready_tasks",
+    "schedule_tasks",
+    "store_history",
+    "set_next_event_time",
+)
+
+# round latency histogram buckets: [0, 1us), [1us, 2us), [2us, 4us), ...
+HISTOGRAM_BUCKETS = 32
+
+
+class Stat:
+    """
+    count / total / max of a sampled value
+    """
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def report(self):
+        return {
+            "mean": self.total / self.count if self.count else 0,
+            "max": self.max,
+        }
+
+
+class SchedulerProfiler:
+    """
+    Per-phase instrumentation of a scheduler
+
+    Attaching the profiler replaces the phase methods (see PHASES),
+    perform_scheduling_round and schedule_task on the scheduler instance by
+    wrappers that count calls and accumulate their time, the class is left
+    untouched. A scheduler created without profile=True has no wrappers, so
+    profiling costs nothing when it is off.
+
+    Per round it also records the latency (as a log2 histogram) and the
+    lengths of the ready queue, running set and event calendar after
+    scheduling. schedule_task calls are counted as tasks examined, the ones
+    that succeed as tasks scheduled. Preemptive schedulers call schedule_task
+    again for the same task once they preempted others
+    (schedule_task_with_preemption), that retry is not examined again.
+    """
+
+    def __init__(self, scheduler) -> None:
+        self.scheduler = scheduler
+        self.calls = {phase: 0 for phase in PHASES}
+        self.times = {phase: 0 for phase in PHASES}
+        self.rounds = 0
+        self.round_time = 0
+        self.min_round = None
+        self.max_round = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+        self.examined = 0
+        self.scheduled = 0
+        self.retrying = False
+        self.queues = {"ready": Stat(), "running": Stat(), "events": Stat()}
+
+    def attach(self):
+        scheduler = self.scheduler
+        for phase in PHASES:
+            setattr(scheduler, phase, self.timed(phase, getattr(scheduler, phase)))
+        scheduler.perform_scheduling_round = self.timed_round(
+            scheduler.perform_scheduling_round
+        )
+        scheduler.schedule_task = self.counted(scheduler.schedule_task)
+        if hasattr(scheduler, "schedule_task_with_preemption"):
+            scheduler.schedule_task_with_preemption = self.retry(
+                scheduler.schedule_task_with_preemption
+            )
+        return self
+
+    def timed(self, phase, method):
+        calls, times = self.calls, self.times
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                times[phase] += perf_counter_ns() - start
+                calls[phase] += 1
+
+        return wrapper
+
+    def timed_round(self, method):
+        def wrapper():
+            start = perf_counter_ns()
+            finished = method()
+            self.add_round(perf_counter_ns() - start)
+            return finished
+
+        return wrapper
+
+    def counted(self, method):
+        def wrapper(*args, **kwargs):
+            scheduled = method(*args, **kwargs)
+            if not self.retrying:
+                self.examined += 1
+            if scheduled:
+                self.scheduled += 1
+            return scheduled
+
+        return wrapper
+
+    def retry(self, method):
+        def wrapper(*args, **kwargs):
+            self.retrying = True
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.retrying = False
+
+        return wrapper
+
+    def add_round(self, elapsed):
+        self.rounds += 1
+        self.round_time += elapsed
+        if self.min_round is None or elapsed < self.min_round:
+            self.min_round = elapsed
+        self.max_round = max(self.max_round, elapsed)
+        bucket = min((elapsed // 1000).bit_length(), HISTOGRAM_BUCKETS - 1)
+        self.histogram[bucket] += 1
+
+        scheduler = self.scheduler
+        self.queues["ready"].add(len(getattr(scheduler, "ready", ())))
+        self.queues["running"].add(len(scheduler.running))
+        self.queues["events"].add(len(scheduler.events))
+
+    def report(self):
+        """
+        Times are in seconds, non-empty histogram buckets are given by their
+        (exclusive) upper bound
+        """
+        return {
+            "rounds": self.rounds,
+            "total_time": self.round_time / 1e9,
+            "phases": {
+                phase: {"calls": self.calls[phase], "time": self.times[phase] / 1e9}
+                for phase in PHASES
+            },
+            "round_latency": {
+                "min": (self.min_round or 0) / 1e9,
+                "mean": self.round_time / self.rounds / 1e9 if self.rounds else 0,
+                "max": self.max_round / 1e9,
+                "histogram": [
+                    {"upper": (1 << i) / 1e6, "count": count}
+                    for i, count in enumerate(self.histogram)
+                    if count
+                ],
+            },
+            "tasks": {"examined": self.examined, "scheduled": self.scheduled},
+            "queues": {name: stat.report() for name, stat in self.queues.items()},
+        }
@@ -1,18 +1,124 @@
 import yaml
 import os
 import base64
-import io
 import logging
+import multiprocessing
+import pickle
+from hashlib import blake2b
+
+from dag import Task
+from lru import LRUCache
+
+# libyaml's loader is several times faster than the pure Python one
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# parsed specs kept by content hash, least recently used are evicted first
+SPECS = 32
+
+# content hash -> pickled parsed spec, unpickled into a copy for every load
+specs = LRUCache(SPECS)
+# path -> (mtime, size, content hash) when it was last read
+stats = {}
+
+
+def validate_spec(data):
+    """
+    Raise ValueError if data is not a scheduling spec: users with tasks and,
+    if given, the cluster size
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("users"), dict):
+        raise ValueError("Missing users in spec")
+    for resource in ("cpus", "ram"):
+        if "cluster" in data and resource not in data["cluster"]:
+            raise ValueError(f"Missing {resource} in cluster definition")
+    for user, dag in data["users"].items():
+        if not isinstance(dag, dict) or not isinstance(dag.get("tasks"), dict):
+            raise ValueError(f"Missing tasks of user {user}")
+        for task in dag["tasks"].values():
+            Task.validate(task)
+
+
+def load_spec(content):
+    """
+    Parsed and validated spec from the content (bytes) of a YAML file,
+    cached by hash of the content
+
+    Every load returns a spec of its own, callers may modify it.
+    """
+    digest = blake2b(content, digest_size=16).hexdigest()
+    if digest in specs:
+        return digest, cached(digest)
+    data = yaml.load(content, Loader=Loader)
+    validate_spec(data)
+    remember(digest, data)
+    return digest, data
+
+
+def remember(digest, data):
+    specs.put(digest, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def cached(digest):
+    # unpickling is several times faster than copy.deepcopy
+    return pickle.loads(specs.get(digest))
+
+
+def cached_spec(path):
+    """
+    Spec of path if it is cached and the file was not changed, else None
+    """
+    stat = os.stat(path)
+    mtime, size, digest = stats.get(path, (None, None, None))
+    if (stat.st_mtime_ns, stat.st_size) != (mtime, size) or digest not in specs:
+        return None
+    return cached(digest)
 
 
 def read_yaml(path):
-    with open(path, "r") as f:
-        data = yaml.safe_load(f)
+    """
+    Parsed spec of the YAML file at path, parsed again only if the file
+    changed (see load_spec)
+    """
+    data = cached_spec(path)
+    if data is not None:
+        return data
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        digest, data = load_spec(f.read())
+    stats[path] = (stat.st_mtime_ns, stat.st_size, digest)
     return data
 
 
-def read_dag_specs(dir):
-    return {f: read_yaml(f"{dir}/{f}") for f in os.listdir(dir)}
+def parse_file(path):
+    """
+    (path, mtime, size, content hash, spec) of a file, run in worker processes
+    """
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        digest, data = load_spec(f.read())
+    return path, stat.st_mtime_ns, stat.st_size, digest, data
+
+
+def read_dag_specs(dir, jobs=None):
+    """
+    Specs of the files in dir, the files that are not cached are parsed in
+    jobs processes (one per CPU by default)
+    """
+    paths = {f: f"{dir}/{f}" for f in os.listdir(dir)}
+    result = {f: cached_spec(path) for f, path in paths.items()}
+    todo = [paths[f] for f, data in result.items() if data is None]
+
+    jobs = min(jobs or os.cpu_count(), max(len(todo), 1))
+    if jobs == 1:
+        parsed = map(parse_file, todo)
+    else:
+        with multiprocessing.Pool(jobs) as pool:
+            parsed = pool.map(parse_file, todo)
+    files = {path: f for f, path in paths.items()}
+    for path, mtime, size, digest, data in parsed:
+        stats[path] = (mtime, size, digest)
+        remember(digest, data)
+        result[files[path]] = data
+    return result
 
 
 def parse_contents(contents, filename, date):
@@ -23,8 +129,7 @@ def parse_contents(contents, filename, date):
         logging.info(
             f"content_type: {content_type}, filename: {filename}, date: {date}"
         )
-        decoded_content = io.StringIO(decoded.decode("utf-8"))
-        data = yaml.safe_load(decoded_content.read())
+        _, data = load_spec(decoded)
         return filename, data
     except Exception as e:
         logging.error(e)
@@ -0,0 +1,179 @@
+from array import array
+
+# one entry per finished task, in the order tasks finished
+COLUMNS = (
+    "user",
+    "task",
+    "ready",
+    "start",
+    "end",
+    "preemptions",
+    "queue_time",
+    "duration",
+)
+
+
+class TaskRecords:
+    """
+    Columnar per task records filled in by SchedulingMetrics as tasks finish
+
+    user is the position of the user in users and task the index of the task
+    in its DAG. ready is when the task first became ready: with resume
+    semantics a task waits queue_time and runs duration between then and
+    its end. Columns are typed arrays (integers, switched to floats if a
+    float is added like DAG columns), to_numpy wraps them without copying
+    and to_frame builds a pandas DataFrame.
+
+    user_metrics and summarize compute SchedulingMetrics values as numpy
+    group-bys over the columns. Only finished tasks are recorded, the
+    SchedulingMetrics of a run that stopped before every task finished
+    also count the preemptions and queuing time of the other tasks.
+    """
+
+    def __init__(self, dags) -> None:
+        self.users = list(dags)
+        self.user_index = {user: i for i, user in enumerate(self.users)}
+        self.arrivals = [dag.arrival_time for dag in dags.values()]
+        self.task_counts = [len(dag.tasks) for dag in dags.values()]
+        for column in COLUMNS:
+            setattr(self, column, array("q"))
+
+    def __len__(self):
+        return len(self.user)
+
+    def add(self, user, task, end, preemptions, queue_time):
+        """
+        Record task of user, finished at end
+        """
+        dag = task.dag
+        duration = dag.duration[task.index]
+        row = (
+            self.user_index[user],
+            task.index,
+            end - queue_time - duration,
+            task.start,
+            end,
+            preemptions,
+            queue_time,
+            duration,
+        )
+        for column, value in zip(COLUMNS, row):
+            values = getattr(self, column)
+            try:
+                values.append(value)
+            except TypeError:
+                values = array("d", values)
+                setattr(self, column, values)
+                values.append(value)
+
+    def columns(self):
+        return {column: getattr(self, column) for column in COLUMNS}
+
+    def to_numpy(self):
+        """
+        column -> numpy array sharing memory with the records
+        """
+        import numpy
+
+        return {
+            column: numpy.frombuffer(
+                values, dtype=numpy.int64 if values.typecode == "q" else numpy.float64
+            )
+            for column, values in self.columns().items()
+        }
+
+    def to_frame(self, dags=None):
+        """
+        pandas DataFrame of the records, with the user and task ids if the
+        DAGs are given
+        """
+        import pandas as pd
+
+        frame = pd.DataFrame(self.to_numpy(), copy=False)
+        frame["user"] = pd.Categorical.from_codes(frame["user"], self.users)
+        if dags is not None:
+            frame["task"] = [
+                dags[user].ids[index] for user, index in zip(frame["user"], self.task)
+            ]
+        return frame
+
+    def rows(self, dags):
+        """
+        Records as dicts, users and tasks by id
+        """
+        for row in zip(*self.columns().values()):
+            row = dict(zip(COLUMNS, row))
+            row["user"] = user = self.users[row["user"]]
+            row["task"] = dags[user].ids[row["task"]]
+            yield row
+
+
+def user_metrics(records):
+    """
+    Per user numpy columns: finished tasks, preemptions, avg_jct, queue_time
+    (total), avg_queue_time and makespan, the SchedulingMetrics values of a
+    run where every task finished
+
+    Users with unfinished tasks have a nan avg_jct and an inf makespan like
+    in SchedulingMetrics. Sums keep the type of their column.
+    """
+    import numpy
+
+    n = len(records.users)
+    columns = records.to_numpy()
+    user = columns["user"]
+
+    def total(values):
+        # bincount sums in floats
+        return numpy.bincount(user, values, minlength=n).astype(values.dtype)
+
+    finished = numpy.bincount(user, minlength=n)
+    preemptions = total(columns["preemptions"])
+    jct = total(columns["end"] - columns["start"])
+    queue_time = total(columns["queue_time"])
+
+    # max end per user: sort by user and reduce each run of equal users
+    max_end = numpy.full(n, -numpy.inf)
+    if len(user):
+        order = numpy.argsort(user, kind="stable")
+        sorted_users = user[order]
+        starts = numpy.flatnonzero(numpy.diff(sorted_users, prepend=-1))
+        max_end[sorted_users[starts]] = numpy.maximum.reduceat(
+            columns["end"][order], starts
+        )
+
+    tasks = numpy.asarray(records.task_counts)
+    complete = finished == tasks
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        avg_jct = numpy.where(complete, jct / tasks, numpy.nan)
+        avg_queue_time = queue_time / tasks
+    makespan = numpy.where(
+        complete, max_end - numpy.asarray(records.arrivals), numpy.inf
+    )
+    return {
+        "user": records.users,
+        "tasks": finished,
+        "preemptions": preemptions,
+        "avg_jct": avg_jct,
+        "queue_time": queue_time,
+        "avg_queue_time": avg_queue_time,
+        "makespan": makespan,
+    }
+
+
+def summarize(records):
+    """
+    Global metrics over the user metrics: means over users like
+    SchedulingMetrics (get_jct, get_queuing_time, get_makespan), max
+    makespan and total preemptions
+    """
+    if not records.users:
+        return {}
+    metrics = user_metrics(records)
+    return {
+        "avg_jct": float(metrics["avg_jct"].mean()),
+        "avg_queue_time": float(metrics["avg_queue_time"].mean()),
+        "avg_makespan": float(metrics["makespan"].mean()),
+        "max_makespan": float(metrics["makespan"].max()),
+        "preemptions": int(metrics["preemptions"].sum()),
+    }
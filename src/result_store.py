@@ -0,0 +1,219 @@
+import hashlib
+import logging
+import os
+import pickle
+import stat
+import tempfile
+import time
+import orjson
+
+from lru import LRUCache
+
+# default budget of the pickled results kept in the result directory
+RESULT_BUDGET = 512 * 1024 * 1024
+SUFFIX = ".pickle"
+# session runs, job progress and LOD aggregates in the Flask-Caching backend
+CACHE_TIMEOUT = 24 * 60 * 60
+CACHE_THRESHOLD = 10000
+# unpickled results kept in this process, the UI reads the same run many times
+HOT_RESULTS = 4
+
+
+def result_key(dags, scheduler_type, cluster):
+    """
+    Hash of the inputs of a run: the same workload, scheduler and cluster
+    always give the same result
+    """
+    data = orjson.dumps(
+        {"dags": dags, "scheduler": scheduler_type, "cluster": cluster},
+        option=orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.sha256(data).hexdigest()
+
+
+class MemoryCache:
+    """
+    Dict backed cache with the get/set/delete interface of Flask-Caching
+    """
+
+    def __init__(self) -> None:
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.values[key] = value
+        return True
+
+    def delete(self, key):
+        return self.values.pop(key, None) is not None
+
+
+def private_directory(path):
+    """
+    Create path if needed and make sure only this user can access it, the
+    stored results are unpickled from it
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by another user")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+class ResultStore:
+    """
+    Server side store of finished schedulers, keyed by the hash of their
+    inputs (see result_key), with the run each session looks at
+
+    Results are pickled into files of directory (private_directory), shared
+    by the workers of a gunicorn server. Rerunning the same inputs, from any
+    session, reuses the stored result. The run of each session is kept in
+    cache, any object with the Flask-Caching get/set/delete interface.
+
+    The stored results are evicted least recently used first once the size
+    of their files exceeds budget. File sizes and modification times (set
+    when a result is read) are the index, so every worker sees the results
+    of the others and the budget holds across restarts. The last hot
+    results read are also kept unpickled in memory.
+    """
+
+    def __init__(
+        self, directory, cache=None, budget=RESULT_BUDGET, hot=HOT_RESULTS
+    ) -> None:
+        self.directory = private_directory(directory)
+        self.cache = cache if cache is not None else MemoryCache()
+        self.budget = budget
+        # result key -> scheduler of the most recently used results
+        self.loaded = LRUCache(hot)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}{SUFFIX}")
+
+    def __contains__(self, key):
+        return key in self.loaded or os.path.exists(self.path(key))
+
+    def put(self, key, scheduler):
+        # written to a temporary file first so readers never see a partial result
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(scheduler, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            if size > self.budget:
+                logging.warning(
+                    "Result %s (%d bytes) is over the store budget, not stored",
+                    key,
+                    size,
+                )
+                os.remove(tmp)
+            else:
+                os.replace(tmp, self.path(key))
+                self.touch(key)
+                self.evict()
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.loaded.put(key, scheduler)
+
+    def get(self, key):
+        """
+        Scheduler stored under key, None if it is not (or no longer) stored
+        """
+        scheduler = self.loaded.get(key)
+        if scheduler is not None:
+            self.touch(key)
+            return scheduler
+
+        try:
+            with open(self.path(key), "rb") as f:
+                scheduler = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        self.touch(key)
+        self.loaded.put(key, scheduler)
+        return scheduler
+
+    def touch(self, key):
+        now = time.time_ns()
+        try:
+            os.utime(self.path(key), ns=(now, now))
+        except FileNotFoundError:
+            pass
+
+    def results(self):
+        """
+        (last read, size, key) of the stored results, least recently read
+        first
+        """
+        results = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(SUFFIX):
+                    continue
+                try:
+                    info = entry.stat()
+                except FileNotFoundError:
+                    continue
+                results.append(
+                    (info.st_mtime_ns, info.st_size, entry.name[: -len(SUFFIX)])
+                )
+        return sorted(results)
+
+    @property
+    def bytes(self):
+        return sum(size for _, size, _ in self.results())
+
+    def evict(self):
+        results = self.results()
+        total = sum(size for _, size, _ in results)
+        for _, size, key in results:
+            if total <= self.budget:
+                break
+            try:
+                os.remove(self.path(key))
+                logging.info("Evicted result %s (%d bytes)", key, size)
+            except FileNotFoundError:
+                # evicted by another worker
+                pass
+            self.loaded.pop(key, None)
+            total -= size
+
+    def bind(self, session_id, key):
+        """
+        Make key the run shown to session_id
+        """
+        self.cache.set(f"session:{session_id}", key)
+
+    def session_key(self, session_id):
+        """
+        Key of the last run of session_id, None if there is none
+        """
+        if session_id is None:
+            return None
+        return self.cache.get(f"session:{session_id}")
+
+    def for_session(self, session_id):
+        """
+        Scheduler of the last run of session_id, None if there is none
+        """
+        key = self.session_key(session_id)
+        return None if key is None else self.get(key)
+
+    def run(self, session_id, key, create):
+        """
+        Stored result for key, or create() (a finished scheduler) stored
+        under key, and bind it to session_id
+        """
+        scheduler = self.get(key)
+        if scheduler is None:
+            scheduler = create()
+            self.put(key, scheduler)
+        self.bind(session_id, key)
+        return scheduler
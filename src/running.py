@@ -0,0 +1,106 @@
+from bisect import bisect_left
+
+
+class RunningIndex:
+    """
+    Running tasks ordered by (priority, start time)
+
+    Used by the preemptive scheduler to pick which tasks to preempt: the
+    victims are always the lowest priority (then earliest started) running
+    tasks, so only the shortest prefix of this order that frees enough
+    resources needs to be found.
+
+    Entries are kept in a sorted list updated as tasks are scheduled, finish
+    or get preempted. Cumulative cpus/ram over the sorted order are stored
+    alongside and recomputed lazily, only from the first position that
+    changed and only up to the position a query needs. Since both sums are
+    non-decreasing, the shortest feasible prefix is found with a bisection.
+
+    example:
+    index = RunningIndex()
+    index.add(("user", "task_1"), priority=1, start=0, cpus=2, ram=2)
+    index.add(("user", "task_2"), priority=3, start=0, cpus=2, ram=2)
+    index.victims(priority=2, cpus=1, ram=1) # returns [("user", "task_1")]
+    index.victims(priority=2, cpus=3, ram=1) # returns None
+    """
+
+    def __init__(self) -> None:
+        # sorted (priority, start, key)
+        self.entries = []
+        # key -> its entry
+        self.keys = {}
+        # key -> (cpus, ram)
+        self.resources = {}
+        # cpus/ram used by entries[: i + 1], valid for positions < self.valid
+        self.cum_cpus = []
+        self.cum_ram = []
+        self.valid = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __iter__(self):
+        """
+        Keys of the running tasks, lowest priority first
+        """
+        return (key for _, _, key in self.entries)
+
+    def add(self, key, priority, start, cpus, ram):
+        entry = (priority, start, key)
+        i = bisect_left(self.entries, entry)
+        self.entries.insert(i, entry)
+        self.keys[key] = entry
+        self.resources[key] = (cpus, ram)
+        self.cum_cpus.insert(i, 0)
+        self.cum_ram.insert(i, 0)
+        self.valid = min(self.valid, i)
+
+    def remove(self, key):
+        entry = self.keys.pop(key)
+        del self.resources[key]
+        i = bisect_left(self.entries, entry)
+        del self.entries[i]
+        del self.cum_cpus[i]
+        del self.cum_ram[i]
+        self.valid = min(self.valid, i)
+
+    def update_prefix(self, n):
+        """
+        Make the cumulative resources of the first n entries valid
+        """
+        if self.valid >= n:
+            return
+        cum_cpus, cum_ram = self.cum_cpus, self.cum_ram
+        i = self.valid
+        cpus, ram = (cum_cpus[i - 1], cum_ram[i - 1]) if i else (0, 0)
+        for _, _, key in self.entries[i:n]:
+            task_cpus, task_ram = self.resources[key]
+            cpus += task_cpus
+            ram += task_ram
+            cum_cpus[i] = cpus
+            cum_ram[i] = ram
+            i += 1
+        self.valid = n
+
+    def victims(self, priority, cpus, ram):
+        """
+        Shortest prefix of running tasks with a lower priority than priority
+        that uses at least cpus and ram, None if there is no such prefix
+        """
+        if cpus <= 0 and ram <= 0:
+            return []
+        # (priority,) sorts before any entry with that priority
+        n = bisect_left(self.entries, (priority,))
+        if not n:
+            return None
+        self.update_prefix(n)
+        if self.cum_cpus[n - 1] < cpus or self.cum_ram[n - 1] < ram:
+            return None
+        end = max(
+            bisect_left(self.cum_cpus, cpus, 0, n),
+            bisect_left(self.cum_ram, ram, 0, n),
+        )
+        return [key for _, _, key in self.entries[: end + 1]]
@@ -1,61 +1,17 @@
 from typing import Callable
 from dag import DAG, TaskStatus
+from events import EventCalendar, EventType
 from mlfq import MultiLevelFeedbackQueue
 from metrics import SchedulingMetrics
+from history import SchedulerHistory
+from messages import MessageKind, MessageLog
+from profiling import SchedulerProfiler
+from running import RunningIndex
 from collections import deque
-from copy import deepcopy
 
 import logging
 
 
-class SchedulerHistory:
-    """
-    Store history of scheduler.
-
-    Given a time, the scheduler history will store a deepcopy of all scheduling state
-    like the dags, utilization, messages, etc.
-
-    Not performant for large scheduling problems.
-    """
-
-    def __init__(self) -> None:
-        # time -> list of messages at time t
-        self.messages = {}
-
-        # time -> cluster resources used
-        self.utilizations = {}
-
-        # time -> user -> user DAG state at time t
-        self.dags = {}
-
-        # time -> metrics
-        self.metrics = {}
-
-        # times stored
-        self.times = set()
-
-    def add_event(self, t, messages, dags, utilization, metrics):
-        self.times.add(t)
-        self.messages[t] = deepcopy(messages)
-        self.dags[t] = deepcopy(dags)
-        self.utilizations[t] = deepcopy(utilization)
-        self.metrics[t] = deepcopy(metrics)
-
-    def get_events_at_time_t(self, t):
-        if t not in self.times:
-            raise KeyError(f"Time {t} not in scheduler history")
-
-        return self.messages[t], self.dags[t], self.utilizations[t]
-
-    def get_metrics(self, t):
-        if t not in self.times:
-            raise KeyError(f"Time {t} not in scheduler history")
-        return self.metrics[t]
-
-    def get_all_metrics(self):
-        return self.metrics
-
-
 class Scheduler:
     """
     Base Scheduler Class
@@ -63,34 +19,70 @@ class Scheduler:
     Derived classes must overried the perform_scheduling_round method.
 
     Scheduling simulation must perform discrete-event simulation.
-    See the next_*_time* functions to see how to sift through ready/running/blocked/etc.
-    tasks to determine the next discrete scheduling time.
+    Future DAG arrivals and task finishes are kept in an event calendar
+    (see events.py): remove_finished_tasks pops the events due at the current
+    time and set_next_event_time advances the clock to the next pending event.
 
     Preemption is also possible via the preempt_task* functions
 
-    Classes can use the logged_message method to log a string and then append it to the
-    messages field. This can then be accessed in the front-end via the
-    scheduler history class.
+    Pass profile=True to time each phase of the scheduling rounds, the
+    report is returned by the profile method.
+
+    Scheduling events are recorded in the messages field (a MessageLog, see
+    messages.py), classes can use the logged_message method to add a free form
+    message. They can then be accessed in the front-end via the scheduler
+    history class.
     """
 
-    def __init__(self, cluster, dags, users, deserialize=True):
+    def __init__(
+        self,
+        cluster,
+        dags,
+        users,
+        deserialize=True,
+        history=None,
+        profile=False,
+        message_level=logging.DEBUG,
+    ):
         self.cluster = cluster
         self.utilization = {"cpus": 0, "ram": 0}
         self.dags = {
             user: DAG(dag, deserialize=deserialize) for user, dag in dags.items()
         }
+        for dag in self.dags.values():
+            dag.reset_state()
         self.users = users
         self.time = 0
-        self.messages = []
-        self.history = SchedulerHistory()
+        # see messages.py, message_level=None disables messages
+        self.messages = MessageLog(message_level)
+        # pass a SchedulerHistory to pick checkpoint interval and retention
+        self.history = history if history is not None else SchedulerHistory()
         self.metrics = SchedulingMetrics(self.dags)
         self.running = {}
+        # (user, label, task) that became ready since the last get_ready_tasks
+        self.newly_ready = []
+        # (user, label) of tasks changed since the last history event
+        self.changed = set()
+        self.events = EventCalendar()
+        for user, dag in self.dags.items():
+            self.events.push(dag.arrival_time, EventType.ARRIVAL, user)
+        # per phase timers and counters, see profiling.py
+        self.profiler = SchedulerProfiler(self).attach() if profile else None
 
     def run(self):
         finished = False
         while not finished:
             finished = self.perform_scheduling_round()
 
+    def profile(self):
+        """
+        Profiling report (see SchedulerProfiler.report), None if the
+        scheduler was created without profile=True
+        """
+        if self.profiler is None:
+            return None
+        return self.profiler.report()
+
     def getUsers(self):
         return self.users
 
@@ -103,6 +95,9 @@ class Scheduler:
     def get_history(self, t):
         return self.history.get_events_at_time_t(t)
 
+    def get_status_changes(self, t, since=None):
+        return self.history.get_status_changes(t, since)
+
     def get_history_metrics(self):
         return self.history.get_all_metrics()
 
@@ -110,76 +105,69 @@ class Scheduler:
         return self.history.get_metrics(t)
 
     def store_history(self, initial=False):
-        if initial:
-            self.history.add_event(
-                -1, self.messages, self.dags, self.utilization, self.metrics
-            )
-        else:
-            self.history.add_event(
-                self.time, self.messages, self.dags, self.utilization, self.metrics
-            )
+        time = -1 if initial else self.time
+        self.history.add_event(
+            time,
+            self.messages,
+            self.dags,
+            self.utilization,
+            self.metrics,
+            changed=self.changed,
+        )
+        self.changed = set()
 
     def get_ready_tasks(self):
-        tasks = []
-        for user, dag in self.dags.items():
-            if dag.arrival_time <= self.time:
-                for label, task in dag.tasks.items():
-                    if task.status and task.status in (
-                        TaskStatus.READY,
-                        TaskStatus.RUNNING,
-                        TaskStatus.FINISHED,
-                    ):
-                        continue
-                    if self.task_can_be_scheduled(dag, task):
-                        logging.info(
-                            f"Task (user: {user}, label: {label}, "
-                            f"task: {task}) now READY"
-                        )
-                        task.status = TaskStatus.READY
-                        task.ready_time = self.time
-                        tasks.append((user, label, task))
-                    else:
-                        task.status = TaskStatus.BLOCKED
+        """
+        Tasks that became ready since the last call
+
+        Readiness is tracked incrementally: every task keeps a count of its
+        unfinished dependencies, which is initialized when its DAG arrives and
+        decremented as its dependencies finish (see dag_arrived and
+        finish_task). Preempted tasks are also handed back here.
+        """
+        tasks = self.newly_ready
+        self.newly_ready = []
+        for user, label, task in tasks:
+            logging.info("Task (user: %s, label: %s) now READY", user, label)
+            task.status = TaskStatus.READY
+            self.changed.add((user, label))
         return tasks
 
+    def add_ready_task(self, user, label, task):
+        task.ready_time = self.time
+        self.newly_ready.append((user, label, task))
+
+    def dag_arrived(self, user):
+        dag = self.dags[user]
+        for index, count in enumerate(dag.dependency_counts().values()):
+            task = dag.task(index)
+            task.remaining_dependencies = count
+            self.changed.add((user, task.id))
+            if count:
+                task.status = TaskStatus.BLOCKED
+            else:
+                self.add_ready_task(user, task.id, task)
+
     def cluster_can_shedule_task(self, task):
         if task.status == TaskStatus.FINISHED:
             return False
-        if task.props["cpus"] + self.utilization["cpus"] > self.cluster["cpus"]:
+        if task.cpus + self.utilization["cpus"] > self.cluster["cpus"]:
             return False
-        if task.props["ram"] + self.utilization["ram"] > self.cluster["ram"]:
+        if task.ram + self.utilization["ram"] > self.cluster["ram"]:
             return False
         return True
 
-    def task_can_be_scheduled(self, dag, task):
-        """
-        check if task name appears in dependency of any other task in the dag
-        """
-
-        if "dependencies" in task.props:
-            for label, _task in dag.tasks.items():
-                label = label.split(",")[-1]
-                if label in task.props["dependencies"]:
-                    if _task.status and _task.status != TaskStatus.FINISHED:
-                        _label = task.id.split(",")[-1]
-                        logging.info(f"Cannot run {_label} until {label} finishes")
-                        return False
-
-        return True
-
     def schedule_task(self, user, label, task):
         if not self.cluster_can_shedule_task(task):
             return False
 
-        cpus, ram = task.props["cpus"], task.props["ram"]
+        cpus, ram = task.cpus, task.ram
 
         task_id = label.split(",")[-1]
-        self.logged_message(
-            f"Scheduled {user} task {task_id} with {cpus} cpus and {ram} ram"
-        )
+        self.messages.add(self.time, MessageKind.SCHEDULED, user, task_id, cpus, ram)
 
         task.status = TaskStatus.RUNNING
-        if not task.prev_runtime:
+        if task.start is None:
             # store initial run time
             task.start = self.time
         self.metrics.store_task_queue_time(user, task, self.time)
@@ -189,41 +177,47 @@ class Scheduler:
         self.utilization["ram"] += ram
 
         self.running[(user, label)] = task
+        self.changed.add((user, label))
+        # preempted tasks resume with the work they already did
+        finish_time = self.time + task.duration - task.runtime
+        self.events.push(finish_time, EventType.FINISH, (user, label))
 
         return True
 
     def remove_finished_tasks(self):
-        # need to loop over a copy of the dict to mutate the original dynamically
-        for key, task in self.running.copy().items():
-            user, label = key
-            # update run time for task
-            task.runtime += self.time - task.prev_runtime
-            # has task run long enough?
-            if task.runtime >= task.props["duration"]:
-                task.status = TaskStatus.FINISHED
-                task.end = self.time
-                task_id = label.split(",")[-1]
-                self.logged_message(
-                    f"Finished user: {user} task: {task_id} at time={self.time}"
-                )
-                self.utilization["cpus"] -= task.props["cpus"]
-                self.utilization["ram"] -= task.props["ram"]
-                self.metrics.store_task_finish_time(user, task)
-                del self.running[key]
-
-    def next_time_task_finishes(self):
-        next_time = float("inf")
-        for _, task in self.running.items():
-            duration = task.props["duration"]
-            next_time = min(next_time, task.start + duration)
-        return next_time
-
-    def next_dag_arrival_time(self):
-        next_time = float("inf")
-        for _, dag in self.dags.items():
-            if dag.arrival_time > self.time:
-                next_time = min(next_time, dag.arrival_time)
-        return next_time
+        """
+        Pop every event due at the current time off the event calendar
+
+        Finish events release the resources of their task and unblock its
+        children, arrival events make the DAG's root tasks ready.
+        """
+        for _, kind, key in self.events.pop_due(self.time):
+            if kind == EventType.FINISH:
+                self.finish_task(key)
+            else:
+                self.dag_arrived(key)
+
+    def finish_task(self, key):
+        user, label = key
+        task = self.running.pop(key)
+        task.runtime += self.time - task.prev_runtime
+        task.status = TaskStatus.FINISHED
+        task.end = self.time
+        task_id = label.split(",")[-1]
+        self.messages.add(self.time, MessageKind.FINISHED, user, task_id)
+        self.utilization["cpus"] -= task.cpus
+        self.utilization["ram"] -= task.ram
+        self.metrics.store_task_finish_time(user, task)
+        self.changed.add(key)
+
+        dag = task.dag
+        remaining = dag.remaining_dependencies
+        for child in dag.child_indices_of(task.index):
+            remaining[child] -= 1
+            child_label = dag.ids[child]
+            self.changed.add((user, child_label))
+            if not remaining[child]:
+                self.add_ready_task(user, child_label, dag.task(child))
 
     def set_next_event_time(self):
         """
@@ -231,67 +225,66 @@ class Scheduler:
             - next event to finish
             - OR arrival of a DAG of tasks
         """
-        next_event_time = self.next_time_task_finishes()
-        next_arrival_time = self.next_dag_arrival_time()
-
-        logging.debug(f"next event time is: {next_event_time}")
-        logging.debug(f"next arrival time: {next_arrival_time}")
+        next_time = self.events.next_time()
 
-        next_time = min(next_event_time, next_arrival_time)
+        logging.debug("next event time is: %s", next_time)
 
         # done scheduling -> signal that scheduling has completed
         if next_time == float("inf"):
             logging.info("No events remaining: scheduling finished or deadlock!")
-            logging.info(f"Scheduling finished at time: {self.time}")
+            logging.info("Scheduling finished at time: %s", self.time)
             return True
 
         # not done scheduling -> prepare time for next scheduling round
-        logging.info(f"Increasing scheduler time from {self.time} to {next_time}")
+        logging.info("Increasing scheduler time from %s to %s", self.time, next_time)
         self.time = next_time
         return False
 
     def logged_message(self, message):
-        logging.info(message)
-        self.messages.append(message)
+        self.messages.append(message, self.time)
 
     def preempt_task(self, task_key):
         task = self.running[task_key]
         user, label = task_key
-        self.logged_message(
-            f"Pre-empting user {user} task {label} with priority: {task.priority}"
-        )
+        self.messages.add(self.time, MessageKind.PREEMPTED, user, label, task.priority)
 
-        # remove task from running set
+        # remove task from running set and drop its pending finish event
         del self.running[task_key]
+        self.events.cancel(task_key)
 
         task.status = TaskStatus.PREEMPTED
-        task.runtime = self.time - task.start
+        task.runtime += self.time - task.prev_runtime
+        # preempted task goes back to the ready queue in the next round
+        self.add_ready_task(user, label, task)
 
         self.metrics.store_preemption(user, task)
+        self.changed.add(task_key)
 
         # should we increase priority of preempted tasks?
 
-        self.utilization["cpus"] -= task.props["cpus"]
-        self.utilization["ram"] -= task.props["ram"]
+        self.utilization["cpus"] -= task.cpus
+        self.utilization["ram"] -= task.ram
 
     def preempt_tasks(self, task_keys):
         for task_key in task_keys:
             self.preempt_task(task_key)
 
     def task_has_utilization(self, task, utilization):
-        available_cpus = task.props["cpus"] + (
-            self.cluster["cpus"] - utilization["cpus"]
-        )
-        available_ram = task.props["ram"] + (self.cluster["ram"] - utilization["ram"])
+        """
+        Would task fit if the resources in utilization were freed
+        """
+        available_cpus = self.cluster["cpus"] - self.utilization["cpus"]
+        available_ram = self.cluster["ram"] - self.utilization["ram"]
 
         return (
-            available_cpus >= task.props["cpus"] and available_ram >= task.props["ram"]
+            available_cpus + utilization["cpus"] >= task.cpus
+            and available_ram + utilization["ram"] >= task.ram
         )
 
 
 class FCFS(Scheduler):
-    def __init__(self, cluster, dags, users, deserialize=True):
-        super().__init__(cluster, dags, users, deserialize)
+    def __init__(self, cluster, dags, users, deserialize=True, **kwargs):
+        super().__init__(cluster, dags, users, deserialize, **kwargs)
         self.ready = deque()
         self.store_history(initial=True)
 
@@ -310,10 +303,8 @@ class FCFS(Scheduler):
 
         for user, label, task in self.get_ready_tasks():
             self.ready.appendleft((user, label, task))
-            duration = task.props["duration"]
-            super().logged_message(
-                f"Added {user} task {label} to ready queue with duration {duration}"
-            )
+            duration = task.duration
+            self.messages.add(self.time, MessageKind.READY, user, label, duration)
 
         self.schedule_tasks()
 
@@ -341,7 +332,7 @@ class FCFS(Scheduler):
 
         while len(self.ready):
             user, label, task = self.ready[-1]
-            task_scheduled = super().schedule_task(user, label, task)
+            task_scheduled = self.schedule_task(user, label, task)
             if task_scheduled:
                 self.ready.pop()
             else:
@@ -374,8 +365,9 @@ class PriorityScheduler(Scheduler):
         users,
         deserialize=True,
         priority_func: Callable = get_default_priority,
+        **kwargs,
     ):
-        super().__init__(cluster, dags, users, deserialize)
+        super().__init__(cluster, dags, users, deserialize, **kwargs)
         for _, dag in self.dags.items():
             for _, task in dag.tasks.items():
                 task.priority = priority_func(task)
@@ -394,21 +386,25 @@ class PriorityScheduler(Scheduler):
                 -> produce event message as each task transitions from ready to running
             -> store state of dags and cluster
         """
-        super().remove_finished_tasks()
+        self.remove_finished_tasks()
 
-        for user, label, task in super().get_ready_tasks():
-            # unlike FCFS, now we need to track priority
-            self.ready.put((user, label, task), task.priority)
-            super().logged_message(
-                f"Added {user} task {label} "
-                f"to ready queue with priority {task.priority} "
-                f"and duration {task.props['duration']}"
+        ready = self.get_ready_tasks()
+        # unlike FCFS, now we need to track priority
+        self.ready.put_many((item, item[2].priority) for item in ready)
+        for user, label, task in ready:
+            self.messages.add(
+                self.time,
+                MessageKind.READY_PRIORITY,
+                user,
+                label,
+                task.priority,
+                task.duration,
             )
 
         self.schedule_tasks()
 
-        super().store_history(initial=False)
-        finished = super().set_next_event_time()
+        self.store_history(initial=False)
+        finished = self.set_next_event_time()
         return finished
 
     def schedule_tasks(self):
@@ -422,7 +418,7 @@ class PriorityScheduler(Scheduler):
 
         while self.ready.size:
             user, label, task = self.ready.peek()
-            task_scheduled = super().schedule_task(user, label, task)
+            task_scheduled = self.schedule_task(user, label, task)
             if task_scheduled:
                 # task scheduled successfully -> consume item from queue
                 self.ready.get()
@@ -433,12 +429,40 @@ class PriorityScheduler(Scheduler):
 
 
 class PreemptivePriorityScheduler(PriorityScheduler):
+    """
+    Preemptive priority queue scheduler
+
+    When the highest priority ready task does not fit, the lowest priority
+    (then earliest started) running tasks are preempted to make room for it.
+    Running tasks are kept ordered for this in a RunningIndex.
+    """
+
+    def __init__(self, cluster, dags, users, deserialize=True, **kwargs):
+        self.running_index = RunningIndex()
+        super().__init__(cluster, dags, users, deserialize, **kwargs)
+
     def run(self):
         super().run()
 
     def perform_scheduling_round(self):
         return super().perform_scheduling_round()
 
+    def schedule_task(self, user, label, task):
+        task_scheduled = super().schedule_task(user, label, task)
+        if task_scheduled:
+            self.running_index.add(
+                (user, label), task.priority, task.start, task.cpus, task.ram
+            )
+        return task_scheduled
+
+    def finish_task(self, key):
+        self.running_index.remove(key)
+        super().finish_task(key)
+
+    def preempt_task(self, task_key):
+        self.running_index.remove(task_key)
+        super().preempt_task(task_key)
+
     def schedule_task_with_preemption(self, user, label, task):
         """
         To schedule task into the cluster
@@ -449,33 +473,15 @@ class PreemptivePriorityScheduler(PriorityScheduler):
                     - adjust utilization accordingly
                 - add higher prio task to set of running tasks
         """
-        prio = task.priority
-
-        possible_utilization = {"cpus": 0, "ram": 0}
-        possibly_preempted = set()
-
-        for running_item in self.get_running_tasks_by_priority():
-            running_prio, (running_user, running_label), running_task = running_item
-            if prio <= running_prio:
-                return False
-            cpus, ram = running_task.props["cpus"], running_task.props["ram"]
-            possible_utilization["cpus"] += cpus
-            possible_utilization["ram"] += ram
-            possibly_preempted.add((running_user, running_label))
-
-            if super().task_has_utilization(task, possible_utilization):
-                logging.info(f"Preempting tasks: {possibly_preempted}")
-                super().preempt_tasks(possibly_preempted)
-                super().schedule_task(user, label, task)
-                return True
-
-        return False
+        missing_cpus = task.cpus + self.utilization["cpus"] - self.cluster["cpus"]
+        missing_ram = task.ram + self.utilization["ram"] - self.cluster["ram"]
+        victims = self.running_index.victims(task.priority, missing_cpus, missing_ram)
+        if victims is None:
+            return False
 
-    def get_running_tasks_by_priority(self):
-        running_tasks = []
-        for key, task in self.running.items():
-            running_tasks.append((task.priority, key, task))
-        return sorted(running_tasks)
+        logging.info("Preempting tasks: %s", victims)
+        super().preempt_tasks(victims)
+        return self.schedule_task(user, label, task)
 
     def schedule_tasks(self):
         """
@@ -486,7 +492,7 @@ class PreemptivePriorityScheduler(PriorityScheduler):
 
         while self.ready.size:
             user, label, task = self.ready.peek()
-            task_scheduled = super().schedule_task(user, label, task)
+            task_scheduled = self.schedule_task(user, label, task)
             if task_scheduled:
                 # task scheduled successfully -> consume item from queue
                 self.ready.get()
@@ -503,14 +509,16 @@ class PreemptivePriorityScheduler(PriorityScheduler):
 
 
 def compute_service_size(task):
-    cpus, ram, duration = task.props["cpus"], task.props["ram"], task.props["duration"]
+    cpus, ram, duration = task.cpus, task.ram, task.duration
 
     return -cpus * ram * duration
 
 
 class SmallestServiceFirst(PriorityScheduler):
-    def __init__(self, cluster, dags, users, deserialize=True):
-        super().__init__(cluster, dags, users, deserialize, compute_service_size)
+    def __init__(self, cluster, dags, users, deserialize=True, **kwargs):
+        super().__init__(
+            cluster, dags, users, deserialize, compute_service_size, **kwargs
+        )
 
     def run(self):
         super().run()
@@ -520,13 +528,13 @@ class SmallestServiceFirst(PriorityScheduler):
 
 
 def compute_priority_by_duration(task):
-    return -task.props["duration"]
+    return -task.duration
 
 
 class ShortestJobFirst(PriorityScheduler):
-    def __init__(self, cluster, dags, users, deserialize=True):
+    def __init__(self, cluster, dags, users, deserialize=True, **kwargs):
         super().__init__(
-            cluster, dags, users, deserialize, compute_priority_by_duration
+            cluster, dags, users, deserialize, compute_priority_by_duration, **kwargs
         )
 
     def run(self):
@@ -536,6 +544,15 @@ class ShortestJobFirst(PriorityScheduler):
         return super().perform_scheduling_round()
 
 
+# names used to select a scheduler in the UI and on the command line
+SCHEDULERS = {
+    "FCFS": FCFS,
+    "PRIO": PriorityScheduler,
+    "PREPRIO": PreemptivePriorityScheduler,
+    "SSF": SmallestServiceFirst,
+    "SJF": ShortestJobFirst,
+}
+
 if __name__ == "__main__":
     """
     for testing:
@@ -1,5 +1,6 @@
 from dash import dcc
 from scheduling import Scheduler
+from time_index import SLIDER_BINS, marks, snap
 
 from dash import html
 
@@ -17,27 +18,110 @@ def get_scheduling_output(scheduler: Scheduler):
             )
         ]
 
-    times = sorted(list(scheduler.history.times))
+    return [
+        html.H5("Output Logs"),
+        generate_section_banner("Select Time Instance"),
+        html.Br(),
+        *build_time_controls(get_time_stops(scheduler), get_time_window(scheduler)),
+        build_retention_note(scheduler.history.retention_report()),
+        html.Br(),
+        build_output_messages(),
+    ]
+
+
+def build_time_controls(stops, window):
+    """
+    Slider over the stops of the time window (see TimeIndex) and a range
+    slider over every time to zoom in
+    """
+    return [
+        dcc.Slider(
+            id="scheduling-times",
+            step=None,
+            included=False,
+            updatemode="drag",
+            **stops,
+        ),
+        html.P("Zoom", style={"font-size": "10px"}),
+        dcc.RangeSlider(
+            id="scheduling-window",
+            allowCross=False,
+            tooltip={"placement": "bottom"},
+            **window,
+        ),
+    ]
+
+
+def get_time_stops(scheduler: Scheduler, start=None, end=None, value=None):
+    """
+    Time slider props for the times between start and end, value is moved to
+    a stop
+    """
+    # only times kept by the history retention policy can be shown
+    stops = scheduler.history.get_time_index().bins(start, end)
+    return {
+        "min": stops[0] if stops else 0,
+        "max": stops[-1] if stops else 0,
+        "marks": marks(stops),
+        "value": snap(value, stops),
+    }
 
-    possible_times = [{"label": "Initial", "value": -1}]
 
-    if len(times[1:]):
-        possible_times += [{"label": f"Time={i}", "value": i} for i in times[1:]]
+def get_time_window(scheduler: Scheduler):
+    """
+    Zoom range slider props, the whole run is selected
+    """
+    index = scheduler.history.get_time_index()
+    first = index.first if len(index) else 0
+    last = index.last if len(index) else 0
+    integers = all(isinstance(t, int) for t in (first, last))
+    return {
+        "min": first,
+        "max": last,
+        "step": 1 if integers else (last - first) / SLIDER_BINS or 1,
+        "value": [first, last],
+    }
 
+
+def get_running_output():
+    """
+    Output while a run is in progress, the times simulated so far are added
+    to the sliders as the run progresses
+    """
     return [
         html.H5("Output Logs"),
         generate_section_banner("Select Time Instance"),
         html.Br(),
-        dcc.Dropdown(
-            id="scheduling-times-dropdown",
-            options=possible_times,
-            value=-1,
+        *build_time_controls(
+            {"min": 0, "max": 0, "marks": {}, "value": None},
+            {"min": 0, "max": 0, "step": 1, "value": [0, 0]},
         ),
         html.Br(),
         build_output_messages(),
     ]
 
 
+def render_job_progress(progress):
+    status = progress["status"]
+    if progress["error"]:
+        return html.P(f"Run {status}: {progress['error']}")
+    return html.P(
+        f"Run {status}: time={progress['time']}, "
+        f"{progress['tasks_finished']}/{progress['tasks']} tasks finished, "
+        f"{progress['events_per_sec']:.0f} events/s"
+    )
+
+
+def build_retention_note(report):
+    if not report["dropped_events"]:
+        return html.Br()
+    return html.P(
+        f"History retention ({report['mode']}) kept {report['kept_events']} "
+        f"event times and dropped {report['dropped_events']}",
+        style={"font-size": "10px"},
+    )
+
+
 def build_output_messages():
     return html.Div(
         id="scheduling-messages",
@@ -52,10 +136,6 @@ def build_output_messages():
     )
 
 
-def render_scheduling_messages(messages):
-    return [html.P(message) for message in messages]
-
-
 def generate_piechart():
     return dcc.Graph(
         id="piechart",
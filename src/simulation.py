@@ -0,0 +1,135 @@
+import csv
+import time
+
+import orjson
+
+from messages import format_message
+from metrics import SKETCHES
+from scheduling import SCHEDULERS
+
+
+class EventLog:
+    """
+    Minimal scheduler history for headless runs
+
+    Only records the messages logged at each event time: the full
+    SchedulerHistory (task states and metrics at every event) is what the UI
+    needs to replay a run, a batch run only reports the final metrics.
+    Nothing is recorded when disabled.
+    """
+
+    def __init__(self, enabled=True) -> None:
+        self.enabled = enabled
+        self.records = []
+        self.seen = 0
+
+    def add_event(self, t, messages, dags, utilization, metrics, changed=None):
+        if not self.enabled:
+            return
+        for record in messages[self.seen :]:
+            self.records.append({"time": t, "message": format_message(record)})
+        self.seen = len(messages)
+
+
+def simulate(data, scheduler, cluster=None, history=None, **kwargs):
+    """
+    Run the scheduler named scheduler (see SCHEDULERS) on a parsed spec
+
+    cluster overrides the cluster of the spec, other keyword arguments are
+    passed to the scheduler. Returns the scheduler and the wall time it took
+    to run
+    """
+    if history is None:
+        history = EventLog(enabled=False)
+    users = list(data["users"].keys())
+
+    start = time.perf_counter()
+    instance = SCHEDULERS[scheduler](
+        cluster if cluster is not None else data["cluster"],
+        data["users"],
+        users,
+        deserialize=False,
+        history=history,
+        **kwargs,
+    )
+    instance.run()
+    return instance, time.perf_counter() - start
+
+
+def user_summaries(scheduler):
+    """
+    One row of metrics per user, same columns as the UI metrics table
+    """
+    metrics = scheduler.metrics
+    rows = []
+    for user, dag in scheduler.dags.items():
+        rows.append(
+            {
+                "user": user,
+                "name": dag.name,
+                "tasks": len(dag.tasks),
+                "arrival_time": dag.arrival_time,
+                "preemptions": metrics.get_local_preemptions(user),
+                "avg_jct": metrics.get_local_mean_jct(user),
+                "queue_time": metrics.get_local_total_queuing_time(user),
+                "makespan": metrics.get_local_makespan(user),
+            }
+        )
+    return rows
+
+
+def summarize(scheduler, elapsed):
+    metrics = scheduler.metrics
+    return {
+        "users": len(scheduler.dags),
+        "tasks": sum(len(dag.tasks) for dag in scheduler.dags.values()),
+        "end_time": scheduler.time,
+        "avg_jct": metrics.get_mean_jct(),
+        "avg_queue_time": metrics.get_mean_queuing_time(),
+        "avg_makespan": metrics.get_makespan(),
+        "max_makespan": metrics.get_makespan(max),
+        "preemptions": metrics.get_total_preemptions(),
+        **percentile_columns(metrics),
+        "wall_time": elapsed,
+    }
+
+
+def percentile_columns(metrics):
+    """
+    Global percentiles as flat columns, e.g. p99_jct
+    """
+    return {
+        f"{name}_{metric}": value
+        for metric, percentiles in metrics.get_percentiles().items()
+        for name, value in percentiles.items()
+    }
+
+
+def sketch_state(metrics):
+    """
+    JSON serializable global sketches of a run, see sketch.merge_sketches
+    """
+    return {metric: metrics.get_sketch(metric).to_dict() for metric in SKETCHES}
+
+
+def write_rows(path, rows):
+    """
+    Write rows (dicts, any iterable) as CSV if path ends with .csv, as JSON
+    lines otherwise
+    """
+    if path.endswith(".csv"):
+        rows = iter(rows)
+        first = next(rows, None)
+        with open(path, "w", newline="") as f:
+            if first is None:
+                return
+            writer = csv.DictWriter(f, fieldnames=list(first.keys()))
+            writer.writeheader()
+            writer.writerow(first)
+            writer.writerows(rows)
+        return
+
+    with open(path, "wb") as f:
+        for row in rows:
+            f.write(orjson.dumps(row))
+            f.write(b"\n")
@@ -0,0 +1,180 @@
+import math
+import random
+
+# quantiles reported by default, as (name, q)
+PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+
+
+class KLLSketch:
+    """
+    Streaming quantile sketch (Karnin, Lang, Liberty: KLL)
+
+    Values are added to a stack of compactors, compactor h holds values of
+    weight 2**h. When the sketch is full the lowest compactor over its
+    capacity is sorted and every other value (chosen at random) is promoted
+    to the next one. Capacities shrink geometrically (by c) from the top, so
+    the sketch holds O(k) values whatever the number of updates and a
+    quantile is off by about 1.7/k in rank. Until the first compaction
+    quantiles are exact.
+
+    Two sketches are merged by concatenating their compactors and
+    compacting again, so sketches of parallel runs can be combined into the
+    sketch of all their values.
+    """
+
+    c = 2 / 3
+
+    def __init__(self, k=200, seed=0, rng=None) -> None:
+        self.k = k
+        # sketches can share a random generator, its state is ~2.5KB
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.compactors = [[]]
+        self.size = 0
+        self.max_size = self.capacity(0)
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self):
+        return self.n
+
+    def capacity(self, height):
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.c**depth * self.k)) + 1
+
+    def grow(self):
+        self.compactors.append([])
+        self.max_size = sum(self.capacity(h) for h in range(len(self.compactors)))
+
+    def update(self, value):
+        self.compactors[0].append(value)
+        self.size += 1
+        self.n += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if self.size >= self.max_size:
+            self.compress()
+
+    def compress(self):
+        for height, values in enumerate(self.compactors):
+            if len(values) >= self.capacity(height):
+                if height + 1 >= len(self.compactors):
+                    self.grow()
+                values.sort()
+                # an odd value out stays at this height
+                last = values.pop() if len(values) % 2 else None
+                promoted = values[self.rng.random() < 0.5 :: 2]
+                self.compactors[height + 1].extend(promoted)
+                self.size -= len(values) - len(promoted)
+                values.clear()
+                if last is not None:
+                    values.append(last)
+                if self.size < self.max_size:
+                    break
+
+    def merge(self, other):
+        """
+        Add the values of other (left unchanged) to this sketch
+        """
+        while len(self.compactors) < len(other.compactors):
+            self.grow()
+        for height, values in enumerate(other.compactors):
+            self.compactors[height].extend(values)
+        self.size = sum(len(values) for values in self.compactors)
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while self.size >= self.max_size:
+            self.compress()
+        return self
+
+    def copy(self, rng=None):
+        sketch = KLLSketch(self.k, rng=rng)
+        if rng is None:
+            sketch.rng.setstate(self.rng.getstate())
+        sketch.compactors = [list(values) for values in self.compactors]
+        sketch.size, sketch.max_size = self.size, self.max_size
+        sketch.n, sketch.min, sketch.max = self.n, self.min, self.max
+        return sketch
+
+    def quantiles(self, qs):
+        """
+        Estimated q quantile for each q in qs, nan if the sketch is empty
+        """
+        if not self.n:
+            return [math.nan for _ in qs]
+        weighted = sorted(
+            (value, 1 << height)
+            for height, values in enumerate(self.compactors)
+            for value in values
+        )
+        total = sum(weight for _, weight in weighted)
+
+        results = []
+        for q in qs:
+            if q <= 0:
+                results.append(self.min)
+                continue
+            if q >= 1:
+                results.append(self.max)
+                continue
+            target = q * total
+            seen = 0
+            for value, weight in weighted:
+                seen += weight
+                if seen >= target:
+                    results.append(value)
+                    break
+            else:
+                results.append(self.max)
+        return results
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def percentiles(self):
+        """
+        {"p50": ..., "p90": ..., "p99": ...}
+        """
+        values = self.quantiles([q for _, q in PERCENTILES])
+        return {name: value for (name, _), value in zip(PERCENTILES, values)}
+
+    def to_dict(self):
+        """
+        JSON serializable state, see from_dict
+        """
+        return {
+            "k": self.k,
+            "n": self.n,
+            "min": self.min if self.n else None,
+            "max": self.max if self.n else None,
+            "compactors": self.compactors,
+        }
+
+    @classmethod
+    def from_dict(cls, data, seed=0):
+        sketch = cls(data["k"], seed)
+        sketch.compactors = [list(values) for values in data["compactors"]]
+        sketch.max_size = sum(sketch.capacity(h) for h in range(len(sketch.compactors)))
+        sketch.size = sum(len(values) for values in sketch.compactors)
+        sketch.n = data["n"]
+        if sketch.n:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
+
+
+def merge_sketches(sketches):
+    """
+    Sketch of the values of all sketches (as KLLSketch or to_dict output)
+    """
+    merged = None
+    for sketch in sketches:
+        if isinstance(sketch, dict):
+            sketch = KLLSketch.from_dict(sketch)
+        if merged is None:
+            merged = sketch.copy()
+        else:
+            merged.merge(sketch)
+    return merged if merged is not None else KLLSketch()
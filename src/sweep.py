@@ -0,0 +1,202 @@
+import csv
+import itertools
+import logging
+import multiprocessing
+import os
+
+import orjson
+
+from metrics import SKETCHES
+from read_graph import read_yaml
+from scheduling import SCHEDULERS
+from simulation import simulate, summarize
+from sketch import PERCENTILES
+
+# columns of the results table
+FIELDS = [
+    "cell",
+    "workload",
+    "scheduler",
+    "cpus",
+    "ram",
+    "users",
+    "tasks",
+    "end_time",
+    "avg_jct",
+    "avg_queue_time",
+    "avg_makespan",
+    "max_makespan",
+    "preemptions",
+    *(f"{name}_{metric}" for metric in SKETCHES for name, _ in PERCENTILES),
+    "wall_time",
+]
+
+# workload path -> parsed spec, each worker process parses a workload once
+WORKLOADS = {}
+
+
+def parse_cluster(value):
+    """
+    "CPUSxRAM" (e.g. "20x100") -> (cpus, ram)
+    """
+    try:
+        cpus, ram = value.lower().split("x")
+        return int(cpus), int(ram)
+    except ValueError:
+        raise ValueError(f"Invalid cluster {value!r}, expected CPUSxRAM")
+
+
+def make_grid(workloads, schedulers=None, clusters=None):
+    """
+    Cells (workload, scheduler, cpus, ram) of the sweep
+
+    Cells of a workload are consecutive so that a worker mostly runs cells of
+    workloads it already parsed. cpus and ram are None to use the cluster of
+    the workload file.
+    """
+    schedulers = schedulers or list(SCHEDULERS)
+    for scheduler in schedulers:
+        if scheduler not in SCHEDULERS:
+            raise ValueError(f"Unknown scheduler {scheduler}")
+    clusters = clusters or [(None, None)]
+    return [
+        (workload, scheduler, cpus, ram)
+        for workload, scheduler, (cpus, ram) in itertools.product(
+            workloads, schedulers, clusters
+        )
+    ]
+
+
+def cell_id(cell):
+    return "|".join("" if value is None else str(value) for value in cell)
+
+
+def load_workload(path):
+    if path not in WORKLOADS:
+        WORKLOADS[path] = read_yaml(path)
+    return WORKLOADS[path]
+
+
+def run_cell(cell):
+    """
+    Run one cell, returns (cell, row, error), row is None if the run failed
+    """
+    workload, scheduler, cpus, ram = cell
+    try:
+        data = load_workload(workload)
+        cluster = data["cluster"] if cpus is None else {"cpus": cpus, "ram": ram}
+        instance, elapsed = simulate(data, scheduler, cluster, message_level=None)
+        row = {
+            "cell": cell_id(cell),
+            "workload": workload,
+            "scheduler": scheduler,
+            "cpus": cluster["cpus"],
+            "ram": cluster["ram"],
+        }
+        row.update(summarize(instance, elapsed))
+        return cell, row, None
+    except Exception as e:
+        return cell, None, f"{type(e).__name__}: {e}"
+
+
+class ResultTable:
+    """
+    Append-only results file, CSV if path ends with .csv, JSON lines otherwise
+
+    Rows are flushed as soon as they are added so that an interrupted sweep
+    keeps every finished cell. A row cut short by the interruption is
+    removed when the table is opened again.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.is_csv = path.endswith(".csv")
+        self.file = None
+        self.writer = None
+
+    def completed(self):
+        """
+        ids of the cells already in the table
+        """
+        if not os.path.exists(self.path):
+            return set()
+        self.drop_partial_row()
+        if self.is_csv:
+            with open(self.path, newline="") as f:
+                return {row["cell"] for row in csv.DictReader(f)}
+        with open(self.path, "rb") as f:
+            return {orjson.loads(line)["cell"] for line in f if line.strip()}
+
+    def drop_partial_row(self):
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def open(self):
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        if self.is_csv:
+            self.file = open(self.path, "a", newline="")
+            self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+            if not exists:
+                self.writer.writeheader()
+        else:
+            self.file = open(self.path, "ab")
+        return self
+
+    def add(self, row):
+        if self.is_csv:
+            self.writer.writerow(row)
+        else:
+            self.file.write(orjson.dumps(row) + b"\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def run_sweep(cells, output, jobs=None):
+    """
+    Run every cell not already in the output table across a process pool
+
+    jobs defaults to the number of cores, with jobs=1 cells run in this
+    process. Rows are written in the order cells finish, returns counts of
+    the cells skipped (already done), completed and failed.
+    """
+    table = ResultTable(output)
+    done = table.completed()
+    todo = [cell for cell in cells if cell_id(cell) not in done]
+    report = {
+        "cells": len(cells),
+        "skipped": len(cells) - len(todo),
+        "completed": 0,
+        "failed": 0,
+    }
+
+    jobs = min(jobs or os.cpu_count(), max(len(todo), 1))
+    table.open()
+    try:
+        for i, (cell, row, error) in enumerate(run_cells(todo, jobs), start=1):
+            if error is not None:
+                report["failed"] += 1
+                logging.error(f"Sweep cell {cell_id(cell)} failed: {error}")
+                continue
+            table.add(row)
+            report["completed"] += 1
+            logging.info(f"Finished sweep cell {cell_id(cell)} ({i}/{len(todo)})")
+    finally:
+        table.close()
+    return report
+
+
+def run_cells(cells, jobs):
+    """
+    Results of run_cell in the order cells finish
+    """
+    if jobs == 1:
+        yield from map(run_cell, cells)
+        return
+    with multiprocessing.Pool(jobs) as pool:
+        yield from pool.imap_unordered(run_cell, cells)
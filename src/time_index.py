@@ -0,0 +1,80 @@
+from bisect import bisect_left, bisect_right
+
+# stops of the time slider, about its width in pixels: more can't be told
+# apart without zooming in
+SLIDER_BINS = 500
+# labelled slider stops
+MARK_LABELS = 8
+
+
+class TimeIndex:
+    """
+    Sorted event times of a run, binned for the time slider
+
+    Runs can have many thousands of event times. The slider only offers
+    count + 1 stops over a window of the times: the last event time at or
+    before each bin boundary, so only the states at the stops are ever
+    rebuilt from the history. Zooming into a window smaller than count
+    events shows every event time in it.
+    """
+
+    def __init__(self, times) -> None:
+        self.times = sorted(times)
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def first(self):
+        return self.times[0] if self.times else None
+
+    @property
+    def last(self):
+        return self.times[-1] if self.times else None
+
+    def window(self, start=None, end=None):
+        """
+        (lo, hi) positions of the times between start and end (inclusive)
+        """
+        lo = 0 if start is None else bisect_left(self.times, start)
+        hi = len(self.times) if end is None else bisect_right(self.times, end)
+        return lo, hi
+
+    def bins(self, start=None, end=None, count=SLIDER_BINS):
+        """
+        Slider stops between start and end
+        """
+        lo, hi = self.window(start, end)
+        if hi - lo <= count + 1:
+            return self.times[lo:hi]
+
+        first, last = self.times[lo], self.times[hi - 1]
+        stops = []
+        for i in range(count + 1):
+            boundary = first + (last - first) * i / count
+            t = self.times[max(bisect_right(self.times, boundary, lo, hi) - 1, lo)]
+            if not stops or t != stops[-1]:
+                stops.append(t)
+        return stops
+
+
+def snap(t, stops):
+    """
+    Stop at or before t (the first stop if t is before every stop)
+    """
+    if not stops:
+        return None
+    if t is None:
+        return stops[0]
+    return stops[max(bisect_right(stops, t) - 1, 0)]
+
+
+def marks(stops, labels=MARK_LABELS):
+    """
+    Slider marks: every stop, about labels of them labelled
+    """
+    every = max(1, len(stops) // labels)
+    return {
+        t: ("Initial" if t == -1 else str(t)) if i % every == 0 else ""
+        for i, t in enumerate(stops)
+    }
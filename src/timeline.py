@@ -0,0 +1,222 @@
+import math
+
+from dag import TaskStatus
+from messages import format_message
+from metrics import SchedulingMetrics
+
+# status codes used in the timeline are TaskStatus values, 0 is no status
+STATUS_NAMES = [None] + [
+    TaskStatus(code).name for code in range(1, len(TaskStatus) + 1)
+]
+# messages shown at a time step, the most recent ones
+MESSAGE_WINDOW = 100
+# per user columns of the metrics table
+TABLE_COLUMNS = [
+    "User",
+    "Jobs Count",
+    "Arrival Time",
+    "Total Preemptions",
+    "Avg. Job Completion Time",
+    "Job Queuing Time",
+    "Makespan",
+]
+
+
+def led_value(value):
+    """
+    LED displays can't show nan and inf, they are shown as -1 and 9999
+    """
+    if math.isnan(value):
+        return -1.0
+    if math.isinf(value):
+        return 9999.0
+    return value
+
+
+def table_value(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    return value
+
+
+def global_metrics(metrics):
+    """
+    [queuing time, job completion time, makespan] as shown on the LEDs
+    """
+    return [
+        led_value(metrics.get_mean_queuing_time()),
+        led_value(metrics.get_mean_jct()),
+        led_value(metrics.get_makespan()),
+    ]
+
+
+def utilization_percent(cluster, utilization):
+    return {
+        resource: utilization[resource] / cluster[resource] * 100
+        for resource in ("cpus", "ram")
+    }
+
+
+def job_count(scheduler):
+    return sum(
+        len(scheduler.dags[user].tasks) for user, _ in user_names(scheduler.users)
+    )
+
+
+def user_names(users):
+    """
+    (user, name) pairs, users are given as ids or as {"user", "name"} dicts
+    like in the Dash app
+    """
+    return [
+        (user["user"], user["name"]) if isinstance(user, dict) else (user, user)
+        for user in users
+    ]
+
+
+def table_row(scheduler, metrics, user_id, name):
+    """
+    Metrics table row of a user, TABLE_COLUMNS order
+    """
+    dag = scheduler.dags[user_id]
+    row = [
+        name,
+        len(dag.tasks),
+        dag.arrival_time,
+        metrics.get_local_preemptions(user_id),
+        metrics.get_local_mean_jct(user_id),
+        metrics.get_local_total_queuing_time(user_id),
+        metrics.get_local_makespan(user_id),
+    ]
+    return [table_value(value) for value in row]
+
+
+def table_rows(scheduler, metrics):
+    """
+    Per user metrics table rows (one list per user, TABLE_COLUMNS order)
+    """
+    return [
+        table_row(scheduler, metrics, user_id, name)
+        for user_id, name in user_names(scheduler.users)
+    ]
+
+
+def row_changes(scheduler, metrics, users, shown):
+    """
+    [[position, row], ...] of the users (ids) whose metrics table row is not
+    the one last shown, which is updated
+    """
+    changes = []
+    for position, (user_id, name) in enumerate(user_names(scheduler.users)):
+        if user_id not in users:
+            continue
+        row = table_row(scheduler, metrics, user_id, name)
+        if shown.get(user_id) != row:
+            changes.append([position, row])
+            shown[user_id] = row
+    return changes
+
+
+def status_changes(labels, current, shown, task_index):
+    """
+    [task, status code, ...] of the tasks in labels whose current status is
+    not the one last shown, which is updated
+    """
+    changes = []
+    for label in labels:
+        status = current[label]
+        code = status.value if status else 0
+        if shown.get(label, 0) != code:
+            changes += (task_index[label], code)
+            shown[label] = code
+    return changes
+
+
+def build_timeline(scheduler, run=None):
+    """
+    Compact timeline of a run for playback in the browser
+
+    One entry per time kept in the history (times): the task status changes
+    since the previous time as a flat [task, status code, ...] list (tasks
+    by position in tasks, status codes index STATUS_NAMES), the cluster
+    utilization (%), the global metrics, the end of its messages and the
+    changed rows of the per user metrics table (see row_changes). The
+    statuses and table at a time are the changes of every time up to it.
+
+    Only the last MESSAGE_WINDOW messages of a time are shown, messages
+    holds the ones shown at some time and the messages of a time are the
+    message_window before its end.
+
+    The history log is replayed once.
+    """
+    history = scheduler.history
+    timeline = {
+        "run": run,
+        "times": [],
+        "tasks": [],
+        "statuses": STATUS_NAMES,
+        "changes": [],
+        "utilization": {"cpus": [], "ram": []},
+        "metrics": [],
+        "message_window": MESSAGE_WINDOW,
+        "message_ends": [],
+        "messages": [],
+        "jobcount": job_count(scheduler),
+        "table_columns": TABLE_COLUMNS,
+        "table_changes": [],
+    }
+    if history.template is None:
+        return timeline
+
+    task_index = {}
+    for dag in history.template.values():
+        for task_id in dag.ids:
+            task_index[task_id] = len(timeline["tasks"])
+            timeline["tasks"].append(task_id)
+
+    metrics = SchedulingMetrics(history.template)
+    current = {}
+    for (user, label), (state, task_metrics) in history.base_states.items():
+        metrics.set_task_state(user, label, task_metrics)
+        current[label] = state[0]
+    pending = set(current)
+    # status code last sent for each task
+    shown = {}
+    # users with changed tasks and the table row last sent for each user
+    pending_users = set(history.template)
+    shown_rows = {}
+    # messages (kept in the history) up to this one were sent
+    sent = 0
+
+    for position, (seq, t, delta) in enumerate(
+        zip(history.seqs, history.event_times, history.deltas)
+    ):
+        for (user, label), (state, task_metrics) in delta.items():
+            metrics.set_task_state(user, label, task_metrics)
+            current[label] = state[0]
+            pending.add(label)
+            pending_users.add(user)
+        if history.index[t] != seq:
+            # a later event at the same time is kept
+            continue
+
+        timeline["times"].append(t)
+        timeline["changes"].append(status_changes(pending, current, shown, task_index))
+        pending.clear()
+        utilization = utilization_percent(
+            scheduler.cluster, history.utilizations[position]
+        )
+        for resource, values in timeline["utilization"].items():
+            values.append(utilization[resource])
+        timeline["metrics"].append(global_metrics(metrics))
+        count = history.message_counts[position] - history.messages_offset
+        first = max(sent, count - MESSAGE_WINDOW)
+        timeline["messages"] += map(format_message, history.messages[first:count])
+        sent = max(sent, count)
+        timeline["message_ends"].append(len(timeline["messages"]))
+        timeline["table_changes"].append(
+            row_changes(scheduler, metrics, pending_users, shown_rows)
+        )
+        pending_users.clear()
+
+    return timeline
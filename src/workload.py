@@ -0,0 +1,254 @@
+import math
+import random
+
+from itertools import count
+
+# shape name -> help shown on the command line
+SHAPES = {
+    "chain": "each task depends on the previous one",
+    "mapreduce": "stages of width maps, width/4 reduces and an all reduce",
+    "layered": "random layers of at most width tasks, edges between layers",
+    "erdos": "Erdos-Renyi DAG, task j depends on each i < j with edge_prob",
+}
+
+ARRIVALS = {
+    "poisson": "users arrive as a Poisson process with the given rate",
+    "bursty": "bursts of users (burst users on average) arrive at the same time",
+}
+
+
+class Distribution:
+    """
+    Integer distribution for task durations, resources and priorities
+
+    Parsed from "kind:params", e.g. "const:5", "uniform:1,20" (inclusive),
+    "exp:10" (mean 10) or "lognormal:2,0.5" (mu, sigma of the underlying
+    normal). Samples are rounded and at least minimum.
+    """
+
+    kinds = {"const": 1, "uniform": 2, "exp": 1, "lognormal": 2}
+
+    def __init__(self, kind, params, minimum=1) -> None:
+        if kind not in self.kinds:
+            raise ValueError(f"Unknown distribution {kind}")
+        if len(params) != self.kinds[kind]:
+            raise ValueError(f"{kind} takes {self.kinds[kind]} parameter(s)")
+        self.kind = kind
+        self.params = params
+        self.minimum = minimum
+
+    @classmethod
+    def parse(cls, spec, minimum=1):
+        kind, _, params = spec.partition(":")
+        try:
+            values = [float(p) for p in params.split(",")] if params else []
+        except ValueError:
+            raise ValueError(f"Invalid distribution {spec!r}")
+        return cls(kind, values, minimum)
+
+    def sample(self, rng):
+        if self.kind == "const":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = rng.randint(int(self.params[0]), int(self.params[1]))
+        elif self.kind == "exp":
+            value = rng.expovariate(1 / self.params[0])
+        else:
+            value = rng.lognormvariate(*self.params)
+        return max(self.minimum, round(value))
+
+
+def chain(n, rng, **kwargs):
+    """
+    (label, parent indices) of each task, tasks are numbered from 0
+    """
+    for i in range(n):
+        yield f"Task {i + 1}", [i - 1] if i else []
+
+
+def mapreduce(n, rng, width=8, **kwargs):
+    reduces = max(1, width // 4)
+    i = 0
+    previous = None
+    while i < n:
+        maps = list(range(i, min(i + width, n)))
+        for m in maps:
+            yield f"Map {m + 1}", [] if previous is None else [previous]
+        i += len(maps)
+
+        stage_reduces = list(range(i, min(i + reduces, n)))
+        for r in stage_reduces:
+            yield f"Reduce {r + 1}", maps
+        i += len(stage_reduces)
+
+        if i < n and stage_reduces:
+            yield f"All Reduce {i + 1}", stage_reduces
+            previous = i
+            i += 1
+
+
+def layered(n, rng, width=8, edge_prob=0.5, **kwargs):
+    previous = []
+    i = 0
+    while i < n:
+        layer = list(range(i, min(i + rng.randint(1, width), n)))
+        for task in layer:
+            parents = [p for p in previous if rng.random() < edge_prob]
+            if previous and not parents:
+                parents = [rng.choice(previous)]
+            yield f"Task {task + 1}", parents
+        i += len(layer)
+        previous = layer
+
+
+def erdos(n, rng, edge_prob=0.1, **kwargs):
+    # skip ahead geometrically instead of flipping a coin for every i < j
+    log_q = math.log(1 - edge_prob) if 0 < edge_prob < 1 else None
+    for j in range(n):
+        if edge_prob <= 0:
+            parents = []
+        elif edge_prob >= 1:
+            parents = list(range(j))
+        else:
+            parents = []
+            i = j
+            while True:
+                i -= 1 + int(math.log(1 - rng.random()) / log_q)
+                if i < 0:
+                    break
+                parents.append(i)
+            parents.reverse()
+        yield f"Task {j + 1}", parents
+
+
+def poisson_arrivals(rng, rate, **kwargs):
+    t = 0.0
+    while True:
+        yield round(t)
+        t += rng.expovariate(rate)
+
+
+def bursty_arrivals(rng, rate, burst=5, **kwargs):
+    # burst sizes are geometric with mean burst, bursts arrive with rate/burst
+    log_q = math.log(1 - 1 / burst) if burst > 1 else None
+    t = 0.0
+    while True:
+        size = 1
+        if log_q is not None:
+            size += int(math.log(1 - rng.random()) / log_q)
+        for _ in range(size):
+            yield round(t)
+        t += rng.expovariate(rate / burst)
+
+
+SHAPE_FUNCS = {
+    "chain": chain,
+    "mapreduce": mapreduce,
+    "layered": layered,
+    "erdos": erdos,
+}
+
+ARRIVAL_FUNCS = {"poisson": poisson_arrivals, "bursty": bursty_arrivals}
+
+
+def user_tasks(dag, distributions, rng):
+    for i, (label, parents) in zip(count(1), dag):
+        props = {"label": label}
+        for key, distribution in distributions.items():
+            props[key] = distribution.sample(rng)
+        if parents:
+            props["dependencies"] = [f"task_{p + 1}" for p in parents]
+        yield f"task_{i}", props
+
+
+def iter_users(
+    users=1,
+    tasks=10,
+    shape="chain",
+    arrival="poisson",
+    rate=0.1,
+    burst=5,
+    duration="uniform:1,20",
+    cpus="const:1",
+    ram="const:1",
+    priority=None,
+    width=8,
+    edge_prob=0.1,
+    seed=0,
+):
+    """
+    Lazily generate users as (user, name, arrival time, tasks), tasks
+    generates (task name, task properties) pairs
+
+    The same seed always gives the same workload, every user gets its own
+    random stream so the DAG of a user doesn't depend on the number of users.
+    """
+    if tasks < 1:
+        raise ValueError("Users need at least one task")
+    if rate <= 0 or burst < 1:
+        raise ValueError("Arrival rate must be positive and burst at least 1")
+    if shape not in SHAPE_FUNCS:
+        raise ValueError(f"Unknown shape {shape}")
+    if arrival not in ARRIVAL_FUNCS:
+        raise ValueError(f"Unknown arrival process {arrival}")
+    distributions = {
+        "duration": Distribution.parse(duration),
+        "cpus": Distribution.parse(cpus),
+        "ram": Distribution.parse(ram),
+    }
+    if priority is not None:
+        distributions["priority"] = Distribution.parse(priority, minimum=0)
+
+    arrivals = ARRIVAL_FUNCS[arrival](
+        random.Random(f"{seed}:arrivals"), rate, burst=burst
+    )
+    for user, arrival_time in zip(range(1, users + 1), arrivals):
+        rng = random.Random(f"{seed}:{user}")
+        dag = SHAPE_FUNCS[shape](tasks, rng, width=width, edge_prob=edge_prob)
+        yield f"user_{user}", f"User {user}", arrival_time, user_tasks(
+            dag, distributions, rng
+        )
+
+
+def generate_workload(out, cluster=(20, 100), **options):
+    """
+    Write a workload in the input file schema (see data/) to the file out,
+    see iter_users for the options
+
+    Tasks are written as they are generated so the workload never has to fit
+    in memory: only the tasks of the current layer or stage are kept
+    (erdos also keeps the dependencies of the current task).
+    """
+    out.write(f"cluster:\n  cpus: {cluster[0]}\n  ram: {cluster[1]}\n\nusers:\n")
+    for user, name, arrival_time, tasks in iter_users(**options):
+        out.write(
+            f"  {user}:\n"
+            f"    name: {name}\n"
+            f"    arrival_time: {arrival_time}\n"
+            f"    tasks:\n"
+        )
+        for task, props in tasks:
+            lines = [f"      {task}:\n"]
+            for key, value in props.items():
+                if key == "dependencies":
+                    value = f"[{', '.join(value)}]"
+                lines.append(f"        {key}: {value}\n")
+            out.write("".join(lines))
+
+
+def build_workload(cluster=(20, 100), **options):
+    """
+    Same workload as generate_workload as a parsed spec (what read_yaml
+    returns), skipping the YAML round trip
+    """
+    return {
+        "cluster": {"cpus": cluster[0], "ram": cluster[1]},
+        "users": {
+            user: {
+                "name": name,
+                "arrival_time": arrival_time,
+                "tasks": dict(tasks),
+            }
+            for user, name, arrival_time, tasks in iter_users(**options)
+        },
+    }
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+
+from src.bench_options import HISTORY_MODES, MICRO_BENCHMARKS
+from src.benchmark import (
+    HISTORIES,
+    METRICS,
+    MICRO,
+    compare,
+    format_micro,
+    format_results,
+    load_results,
+    run_case,
+    run_micro,
+    run_suite,
+    save_results,
+)
+
+# e.g. DAGSCHED_BENCH_SIZES=1000,10000,100000,1000000 py.test tests/test_benchmark.py -s
+SIZES = [
+    int(size) for size in os.environ.get("DAGSCHED_BENCH_SIZES", "1000").split(",")
+]
+# write the results to a baseline file
+SAVE = os.environ.get("DAGSCHED_BENCH_SAVE")
+# fail if the results regressed compared to a baseline file
+BASELINE = os.environ.get("DAGSCHED_BENCH_BASELINE")
+METRIC = os.environ.get("DAGSCHED_BENCH_METRIC", "wall_time")
+THRESHOLD = float(os.environ.get("DAGSCHED_BENCH_THRESHOLD", "0.2"))
+
+
+def result(scheduler="FCFS", size=1000, **metrics):
+    values = {metric: 1.0 for metric in METRICS}
+    values.update(metrics)
+    return dict(scheduler=scheduler, size=size, history="ring", **values)
+
+
+class TestSchedulerBenchmark(unittest.TestCase):
+    def test_benchmark(self):
+        results = run_suite(sizes=SIZES)
+        print("\n" + format_results(results))
+
+        self.assertEqual(len(results), 5 * len(SIZES))
+        for r in results:
+            self.assertGreater(r["events"], 0)
+            self.assertGreater(r["peak_rss"], 0)
+            self.assertGreater(r["history_bytes"], 0)
+
+        if SAVE:
+            save_results(SAVE, results)
+        if BASELINE:
+            regressions = compare(load_results(BASELINE), results, METRIC, THRESHOLD)
+            self.assertEqual(regressions, [])
+
+    def test_history_modes(self):
+        ring = run_case("FCFS", 1000, "ring")
+        full = run_case("FCFS", 1000, "full")
+        off = run_case("FCFS", 1000, "off")
+        self.assertEqual(ring["events"], full["events"])
+        self.assertEqual(ring["end_time"], off["end_time"])
+        self.assertLess(ring["history_bytes"], full["history_bytes"])
+        self.assertEqual(off["history_bytes"], 0)
+        # the choices of the bench command
+        self.assertEqual(tuple(HISTORIES), HISTORY_MODES)
+
+
+class TestMicroBenchmarks(unittest.TestCase):
+    def test_micro(self):
+        # small workloads, only checks that every benchmark runs
+        self.assertEqual(tuple(MICRO), MICRO_BENCHMARKS)
+        results = run_micro(scale=0.02)
+        self.assertEqual({r["benchmark"] for r in results}, set(MICRO))
+        for r in results:
+            self.assertGreaterEqual(r["wall_time"], 0)
+        self.assertEqual(len(format_micro(results).splitlines()), len(results) + 1)
+
+
+class TestCompare(unittest.TestCase):
+    def test_regressions(self):
+        baseline = [result("FCFS", wall_time=1.0), result("SJF", wall_time=1.0)]
+        results = [result("FCFS", wall_time=1.1), result("SJF", wall_time=1.5)]
+
+        regressions = compare(baseline, results, "wall_time", 0.2)
+        self.assertEqual([r["scheduler"] for r in regressions], ["SJF"])
+        self.assertAlmostEqual(regressions[0]["change"], 0.5)
+        self.assertEqual(compare(baseline, results, "wall_time", 0.6), [])
+
+    def test_higher_is_better(self):
+        baseline = [result(events_per_sec=1000)]
+        self.assertEqual(
+            compare(baseline, [result(events_per_sec=2000)], "events_per_sec"), []
+        )
+        regressions = compare(baseline, [result(events_per_sec=500)], "events_per_sec")
+        self.assertAlmostEqual(regressions[0]["change"], 0.5)
+
+    def test_missing_and_new_cases(self):
+        baseline = [result(size=1000, wall_time=1.0), result(size=100, wall_time=1.0)]
+        results = [result(size=10000, wall_time=50.0), result(size=100, wall_time=1.0)]
+        regressions = compare(baseline, results)
+        self.assertEqual(
+            [(r["size"], r["reason"]) for r in regressions],
+            [(1000, "missing"), (10000, "new")],
+        )
+        self.assertEqual(regressions[0]["value"], None)
+        self.assertEqual(regressions[1]["baseline"], None)
+        self.assertRaises(ValueError, compare, baseline, results, "latency")
+
+    def test_micro_cases(self):
+        baseline = [{"benchmark": "a", "variant": "x", "wall_time": 1.0}]
+        results = [{"benchmark": "a", "variant": "x", "wall_time": 2.0}]
+        regressions = compare(baseline, results)
+        self.assertEqual(
+            [(r["benchmark"], r["variant"], r["reason"]) for r in regressions],
+            [("a", "x", "regressed")],
+        )
+
+    def test_baseline_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "baseline.json")
+            save_results(path, [result()])
+            self.assertEqual(load_results(path), [result()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import csv
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+import orjson
+from src.cli import main
+
+
+class TestCLI(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def run_cli(self, *args):
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            self.assertEqual(main(list(args)), 0)
+        return orjson.loads(stdout.getvalue())
+
+    def test_summary(self):
+        summary = self.run_cli("run", "data/simple_prio_dag.yml", "--scheduler", "SJF")
+        self.assertEqual(summary["scheduler"], "SJF")
+        self.assertEqual(summary["end_time"], 75)
+        self.assertEqual(summary["users"], 2)
+        self.assertEqual(summary["tasks"], 9)
+
+    def test_outputs(self):
+        summary = self.run_cli(
+            "run",
+            "data/simple_prio_dag.yml",
+            "--scheduler",
+            "preprio",
+            "-o",
+            self.path("metrics.csv"),
+            "--events",
+            self.path("events.jsonl"),
+        )
+        self.assertEqual(summary["preemptions"], 1)
+
+        with open(self.path("metrics.csv")) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row["user"] for row in rows], ["test_user", "test_user2"])
+        self.assertEqual(rows[0]["preemptions"], "1")
+
+        with open(self.path("events.jsonl"), "rb") as f:
+            events = [orjson.loads(line) for line in f]
+        times = [event["time"] for event in events]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(times[-1], 75)
+        self.assertTrue(events[-1]["message"].startswith("Finished"))
+
+    def test_events_csv(self):
+        self.run_cli("run", "data/simple_dag.yml", "--events", self.path("e.csv"))
+        with open(self.path("e.csv")) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(list(rows[0].keys()), ["time", "message"])
+
+    def test_merge_sketches(self):
+        max_makespan = 0
+        for i, path in enumerate(("data/simple_dag.yml", "data/simple_prio_dag.yml")):
+            summary = self.run_cli("run", path, "--sketches", self.path(f"{i}.json"))
+            max_makespan = max(max_makespan, summary["max_makespan"])
+        merged = self.run_cli("quantiles", self.path("0.json"), self.path("1.json"))
+        self.assertEqual(set(merged), {"jct", "queue_time", "slowdown", "makespan"})
+        # few values, the sketches are exact
+        self.assertEqual(merged["makespan"]["p99"], max_makespan)
+        self.assertLessEqual(merged["jct"]["p50"], merged["jct"]["p99"])
+
+    def test_unknown_scheduler(self):
+        with redirect_stdout(io.StringIO()), self.assertRaises(SystemExit):
+            main(["run", "data/simple_dag.yml", "--scheduler", "RR"])
+
+    def test_module_entry_point(self):
+        result = subprocess.run(
+            [sys.executable, "-m", "dagsched", "run", "data/simple_dag.yml"],
+            capture_output=True,
+            check=True,
+        )
+        self.assertEqual(orjson.loads(result.stdout)["end_time"], 16)
+
+    def test_no_ui_imports(self):
+        code = (
+            "import sys, dagsched, cli; "
+            "print([m for m in ('dash', 'pandas', 'plotly', 'numpy', 'benchmark') "
+            "if m in sys.modules])"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), b"[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
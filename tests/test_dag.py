@@ -1,5 +1,6 @@
 import unittest
-from src.dag import DAG
+import orjson
+from src.dag import DAG, TaskStatus
 from src.read_graph import read_yaml
 
 
@@ -18,6 +19,83 @@ class TestSimpleDag(unittest.TestCase):
     def test_dag_edges(self):
         self.assertEqual(len(self.dag.edges), 3)
 
+    def test_dag_children(self):
+        self.assertEqual(
+            self.dag.children("Test User 1,task_1"), ["Test User 1,task_3"]
+        )
+        self.assertEqual(
+            self.dag.children("Test User 1,task_3"), ["Test User 1,task_4"]
+        )
+        self.assertEqual(self.dag.children("Test User 1,task_4"), [])
+
+    def test_csr_dependencies(self):
+        # dependency arrays are built on first use
+        self.dag.csr()
+        self.assertEqual(list(self.dag.parent_indptr), [0, 0, 0, 2, 3])
+        self.assertEqual(list(self.dag.parent_indices), [0, 1, 2])
+        self.assertEqual(list(self.dag.child_indptr), [0, 1, 2, 3, 3])
+        self.assertEqual(list(self.dag.child_indices), [2, 2, 3])
+
+    def test_task_view(self):
+        task = self.dag.tasks["Test User 1,task_1"]
+        self.assertEqual((task.duration, task.cpus, task.ram), (5, 5, 10))
+        self.assertIsNone(task.priority)
+        self.assertIsNone(task.status)
+        self.assertEqual(task, self.dag.task(0))
+        self.assertFalse(hasattr(task, "__dict__"))
+
+        # defaults are filled in
+        task = self.dag.tasks["Test User 1,task_2"]
+        self.assertEqual((task.cpus, task.ram), (1, 1))
+        self.assertNotIn("dependencies", task.props)
+        self.assertEqual(
+            self.dag.tasks["Test User 1,task_3"].props["dependencies"],
+            ["task_1", "task_2"],
+        )
+
+    def test_float_values_widen_arrays(self):
+        dag = DAG(self.data["users"]["test_user"])
+        task = dag.task(0)
+        task.start = 2.5
+        self.assertEqual(task.start, 2.5)
+        self.assertEqual(dag.start.typecode, "d")
+        task.start = None
+        self.assertIsNone(task.start)
+
+    def test_serialization_round_trip(self):
+        dag = DAG(self.data["users"]["test_user"])
+        dag.task(0).status = TaskStatus.FINISHED
+        data = orjson.loads(dag.toJSON())
+
+        copy = DAG(data, deserialize=True)
+        self.assertEqual(copy.ids, dag.ids)
+        self.assertEqual(copy.render_state(), dag.render_state())
+        self.assertEqual(copy.task(0).status, TaskStatus.FINISHED)
+        self.assertEqual(copy.nodes[1]["data"]["status"], "FINISHED")
+
+    def test_dependency_counts(self):
+        counts = self.dag.dependency_counts()
+        self.assertEqual(counts["Test User 1,task_1"], 0)
+        self.assertEqual(counts["Test User 1,task_3"], 2)
+        self.assertEqual(counts["Test User 1,task_4"], 1)
+
+    def test_unknown_dependency_does_not_block(self):
+        dag = DAG(
+            {
+                "name": "user",
+                "arrival_time": 0,
+                "tasks": {
+                    "task_1": {"label": "Task 1", "duration": 1},
+                    "task_2": {
+                        "label": "Task 2",
+                        "duration": 1,
+                        "dependencies": ["task_1", "missing"],
+                    },
+                },
+            }
+        )
+        self.assertEqual(dag.dependency_counts()["user,task_2"], 1)
+
 
 if __name__ == "__main__":
     unittest.main()
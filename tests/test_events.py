@@ -0,0 +1,53 @@
+import unittest
+from src.events import EventCalendar, EventType
+
+
+class TestEventCalendar(unittest.TestCase):
+    def setUp(self):
+        self.calendar = EventCalendar()
+
+    def test_empty(self):
+        self.assertEqual(len(self.calendar), 0)
+        self.assertEqual(self.calendar.next_time(), float("inf"))
+        self.assertEqual(self.calendar.pop_due(100), [])
+
+    def test_events_ordered_by_time(self):
+        self.calendar.push(5, EventType.FINISH, ("a", "task_1"))
+        self.calendar.push(3, EventType.ARRIVAL, "b")
+        self.calendar.push(5, EventType.FINISH, ("a", "task_2"))
+
+        self.assertEqual(self.calendar.next_time(), 3)
+        self.assertEqual(self.calendar.pop_due(3), [(3, EventType.ARRIVAL, "b")])
+
+        # simultaneous events come out in insertion order
+        due = self.calendar.pop_due(5)
+        self.assertEqual([key for _, _, key in due], [("a", "task_1"), ("a", "task_2")])
+        self.assertEqual(len(self.calendar), 0)
+
+    def test_pop_due_leaves_future_events(self):
+        self.calendar.push(1, EventType.FINISH, "x")
+        self.calendar.push(10, EventType.FINISH, "y")
+
+        self.assertEqual(len(self.calendar.pop_due(5)), 1)
+        self.assertEqual(self.calendar.next_time(), 10)
+
+    def test_cancel(self):
+        self.calendar.push(1, EventType.FINISH, "x")
+        self.calendar.push(2, EventType.FINISH, "y")
+        self.calendar.cancel("x")
+        self.calendar.cancel("not scheduled")
+
+        self.assertEqual(len(self.calendar), 1)
+        self.assertEqual(self.calendar.next_time(), 2)
+
+    def test_push_replaces_pending_event(self):
+        # a preempted task that is rescheduled gets a new finish time
+        self.calendar.push(10, EventType.FINISH, "x")
+        self.calendar.push(20, EventType.FINISH, "x")
+
+        self.assertEqual(self.calendar.next_time(), 20)
+        self.assertEqual(self.calendar.pop_due(20), [(20, EventType.FINISH, "x")])
+
+
+if __name__ == "__main__":
+    unittest.main()
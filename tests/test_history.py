@@ -0,0 +1,276 @@
+import pickle
+import unittest
+from copy import deepcopy
+from src.history import (
+    CHECKPOINT_ENTRY_BYTES,
+    DELTA_ENTRY_BYTES,
+    EVENT_BYTES,
+    MESSAGE_BYTES,
+    METRICS_TASK_BYTES,
+    SchedulerHistory,
+    KeepAll,
+    RingBuffer,
+    Stride,
+    LogSpaced,
+)
+from src.read_graph import read_yaml
+from src.scheduling import FCFS, PreemptivePriorityScheduler
+from src.workload import build_workload
+
+import orjson
+
+
+def task_states(dags):
+    return {
+        (user, label): (task.status, task.start, task.end, task.runtime)
+        for user, dag in dags.items()
+        for label, task in dag.tasks.items()
+    }
+
+
+class RecordingHistory(SchedulerHistory):
+    """
+    Keeps a deepcopy of the state at every event to compare the history against
+    """
+
+    def __init__(self, checkpoint_interval, retention=None) -> None:
+        super().__init__(checkpoint_interval, retention)
+        self.reference = {}
+
+    def add_event(self, t, messages, dags, utilization, metrics, changed=None):
+        self.reference[t] = (
+            messages.formatted(),
+            task_states(dags),
+            deepcopy(utilization),
+            deepcopy(metrics),
+        )
+        super().add_event(t, messages, dags, utilization, metrics, changed)
+
+
+class HistoryTestCase(unittest.TestCase):
+    def run_scheduler(self, checkpoint_interval, retention=None):
+        data = read_yaml("data/simple_prio_dag.yml")
+        users = list(data["users"].keys())
+        scheduler = PreemptivePriorityScheduler(
+            data["cluster"],
+            data["users"],
+            users,
+            deserialize=False,
+            history=RecordingHistory(checkpoint_interval, retention),
+        )
+        scheduler.run()
+        return scheduler
+
+    def assert_matches_reference(self, scheduler):
+        history = scheduler.history
+        self.assertTrue(history.times <= set(history.reference))
+
+        for t in history.times:
+            messages, states, utilization, metrics = history.reference[t]
+            h_messages, h_dags, h_utilization = history.get_events_at_time_t(t)
+            h_metrics = history.get_metrics(t)
+
+            # messages from before the oldest kept event are dropped
+            self.assertEqual(h_messages, messages[history.messages_offset :])
+            self.assertEqual(task_states(h_dags), states)
+            self.assertEqual(h_utilization, utilization)
+            self.assertEqual(h_metrics.preemptions, metrics.preemptions)
+            self.assertEqual(h_metrics.job_completion_time, metrics.job_completion_time)
+            self.assertEqual(h_metrics.job_queue_time, metrics.job_queue_time)
+
+
+class TestSchedulerHistory(HistoryTestCase):
+    def test_replay_from_checkpoints(self):
+        for checkpoint_interval in (1, 3, 100):
+            scheduler = self.run_scheduler(checkpoint_interval)
+            self.assertGreater(len(scheduler.history.times), 3)
+            self.assert_matches_reference(scheduler)
+
+    def test_checkpoints(self):
+        scheduler = self.run_scheduler(3)
+        events = len(scheduler.history.event_times)
+        self.assertEqual(scheduler.history.checkpoint_seqs, list(range(0, events, 3)))
+
+    def test_only_changed_tasks_stored(self):
+        scheduler = self.run_scheduler(100)
+        deltas = scheduler.history.deltas
+        self.assertEqual(len(deltas[0]), 9)
+        # the last event only finishes a single task
+        self.assertEqual(len(deltas[-1]), 1)
+
+    def test_all_metrics(self):
+        scheduler = self.run_scheduler(2)
+        all_metrics = scheduler.history.get_all_metrics()
+        self.assertEqual(set(all_metrics.keys()), scheduler.history.times)
+        for t, metrics in all_metrics.items():
+            self.assertEqual(
+                metrics.job_completion_time,
+                scheduler.history.reference[t][3].job_completion_time,
+            )
+
+    def test_status_changes(self):
+        scheduler = self.run_scheduler(3, Stride(2))
+        history = scheduler.history
+        times = sorted(history.times)
+
+        def statuses(t):
+            _, dags, _ = history.get_events_at_time_t(t)
+            return {
+                task_id: task.status.name if task.status else None
+                for dag in dags.values()
+                for task_id, task in dag.tasks.items()
+            }
+
+        for since in times:
+            for t in times:
+                shown = statuses(since)
+                changes = history.get_status_changes(t, since)
+                for task_id, status in changes.items():
+                    self.assertNotEqual(shown[task_id], status)
+                shown.update(changes)
+                self.assertEqual(shown, statuses(t))
+
+        # every task when there is nothing to diff against
+        self.assertEqual(history.get_status_changes(times[-1]), statuses(times[-1]))
+        self.assertEqual(
+            history.get_status_changes(times[-1], since=12345), statuses(times[-1])
+        )
+
+    def test_rebuilt_events_cached(self):
+        scheduler = self.run_scheduler(3)
+        history = scheduler.history
+        history.rebuilt.size = 2
+        times = sorted(history.times)
+
+        first = scheduler.get_history(times[1])[1]
+        self.assertIs(scheduler.get_history(times[2])[1], history.rebuild(2)[0])
+        self.assertIs(scheduler.get_history(times[1])[1], first)
+        scheduler.get_history(times[3])
+        # the least recently read event was evicted
+        self.assertEqual(list(history.rebuilt), [1, 3])
+        self.assertIsNot(scheduler.get_history(times[2])[1], first)
+        self.assert_matches_reference(scheduler)
+
+        history.get_status_changes(times[3], times[1])
+        self.assertEqual(list(history.statuses), [3, 1])
+        restored = pickle.loads(pickle.dumps(history))
+        self.assertEqual(len(restored.rebuilt), 0)
+        self.assertEqual(len(restored.statuses), 0)
+        self.assertEqual(
+            task_states(restored.get_events_at_time_t(times[3])[1]),
+            task_states(history.get_events_at_time_t(times[3])[1]),
+        )
+
+    def test_unknown_time(self):
+        history = FCFS({"cpus": 1, "ram": 1}, {}, [], deserialize=False).history
+        self.assertRaises(KeyError, history.get_events_at_time_t, 5)
+        self.assertRaises(KeyError, history.get_metrics, 5)
+
+
+class TestRetention(HistoryTestCase):
+    def test_keep_all(self):
+        scheduler = self.run_scheduler(3, KeepAll())
+        history = scheduler.history
+        self.assertEqual(history.times, set(history.reference))
+        self.assertEqual(history.retention_report()["dropped_events"], 0)
+
+    def test_ring_buffer(self):
+        for checkpoint_interval in (1, 3, 100):
+            scheduler = self.run_scheduler(checkpoint_interval, RingBuffer(3))
+            history = scheduler.history
+            self.assertEqual(history.times, set(sorted(history.reference)[-3:]))
+            self.assert_matches_reference(scheduler)
+
+            report = history.retention_report()
+            self.assertEqual(report["mode"], "ring")
+            self.assertEqual(report["kept_events"], 3)
+            self.assertEqual(report["dropped_events"], len(history.reference) - 3)
+            self.assertGreater(report["dropped_bytes"], 0)
+
+    def test_stride(self):
+        for checkpoint_interval in (1, 4, 100):
+            scheduler = self.run_scheduler(checkpoint_interval, Stride(3))
+            history = scheduler.history
+            times = sorted(history.reference)
+            expected = set(times[::3]) | {times[-1]}
+            self.assertEqual(history.times, expected)
+            self.assert_matches_reference(scheduler)
+
+    def test_log_spaced(self):
+        policy = LogSpaced(2)
+        kept = [seq for seq in range(20) if policy.keep(seq)]
+        self.assertEqual(kept, [0, 1, 2, 4, 8, 16])
+
+        scheduler = self.run_scheduler(3, LogSpaced(2))
+        history = scheduler.history
+        times = sorted(history.reference)
+        expected = {times[i] for i in (0, 1, 2, 4, 8) if i < len(times)}
+        self.assertEqual(history.times, expected | {times[-1]})
+        self.assert_matches_reference(scheduler)
+
+    def test_memory_budget(self):
+        full = self.run_scheduler(3).history
+        budget = full.bytes // 2
+        scheduler = self.run_scheduler(3, KeepAll(memory_budget=budget))
+        history = scheduler.history
+
+        report = history.retention_report()
+        self.assertLessEqual(report["estimated_bytes"], budget)
+        self.assertGreater(report["dropped_events"], 0)
+        # the oldest events are dropped first
+        kept = sorted(history.times)
+        self.assertEqual(kept, sorted(history.reference)[-len(kept) :])
+        self.assert_matches_reference(scheduler)
+
+    def test_estimated_bytes(self):
+        data = build_workload(users=5, tasks=50, rate=0.05, seed=1)
+        users = list(data["users"].keys())
+        for retention in (Stride(4), LogSpaced(2), KeepAll(memory_budget=200000)):
+            history = SchedulerHistory(10, retention)
+            FCFS(
+                data["cluster"],
+                data["users"],
+                users,
+                deserialize=False,
+                history=history,
+            ).run()
+            self.assertGreater(history.dropped_events, 0)
+            entries = sum(map(len, history.deltas)) + len(history.base_states)
+            checkpoints = sum(map(len, history.checkpoints.values()))
+            self.assertEqual(
+                history.bytes,
+                EVENT_BYTES * len(history.seqs)
+                + DELTA_ENTRY_BYTES * entries
+                + (CHECKPOINT_ENTRY_BYTES + METRICS_TASK_BYTES) * checkpoints
+                + MESSAGE_BYTES * len(history.messages),
+            )
+            self.assertGreaterEqual(history.dropped_bytes, 0)
+
+    def test_invalid_policies(self):
+        self.assertRaises(ValueError, RingBuffer, 0)
+        self.assertRaises(ValueError, Stride, 0)
+        self.assertRaises(ValueError, LogSpaced, 1)
+
+
+class TestStatusChangesPayload(unittest.TestCase):
+    def test_payload_size(self):
+        data = build_workload(users=20, tasks=100, rate=0.05, seed=2)
+        users = list(data["users"].keys())
+        scheduler = FCFS(data["cluster"], data["users"], users, deserialize=False)
+        scheduler.run()
+        times = sorted(scheduler.history.times)[1:40]
+
+        def size(payload):
+            return sum(
+                len(orjson.dumps(payload(prev, t))) for prev, t in zip(times, times[1:])
+            )
+
+        def full(prev, t):
+            _, dags, _ = scheduler.get_history(t)
+            return {user: dag.to_dict() for user, dag in dags.items()}
+
+        self.assertLess(size(scheduler.get_status_changes) * 10, size(full))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import tempfile
+import time
+import unittest
+from src.jobs import JobPool, JobStatus
+from src.read_graph import read_yaml
+from src.result_store import ResultStore
+from src.scheduling import FCFS, PreemptivePriorityScheduler
+from src.workload import build_workload
+
+
+def wait(pool, job_id, statuses, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        progress = pool.progress(job_id)
+        if JobStatus(progress["status"]) in statuses:
+            return progress
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} still {progress['status']}")
+
+
+DONE = (JobStatus.FINISHED, JobStatus.CANCELLED, JobStatus.FAILED)
+
+
+class TestJobPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ResultStore(self.tmp.name)
+        self.pool = JobPool(self.store, workers=1)
+
+    def tearDown(self):
+        self.pool.shutdown()
+        self.tmp.cleanup()
+
+    def create(self, path="data/simple_prio_dag.yml"):
+        data = read_yaml(path)
+        return lambda: PreemptivePriorityScheduler(
+            data["cluster"], data["users"], list(data["users"]), deserialize=False
+        )
+
+    def create_large(self):
+        data = build_workload(users=300, tasks=100, rate=0.05, seed=4)
+        return lambda: FCFS(
+            data["cluster"], data["users"], list(data["users"]), deserialize=False
+        )
+
+    def test_run(self):
+        publish = self.pool.publish
+
+        def slow_publish(job, status=None):
+            time.sleep(0.05)
+            publish(job, status)
+
+        # a job seen done already has its final progress published for
+        # other processes
+        self.pool.publish = slow_publish
+        job_id = self.pool.submit(self.create(), "key", "session")
+        progress = wait(self.pool, job_id, DONE)
+        self.assertEqual(self.store.cache.get(f"job:{job_id}"), progress)
+
+        self.assertEqual(progress["status"], "finished")
+        self.assertEqual(progress["time"], 75)
+        self.assertEqual(progress["tasks_finished"], 9)
+        self.assertEqual(progress["tasks"], 9)
+        self.assertGreater(progress["events"], 0)
+        self.assertEqual(self.store.for_session("session").time, 75)
+
+        # forgotten once the worker is done with it
+        self.pool.get(job_id).future.result()
+        self.pool.forget(job_id)
+        self.assertIsNone(self.pool.get(job_id))
+        self.assertIsNone(self.pool.progress(job_id))
+
+    def test_partial_history_and_cancel(self):
+        job_id = self.pool.submit(self.create_large(), "key", "session")
+        deadline = time.monotonic() + 30
+        while self.pool.get(job_id).rounds == 0:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+        # history simulated so far can be read while the job runs
+        times = self.pool.read(job_id, lambda s: sorted(s.history.times))
+        self.assertGreater(len(times), 0)
+        messages, dags, utilization = self.pool.read(
+            job_id, lambda s: s.get_history(times[-1])
+        )
+        self.assertEqual(len(dags), 300)
+
+        self.assertTrue(self.pool.cancel(job_id))
+        progress = wait(self.pool, job_id, DONE)
+        self.assertEqual(progress["status"], "cancelled")
+        self.assertLess(progress["tasks_finished"], progress["tasks"])
+        self.assertFalse(self.pool.cancel(job_id))
+        # cancelled runs are not stored
+        self.assertIsNone(self.store.for_session("session"))
+        self.assertIsNotNone(self.pool.read(job_id, lambda s: s.time))
+
+    def test_queued_cancel(self):
+        running = self.pool.submit(self.create_large())
+        queued = self.pool.submit(self.create())
+        self.assertEqual(self.pool.progress(queued)["status"], "queued")
+        self.assertTrue(self.pool.cancel(queued))
+        self.pool.cancel(running)
+        self.assertEqual(wait(self.pool, queued, DONE)["status"], "cancelled")
+
+    def test_failure(self):
+        def create():
+            raise ValueError("bad spec")
+
+        job_id = self.pool.submit(create)
+        progress = wait(self.pool, job_id, DONE)
+        self.assertEqual(progress["status"], "failed")
+        self.assertEqual(progress["error"], "ValueError: bad spec")
+
+    def test_forget_running(self):
+        # e.g. replaced by another run of the session
+        job_id = self.pool.submit(self.create_large(), "key", "session")
+        self.pool.cancel(job_id)
+        self.pool.forget(job_id)
+        deadline = time.monotonic() + 30
+        while self.pool.get(job_id) is not None:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertIsNone(self.pool.progress(job_id))
+
+    def test_expire(self):
+        first = self.pool.submit(self.create())
+        self.pool.get(first).future.result()
+        self.pool.ttl = 0
+        second = self.pool.submit(self.create())
+        # done jobs never collected are dropped by later submits
+        self.assertIsNone(self.pool.get(first))
+        self.assertIsNotNone(self.pool.get(second))
+
+
+if __name__ == "__main__":
+    unittest.main()
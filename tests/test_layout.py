@@ -0,0 +1,100 @@
+import unittest
+from src.dag import DAG
+from src.layout import dependency_levels, layered_layout, layer_orders, topology_key
+from src.read_graph import read_yaml
+
+
+def chain(name, dependencies):
+    tasks = {
+        label: {
+            "label": label,
+            "duration": 1,
+            "cpus": 1,
+            "ram": 1,
+            "dependencies": parents,
+        }
+        for label, parents in dependencies.items()
+    }
+    return DAG({"name": name, "arrival_time": 0, "tasks": tasks})
+
+
+def crossings(dag, layers):
+    """
+    Crossings of the edges between neighbouring layers
+    """
+    position = {}
+    for layer in layers:
+        for i, index in enumerate(layer):
+            position[index] = i
+    edges = {}
+    for level, layer in enumerate(layers[1:], 1):
+        for index in layer:
+            for parent in dag.parents(index):
+                if parent in layers[level - 1]:
+                    edges.setdefault(level, []).append(
+                        (position[parent], position[index])
+                    )
+    count = 0
+    for between in edges.values():
+        for i, (a, b) in enumerate(between):
+            for c, d in between[i + 1 :]:
+                count += (a - c) * (b - d) < 0
+    return count
+
+
+class TestLayout(unittest.TestCase):
+    def test_levels(self):
+        data = read_yaml("data/simple_prio_dag.yml")
+        dag = DAG(data["users"]["test_user"])
+        levels = dict(zip(dag.ids, dependency_levels(dag)))
+        for task_id, level in levels.items():
+            parents = dag.parents(dag.index[task_id])
+            expected = max((levels[dag.ids[p]] + 1 for p in parents), default=0)
+            self.assertEqual(level, expected)
+
+    def test_longest_path_and_cycle(self):
+        dag = chain("chain", {"a": [], "b": ["a"], "c": ["a", "b"], "d": []})
+        self.assertEqual(dependency_levels(dag), [0, 1, 2, 0])
+        # tasks on a cycle come after every other task
+        dag = chain("cycle", {"a": [], "b": ["a", "c"], "c": ["b"]})
+        self.assertEqual(dependency_levels(dag), [0, 1, 1])
+        dag = chain("loop", {"a": ["b"], "b": ["a"]})
+        self.assertEqual(dependency_levels(dag), [0, 0])
+
+    def test_positions(self):
+        dag = chain("chain", {"a": [], "b": ["a"], "c": ["a", "b"], "d": []})
+        positions = layered_layout(dag)
+        self.assertEqual([x for x, _ in positions], [0, 120, 240, 0])
+        # levels are centered
+        self.assertEqual(positions[0][1], -positions[3][1])
+        self.assertEqual(positions[1][1], 0)
+
+        nodes = [node for node in dag.render_state() if "position" in node]
+        self.assertEqual(len(nodes), 4)
+        self.assertEqual(nodes[2]["position"], {"x": 240, "y": 0})
+
+    def test_crossing_reduction(self):
+        # children listed in the opposite order of their parents
+        dependencies = {f"p{i}": [] for i in range(5)}
+        dependencies.update({f"c{i}": [f"p{4 - i}"] for i in range(5)})
+        dag = chain("crossed", dependencies)
+        levels = dependency_levels(dag)
+        self.assertEqual(crossings(dag, layer_orders(dag, levels, sweeps=0)), 10)
+        self.assertEqual(crossings(dag, layer_orders(dag, levels)), 0)
+
+    def test_cached_by_topology(self):
+        data = read_yaml("data/simple_prio_dag.yml")
+        dag = DAG(data["users"]["test_user"])
+        positions = layered_layout(dag)
+        # the same topology with other statuses
+        copy = DAG(dag.to_dict(), deserialize=True)
+        copy.status[0] = 4
+        self.assertEqual(topology_key(copy), topology_key(dag))
+        self.assertIs(layered_layout(copy), positions)
+
+        other = chain("chain", {"a": [], "b": ["a"]})
+        self.assertNotEqual(topology_key(other), topology_key(dag))
+
+
+if __name__ == "__main__":
+    unittest.main()
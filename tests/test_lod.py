@@ -0,0 +1,73 @@
+import unittest
+from src.dag import DAG
+from src.lod import build_lod, group_elements, level_groups
+
+
+def chain(name, dependencies):
+    tasks = {
+        label: {
+            "label": label,
+            "duration": 1,
+            "cpus": 1,
+            "ram": 1,
+            "dependencies": parents,
+        }
+        for label, parents in dependencies.items()
+    }
+    return DAG({"name": name, "arrival_time": 0, "tasks": tasks})
+
+
+class TestLOD(unittest.TestCase):
+    def test_groups(self):
+        dependencies = {f"t{i}": [] for i in range(25)}
+        dependencies["last"] = list(dependencies)
+        dag = chain("wide", dependencies)
+        lod = build_lod({"user": dag}, max_elements=10, group_size=10)
+        self.assertEqual(lod["max_elements"], 10)
+        user = lod["users"]["user"]
+        self.assertEqual(user["name"], "wide")
+        self.assertEqual(
+            [(group["levels"], len(group["tasks"])) for group in user["groups"]],
+            [([0, 0], 10), ([0, 0], 10), ([0, 1], 6)],
+        )
+        # small levels share groups
+        groups = level_groups([0, 1, 2, 2, 3, 4], list("abcdef"), group_size=3)
+        self.assertEqual(
+            groups,
+            [
+                {"levels": [0, 1], "tasks": ["a", "b"]},
+                {"levels": [2, 3], "tasks": ["c", "d", "e"]},
+                {"levels": [4, 4], "tasks": ["f"]},
+            ],
+        )
+        tasks = [task for group in user["groups"] for task in group["tasks"]]
+        self.assertEqual(sorted(tasks), sorted(dag.ids))
+
+    def test_aggregate_elements(self):
+        dag = chain("diamond", {"a": [], "b": ["a"], "c": ["a"], "d": ["b", "c"]})
+        user = build_lod({"user": dag}, group_size=2)["users"]["user"]
+        groups = user["groups"]
+        self.assertEqual(
+            [group["tasks"] for group in groups],
+            [dag.ids[:1], dag.ids[1:3], dag.ids[3:]],
+        )
+        self.assertEqual(user["edges"], [(0, 1), (1, 2)])
+        nodes = {node["data"]["id"]: node for node in dag.nodes}
+        ys = [nodes[task]["position"]["y"] for task in dag.ids]
+        self.assertEqual(user["extent"], [min(ys), max(ys)])
+        self.assertEqual(groups[1]["position"]["y"], sum(ys[1:3]) / 2)
+
+        # tasks and edges from or to them, as fetched when expanded
+        elements = group_elements(dag.to_dict(), groups[1]["tasks"])
+        self.assertEqual(
+            [node["data"]["id"] for node in elements["nodes"]], groups[1]["tasks"]
+        )
+        self.assertEqual(len(elements["edges"]), 4)
+        self.assertEqual(
+            [group["elements"] for group in groups],
+            [1 + 2, 2 + 4, 1 + 2],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import pickle
+import unittest
+from src.lru import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        # b was the least recently used
+        self.assertEqual(list(cache), ["a", "c"])
+        self.assertNotIn("b", cache)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("b", 0), 0)
+
+        cache.put("a", 4)
+        self.assertEqual(list(cache), ["c", "a"])
+        self.assertEqual(cache.pop("c"), 3)
+        self.assertEqual(len(cache), 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_pickle(self):
+        cache = LRUCache(3)
+        cache.put("a", 1)
+        restored = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(restored.size, 3)
+        self.assertEqual(restored.get("a"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
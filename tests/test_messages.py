@@ -0,0 +1,86 @@
+import logging
+import unittest
+from src.messages import MessageKind, MessageLog, format_message
+from src.read_graph import read_yaml
+from src.scheduling import FCFS, PreemptivePriorityScheduler
+
+
+class TestMessageLog(unittest.TestCase):
+    def test_format(self):
+        log = MessageLog()
+        log.add(3, MessageKind.SCHEDULED, "user_1", "task_2", 5, 1)
+        log.add(4, MessageKind.FINISHED, "user_1", "task_2")
+        log.add(4, MessageKind.PREEMPTED, "user_1", "Task 1,task_1", 3)
+        log.add(4, MessageKind.READY, "user_1", "Task 3,task_3", 7)
+        log.add(4, MessageKind.READY_PRIORITY, "user_1", "Task 3,task_3", 2, 7)
+        log.append("free form")
+        self.assertEqual(
+            log.formatted(),
+            [
+                "Scheduled user_1 task task_2 with 5 cpus and 1 ram",
+                "Finished user: user_1 task: task_2 at time=4",
+                "Pre-empting user user_1 task Task 1,task_1 with priority: 3",
+                "Added user_1 task Task 3,task_3 to ready queue with duration 7",
+                "Added user_1 task Task 3,task_3 to ready queue with priority 2 "
+                "and duration 7",
+                "free form",
+            ],
+        )
+        self.assertEqual(len(log), 6)
+        self.assertEqual(format_message(log[0]), log.formatted(0, 1)[0])
+
+    def test_level(self):
+        log = MessageLog(logging.INFO)
+        log.add(0, MessageKind.READY, "user_1", "task_1", 7)
+        log.add(0, MessageKind.SCHEDULED, "user_1", "task_1", 1, 1)
+        self.assertEqual([record[1] for record in log], [MessageKind.SCHEDULED])
+
+        log = MessageLog(None)
+        log.add(0, MessageKind.SCHEDULED, "user_1", "task_1", 1, 1)
+        log.append("free form")
+        self.assertEqual(len(log), 0)
+
+    def test_forwarded_to_logger(self):
+        log = MessageLog(None)
+        with self.assertLogs("scheduler", logging.INFO) as logs:
+            log.add(0, MessageKind.READY, "user_1", "task_1", 7)
+            log.add(0, MessageKind.FINISHED, "user_1", "task_1")
+        self.assertEqual(
+            logs.output, ["INFO:scheduler:Finished user: user_1 task: task_1 at time=0"]
+        )
+
+
+class TestSchedulerMessages(unittest.TestCase):
+    def run_scheduler(self, scheduler_class, **kwargs):
+        data = read_yaml("data/simple_prio_dag.yml")
+        users = list(data["users"].keys())
+        scheduler = scheduler_class(
+            data["cluster"], data["users"], users, deserialize=False, **kwargs
+        )
+        scheduler.run()
+        return scheduler
+
+    def test_levels(self):
+        for scheduler_class in (FCFS, PreemptivePriorityScheduler):
+            debug = self.run_scheduler(scheduler_class)
+            info = self.run_scheduler(scheduler_class, message_level=logging.INFO)
+            off = self.run_scheduler(scheduler_class, message_level=None)
+
+            self.assertEqual(debug.time, info.time)
+            self.assertEqual(debug.time, off.time)
+            self.assertEqual(len(off.messages), 0)
+            self.assertEqual(
+                info.messages.formatted(),
+                [
+                    message
+                    for message in debug.messages.formatted()
+                    if not message.startswith("Added")
+                ],
+            )
+
+    def test_preemption_message(self):
+        scheduler = self.run_scheduler(PreemptivePriorityScheduler)
+        # the scheduler imports messages as a top level module
+        kinds = [record[1].name for record in scheduler.messages]
+        self.assertIn("PREEMPTED", kinds)
+        self.assertIn("READY_PRIORITY", kinds)
@@ -1,6 +1,8 @@
+import math
 import unittest
 from src.read_graph import read_yaml
-from src.scheduling import FCFS
+from src.scheduling import FCFS, PreemptivePriorityScheduler
+from src.workload import build_workload
 
 
 class TestSchedulingMetrics(unittest.TestCase):
@@ -40,3 +42,182 @@ class TestSchedulingMetrics(unittest.TestCase):
 
         ms = self.metrics.get_local_queuing_time("test_user")
         self.assertGreaterEqual(ms, 0)
+
+
+class TestRunningAggregates(unittest.TestCase):
+    def run_scheduler(self, path):
+        data = read_yaml(path)
+        users = list(data["users"].keys())
+        scheduler = PreemptivePriorityScheduler(
+            data["cluster"], data["users"], users, deserialize=False
+        )
+        scheduler.run()
+        return scheduler
+
+    def assert_matches_tasks(self, metrics):
+        def same(a, b):
+            if isinstance(a, float) and math.isnan(a):
+                self.assertTrue(math.isnan(b))
+            else:
+                self.assertEqual(a, b)
+
+        same(metrics.get_mean_jct(), metrics.get_jct())
+        same(metrics.get_mean_queuing_time(), metrics.get_queuing_time())
+        for user in metrics.arrivals:
+            same(metrics.get_local_mean_jct(user), metrics.get_local_jct(user))
+            same(metrics.get_local_total_jct(user), metrics.get_local_jct(user, sum))
+            self.assertEqual(
+                metrics.get_local_mean_queuing_time(user),
+                metrics.get_local_queuing_time(user),
+            )
+            self.assertEqual(
+                metrics.get_local_total_queuing_time(user),
+                metrics.get_local_queuing_time(user, sum),
+            )
+            self.assertEqual(
+                metrics.get_local_preemptions(user),
+                sum(metrics.preemptions[user].values()),
+            )
+            ends = [t["end"] for t in metrics.job_completion_time[user].values()]
+            self.assertEqual(
+                metrics.get_local_makespan(user), max(ends) - metrics.arrivals[user]
+            )
+        self.assertEqual(
+            metrics.get_total_preemptions(),
+            sum(sum(tasks.values()) for tasks in metrics.preemptions.values()),
+        )
+
+    def test_final_metrics(self):
+        for path in ("data/simple_dag.yml", "data/simple_prio_dag.yml"):
+            metrics = self.run_scheduler(path).metrics
+            self.assert_matches_tasks(metrics)
+            self.assertEqual(
+                metrics.get_max_finish_time(),
+                max(
+                    t["end"]
+                    for tasks in metrics.job_completion_time.values()
+                    for t in tasks.values()
+                ),
+            )
+        self.assertEqual(metrics.get_total_preemptions(), 1)
+
+    def test_history_metrics(self):
+        # history metrics are rebuilt with set_task_state, including
+        # unfinished tasks (nan jct, inf makespan)
+        scheduler = self.run_scheduler("data/simple_prio_dag.yml")
+        for t, metrics in scheduler.history.get_all_metrics().items():
+            self.assert_matches_tasks(metrics)
+            self.assert_matches_tasks(scheduler.history.get_metrics(t))
+
+    def test_reset_task(self):
+        metrics = self.run_scheduler("data/simple_prio_dag.yml").metrics
+        end = metrics.get_max_finish_time()
+        user, task_id = next(
+            (user, task_id)
+            for user, tasks in metrics.job_completion_time.items()
+            for task_id, times in tasks.items()
+            if times["end"] == end
+        )
+        preemptions, _, queue_time = metrics.get_task_state(user, task_id)
+        metrics.set_task_state(
+            user, task_id, (preemptions, {"start": end, "end": end + 10}, queue_time)
+        )
+        self.assertEqual(metrics.get_max_finish_time(), end + 10)
+
+        inf = float("inf")
+        metrics.set_task_state(
+            user, task_id, (preemptions, {"start": inf, "end": inf}, queue_time)
+        )
+        self.assertLess(metrics.get_max_finish_time(), end + 10)
+        self.assertEqual(metrics.get_local_makespan(user), inf)
+        self.assertTrue(math.isnan(metrics.get_local_mean_jct(user)))
+        self.assert_matches_tasks(metrics)
+
+    def test_copy(self):
+        metrics = self.run_scheduler("data/simple_prio_dag.yml").metrics
+        copied = metrics.copy()
+        user = next(iter(metrics.arrivals))
+        task_id = next(iter(metrics.preemptions[user]))
+        copied.set_task_state(user, task_id, (5, {"start": 0, "end": 1000}, 7))
+
+        self.assertNotEqual(copied.get_jct(), metrics.get_jct())
+        self.assertEqual(copied.get_max_finish_time(), 1000)
+        self.assert_matches_tasks(metrics)
+        self.assert_matches_tasks(copied)
+
+
+class TestQuantiles(unittest.TestCase):
+    def run_scheduler(self, path="data/simple_prio_dag.yml"):
+        data = read_yaml(path)
+        users = list(data["users"].keys())
+        scheduler = PreemptivePriorityScheduler(
+            data["cluster"], data["users"], users, deserialize=False
+        )
+        scheduler.run()
+        return scheduler
+
+    def task_values(self, scheduler, user=None):
+        metrics = scheduler.metrics
+        values = {"jct": [], "queue_time": [], "slowdown": []}
+        for u, dag in scheduler.dags.items():
+            if user is not None and u != user:
+                continue
+            for task_id, times in metrics.job_completion_time[u].items():
+                queue_time = metrics.job_queue_time[u][task_id]
+                duration = dag.tasks[task_id].duration
+                values["jct"].append(times["end"] - times["start"])
+                values["queue_time"].append(queue_time)
+                values["slowdown"].append((queue_time + duration) / duration)
+        return values
+
+    def assert_exact(self, scheduler):
+        # few tasks, the sketches hold every value
+        metrics = scheduler.metrics
+        for metric, values in self.task_values(scheduler).items():
+            self.assertEqual(metrics.get_quantile(metric, 0), min(values))
+            self.assertEqual(metrics.get_quantile(metric, 1), max(values))
+        for user in scheduler.dags:
+            for metric, values in self.task_values(scheduler, user).items():
+                self.assertEqual(
+                    metrics.get_local_quantile(user, metric, 1), max(values)
+                )
+        makespans = metrics.get_makespan(list)
+        self.assertEqual(metrics.get_quantile("makespan", 1), max(makespans))
+        self.assertEqual(len(metrics.get_sketch("makespan")), len(makespans))
+
+    def test_percentiles(self):
+        scheduler = self.run_scheduler()
+        self.assert_exact(scheduler)
+
+        percentiles = scheduler.metrics.get_percentiles()
+        self.assertEqual(
+            set(percentiles), {"jct", "queue_time", "slowdown", "makespan"}
+        )
+        self.assertEqual(percentiles["makespan"]["p99"], 75)
+        self.assertNotIn("makespan", scheduler.metrics.get_percentiles("test_user"))
+
+    def test_history_metrics(self):
+        scheduler = self.run_scheduler()
+        metrics = scheduler.history.get_metrics(scheduler.time)
+        self.assertEqual(metrics.get_percentiles(), scheduler.metrics.get_percentiles())
+
+    def test_reset_task(self):
+        scheduler = self.run_scheduler()
+        metrics = scheduler.metrics
+        user = "test_user"
+        task_id = next(iter(metrics.job_completion_time[user]))
+        preemptions, _, queue_time = metrics.get_task_state(user, task_id)
+        metrics.set_task_state(
+            user, task_id, (preemptions, {"start": 0, "end": 1000}, queue_time)
+        )
+        self.assert_exact(scheduler)
+        self.assertEqual(metrics.get_quantile("jct", 1), 1000)
+
+    def test_bounded(self):
+        data = build_workload(users=20, tasks=500, rate=0.05, seed=2)
+        users = list(data["users"].keys())
+        scheduler = FCFS(data["cluster"], data["users"], users, deserialize=False)
+        scheduler.run()
+        sketch = scheduler.metrics.get_sketch("jct")
+        self.assertEqual(len(sketch), 10_000)
+        self.assertLess(sketch.size, 1_000)
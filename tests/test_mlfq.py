@@ -1,3 +1,4 @@
+import random
 import unittest
 from src.mlfq import MultiLevelFeedbackQueue
 
@@ -45,3 +46,56 @@ class TestMLFQ(unittest.TestCase):
         self.mlfq.get()
 
         self.assertEqual(self.mlfq.size, 0)
+
+    def test_len(self):
+        mlfq = MultiLevelFeedbackQueue()
+        self.assertEqual(len(mlfq), 0)
+        mlfq.put("abc", 1)
+        mlfq.put("bcd", 1)
+        self.assertEqual(len(mlfq), 2)
+        mlfq.get()
+        self.assertEqual(len(mlfq), 1)
+
+    def test_fifo_within_level(self):
+        mlfq = MultiLevelFeedbackQueue()
+        for i in range(5):
+            mlfq.put(i, 3)
+            mlfq.put(-i, 1)
+        mlfq.put("top", 7)
+
+        items = [mlfq.get() for _ in range(len(mlfq))]
+        self.assertEqual(items, ["top", 0, 1, 2, 3, 4, 0, -1, -2, -3, -4])
+
+    def test_put_many(self):
+        mlfq = MultiLevelFeedbackQueue()
+        mlfq.put("a", 2)
+        mlfq.put_many([("b", 5), ("c", 2), ("d", 5), ("e", 0.5)])
+
+        self.assertEqual(len(mlfq), 5)
+        self.assertEqual([mlfq.get() for _ in range(5)], ["b", "d", "a", "c", "e"])
+
+    def test_emptied_level_reused(self):
+        # emptied levels stay in the heap until they reach its top
+        mlfq = MultiLevelFeedbackQueue()
+        mlfq.put("a", 1)
+        mlfq.put("b", 2)
+        self.assertEqual(mlfq.get(), "b")
+        mlfq.put("c", 2)
+        mlfq.put("d", 3)
+        self.assertEqual([mlfq.get() for _ in range(3)], ["d", "c", "a"])
+        self.assertRaises(ValueError, mlfq.peek)
+
+        mlfq.put("e", 2)
+        self.assertEqual(mlfq.peek(), "e")
+        self.assertLessEqual(len(mlfq.heap), 3)
+
+
+class TestPutMany(unittest.TestCase):
+    def test_put_many(self):
+        rng = random.Random(1)
+        items = [(i, rng.randrange(2000)) for i in range(20000)]
+
+        mlfq = MultiLevelFeedbackQueue()
+        mlfq.put_many(items)
+        self.assertEqual(len(mlfq), len(items))
+        self.assertEqual(len(mlfq.heap), len(mlfq.levels))
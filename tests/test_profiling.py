@@ -0,0 +1,92 @@
+import unittest
+from src.read_graph import read_yaml
+from src.scheduling import FCFS, PreemptivePriorityScheduler
+from src.profiling import PHASES
+
+
+class TestProfiling(unittest.TestCase):
+    def run_scheduler(self, scheduler_class, path, **kwargs):
+        data = read_yaml(path)
+        users = list(data["users"].keys())
+        scheduler = scheduler_class(
+            data["cluster"], data["users"], users, deserialize=False, **kwargs
+        )
+        scheduler.run()
+        return scheduler
+
+    def test_off_by_default(self):
+        scheduler = self.run_scheduler(FCFS, "data/simple_dag.yml")
+        self.assertIsNone(scheduler.profile())
+        # no wrappers on the instance
+        for phase in PHASES + ("schedule_task", "perform_scheduling_round"):
+            self.assertNotIn(phase, vars(scheduler))
+
+    def test_report(self):
+        scheduler = self.run_scheduler(FCFS, "data/simple_dag.yml", profile=True)
+        self.assertEqual(scheduler.time, 16)
+        profile = scheduler.profile()
+
+        rounds = profile["rounds"]
+        self.assertGreater(rounds, 0)
+        for phase in PHASES:
+            self.assertGreater(profile["phases"][phase]["time"], 0)
+        self.assertEqual(profile["phases"]["schedule_tasks"]["calls"], rounds)
+        # initial history event is stored before the first round
+        self.assertEqual(profile["phases"]["store_history"]["calls"], rounds + 1)
+
+        latency = profile["round_latency"]
+        self.assertLessEqual(latency["min"], latency["mean"])
+        self.assertLessEqual(latency["mean"], latency["max"])
+        self.assertEqual(sum(b["count"] for b in latency["histogram"]), rounds)
+        self.assertGreater(latency["histogram"][-1]["upper"], latency["max"])
+        self.assertLessEqual(profile["total_time"], latency["max"] * rounds)
+
+        self.assertEqual(profile["tasks"]["scheduled"], 9)
+        self.assertGreaterEqual(profile["tasks"]["examined"], 9)
+        self.assertEqual(profile["queues"]["running"]["max"], 4)
+
+    def test_preemption_counts(self):
+        scheduler = self.run_scheduler(
+            PreemptivePriorityScheduler, "data/simple_prio_dag.yml", profile=True
+        )
+        self.assertEqual(scheduler.time, 75)
+        profile = scheduler.profile()
+        # the preempted task is scheduled twice
+        self.assertEqual(profile["tasks"]["scheduled"], 10)
+        self.assertGreater(profile["tasks"]["examined"], 10)
+        self.assertGreater(profile["queues"]["ready"]["max"], 0)
+
+    def test_preemption_retry_not_examined(self):
+        data = read_yaml("data/simple_prio_dag.yml")
+        scheduler = PreemptivePriorityScheduler(
+            data["cluster"], data["users"], list(data["users"]), deserialize=False
+        )
+        # every schedule_task call, and the ones after preempting
+        calls = {"schedule_task": 0, "preempted": 0}
+        schedule_task = scheduler.schedule_task
+        with_preemption = scheduler.schedule_task_with_preemption
+
+        def count_schedule_task(*args):
+            calls["schedule_task"] += 1
+            return schedule_task(*args)
+
+        def count_preempted(*args):
+            scheduled = with_preemption(*args)
+            calls["preempted"] += scheduled
+            return scheduled
+
+        scheduler.schedule_task = count_schedule_task
+        scheduler.schedule_task_with_preemption = count_preempted
+        scheduler.run()
+        self.assertGreater(calls["preempted"], 0)
+
+        profile = self.run_scheduler(
+            PreemptivePriorityScheduler, "data/simple_prio_dag.yml", profile=True
+        ).profile()
+        self.assertEqual(
+            profile["tasks"]["examined"], calls["schedule_task"] - calls["preempted"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
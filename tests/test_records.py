@@ -0,0 +1,118 @@
+import math
+import unittest
+from src.read_graph import read_yaml
+from src.records import TaskRecords, summarize, user_metrics
+from src.scheduling import FCFS, PreemptivePriorityScheduler
+from src.workload import build_workload
+
+
+class TestTaskRecords(unittest.TestCase):
+    def run_scheduler(self, scheduler_class=PreemptivePriorityScheduler):
+        data = read_yaml("data/simple_prio_dag.yml")
+        users = list(data["users"].keys())
+        scheduler = scheduler_class(
+            data["cluster"], data["users"], users, deserialize=False
+        )
+        scheduler.run()
+        return scheduler
+
+    def assert_matches_metrics(self, scheduler, columns):
+        metrics = scheduler.metrics
+        for i, user in enumerate(columns["user"]):
+            self.assertEqual(columns["tasks"][i], len(scheduler.dags[user].tasks))
+            self.assertEqual(
+                columns["preemptions"][i], metrics.get_local_preemptions(user)
+            )
+            self.assertAlmostEqual(
+                columns["avg_jct"][i], metrics.get_local_mean_jct(user)
+            )
+            self.assertEqual(
+                columns["queue_time"][i], metrics.get_local_total_queuing_time(user)
+            )
+            self.assertEqual(columns["makespan"][i], metrics.get_local_makespan(user))
+
+    def test_records(self):
+        scheduler = self.run_scheduler()
+        records = scheduler.metrics.records
+        self.assertEqual(len(records), 9)
+
+        rows = {(row["user"], row["task"]): row for row in records.rows(scheduler.dags)}
+        row = rows[("test_user", "Test User 1,task_1")]
+        # preempted once: ready at 0, waits 25 and runs 50
+        self.assertEqual((row["ready"], row["start"], row["end"]), (0, 0, 75))
+        self.assertEqual((row["preemptions"], row["queue_time"]), (1, 25))
+        for row in rows.values():
+            self.assertEqual(
+                row["end"] - row["ready"], row["queue_time"] + row["duration"]
+            )
+
+    def test_user_metrics(self):
+        scheduler = self.run_scheduler()
+        records = scheduler.metrics.records
+        self.assert_matches_metrics(scheduler, user_metrics(records))
+
+        summary = summarize(records)
+        metrics = scheduler.metrics
+        self.assertAlmostEqual(summary["avg_jct"], metrics.get_mean_jct())
+        self.assertAlmostEqual(
+            summary["avg_queue_time"], metrics.get_mean_queuing_time()
+        )
+        self.assertAlmostEqual(summary["avg_makespan"], metrics.get_makespan())
+        self.assertEqual(summary["max_makespan"], metrics.get_makespan(max))
+        self.assertEqual(summary["preemptions"], 1)
+
+    def test_unfinished(self):
+        data = read_yaml("data/simple_dag.yml")
+        scheduler = FCFS(
+            data["cluster"], data["users"], list(data["users"]), deserialize=False
+        )
+        columns = user_metrics(TaskRecords(scheduler.dags))
+        self.assertEqual(list(columns["tasks"]), [0, 0])
+        self.assertTrue(all(math.isnan(value) for value in columns["avg_jct"]))
+        self.assertEqual(list(columns["makespan"]), [math.inf, math.inf])
+
+    def test_float_times(self):
+        data = read_yaml("data/simple_dag.yml")
+        scheduler = FCFS(
+            data["cluster"], data["users"], list(data["users"]), deserialize=False
+        )
+        records = TaskRecords(scheduler.dags)
+        user = next(iter(scheduler.dags))
+        task = scheduler.dags[user].task(0)
+        task.start = 0
+        records.add(user, task, 10, 0, 0)
+        records.add(user, task, 12.5, 0, 0)
+        self.assertEqual(records.end.typecode, "d")
+        self.assertEqual(list(records.end), [10.0, 12.5])
+
+    def test_preempting_workload(self):
+        data = build_workload(
+            users=8, tasks=60, rate=0.05, cpus="uniform:1,8", priority="uniform:0,5"
+        )
+        scheduler = PreemptivePriorityScheduler(
+            data["cluster"], data["users"], list(data["users"]), deserialize=False
+        )
+        scheduler.run()
+        records = scheduler.metrics.records
+        columns = user_metrics(records)
+        self.assertGreater(columns["preemptions"].sum(), 0)
+        self.assert_matches_metrics(scheduler, columns)
+        # sums are not floats from bincount
+        self.assertEqual(columns["preemptions"].dtype.kind, "i")
+        self.assertEqual(columns["queue_time"].dtype.kind, "i")
+        self.assertEqual(
+            summarize(records)["preemptions"],
+            sum(map(scheduler.metrics.get_local_preemptions, scheduler.dags)),
+        )
+
+    def test_to_numpy(self):
+        records = self.run_scheduler().metrics.records
+        columns = records.to_numpy()
+        self.assertEqual(len(columns["end"]), 9)
+        # no copy
+        columns["end"][0] += 1
+        self.assertEqual(records.end[0], columns["end"][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
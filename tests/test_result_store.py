@@ -0,0 +1,121 @@
+import os
+import pickle
+import stat
+import tempfile
+import unittest
+from src.read_graph import read_yaml
+from src.result_store import MemoryCache, ResultStore, private_directory, result_key
+from src.scheduling import SCHEDULERS
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.data = read_yaml("data/simple_prio_dag.yml")
+        self.runs = 0
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "results")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def create(self, scheduler_type="FCFS"):
+        def create():
+            self.runs += 1
+            scheduler = SCHEDULERS[scheduler_type](
+                self.data["cluster"],
+                self.data["users"],
+                list(self.data["users"]),
+                deserialize=False,
+            )
+            scheduler.run()
+            return scheduler
+
+        return create
+
+    def test_result_key(self):
+        cluster = {"cpus": 20, "ram": 100}
+        key = result_key({"a": 1, "b": 2}, "FCFS", cluster)
+        self.assertEqual(key, result_key({"b": 2, "a": 1}, "FCFS", dict(cluster)))
+        self.assertNotEqual(key, result_key({"a": 1, "b": 2}, "SJF", cluster))
+        self.assertNotEqual(
+            key, result_key({"a": 1, "b": 2}, "FCFS", {"cpus": 40, "ram": 100})
+        )
+
+    def test_sessions_share_results(self):
+        store = ResultStore(self.directory)
+        first = store.run("session-1", "key", self.create())
+        second = store.run("session-2", "key", self.create())
+        self.assertEqual(self.runs, 1)
+        self.assertIs(first, second)
+
+        store.run("session-2", "other", self.create("PREPRIO"))
+        self.assertEqual(self.runs, 2)
+        self.assertEqual(store.for_session("session-1").time, first.time)
+        self.assertEqual(
+            store.for_session("session-2").metrics.get_total_preemptions(), 1
+        )
+        self.assertIsNone(store.for_session("session-3"))
+        self.assertIsNone(store.for_session(None))
+        self.assertEqual(store.session_key("session-2"), "other")
+        self.assertIsNone(store.session_key("session-3"))
+
+    def test_shared_directory(self):
+        # e.g. two server workers, or a restarted one, using the same directories
+        cache = MemoryCache()
+        store = ResultStore(self.directory, cache)
+        scheduler = store.run("session", "key", self.create())
+
+        other = ResultStore(self.directory, cache)
+        self.assertIn("key", other)
+        loaded = other.for_session("session")
+        self.assertIsNot(loaded, scheduler)
+        self.assertEqual(loaded.time, scheduler.time)
+        self.assertEqual(
+            loaded.get_history(loaded.time)[2], scheduler.get_history(scheduler.time)[2]
+        )
+
+    def test_lru_eviction(self):
+        size = len(pickle.dumps(self.create()(), protocol=pickle.HIGHEST_PROTOCOL))
+        store = ResultStore(self.directory, budget=int(size * 2.5), hot=0)
+        other = ResultStore(self.directory, budget=int(size * 2.5), hot=0)
+        store.put("a", self.create()())
+        other.put("b", self.create()())
+        self.assertEqual(store.bytes, 2 * size)
+        # a is now more recent than b
+        self.assertIsNotNone(other.get("a"))
+        store.put("c", self.create()())
+
+        # evicted by the size of every worker's results
+        self.assertNotIn("b", store)
+        self.assertIn("a", store)
+        self.assertIn("c", store)
+        self.assertLessEqual(store.bytes, store.budget)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_over_budget(self):
+        store = ResultStore(self.directory, budget=10)
+        scheduler = self.create()()
+        store.put("key", scheduler)
+        self.assertEqual(store.bytes, 0)
+        self.assertEqual(os.listdir(self.directory), [])
+        # still served from memory by this process
+        self.assertIs(store.get("key"), scheduler)
+
+    def test_private_directory(self):
+        ResultStore(self.directory)
+        self.assertEqual(stat.S_IMODE(os.stat(self.directory).st_mode), 0o700)
+
+        os.chmod(self.directory, 0o777)
+        private_directory(self.directory)
+        self.assertEqual(stat.S_IMODE(os.stat(self.directory).st_mode), 0o700)
+
+        path = os.path.join(self.tmp.name, "file")
+        open(path, "w").close()
+        self.assertRaises(OSError, private_directory, path)
+        link = os.path.join(self.tmp.name, "link")
+        os.symlink(self.directory, link)
+        self.assertRaises(PermissionError, private_directory, link)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+from src.running import RunningIndex
+
+
+class TestRunningIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = RunningIndex()
+        self.index.add("b", priority=2, start=0, cpus=2, ram=1)
+        self.index.add("a", priority=1, start=5, cpus=1, ram=4)
+        self.index.add("c", priority=1, start=3, cpus=3, ram=1)
+        self.index.add("d", priority=9, start=0, cpus=10, ram=10)
+
+    def test_order(self):
+        self.assertEqual(list(self.index), ["c", "a", "b", "d"])
+        self.assertEqual(len(self.index), 4)
+        self.assertIn("a", self.index)
+
+    def test_shortest_feasible_prefix(self):
+        self.assertEqual(self.index.victims(5, 3, 1), ["c"])
+        # ram only adds up after "a"
+        self.assertEqual(self.index.victims(5, 1, 5), ["c", "a"])
+        self.assertEqual(self.index.victims(5, 6, 6), ["c", "a", "b"])
+        self.assertEqual(self.index.victims(5, 0, 0), [])
+
+    def test_only_lower_priority_victims(self):
+        self.assertIsNone(self.index.victims(2, 5, 1))
+        self.assertEqual(self.index.victims(2, 4, 1), ["c", "a"])
+        self.assertIsNone(self.index.victims(1, 1, 1))
+        self.assertIsNone(self.index.victims(5, 7, 1))
+
+    def test_remove(self):
+        self.index.victims(10, 1, 1)
+        self.index.remove("c")
+        self.assertEqual(self.index.victims(5, 3, 1), ["a", "b"])
+        self.index.add("e", priority=0, start=0, cpus=5, ram=0)
+        self.assertEqual(self.index.victims(5, 5, 1), ["e", "a"])
+        self.assertRaises(KeyError, self.index.remove, "c")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -67,6 +67,35 @@ class TestFCFS(unittest.TestCase):
         scheduler.run()
         self.assertEqual(scheduler.time, 16)
 
+    def test_dependency_declared_after_dependent(self):
+        dags = {
+            "user": {
+                "name": "user",
+                "arrival_time": 2,
+                "tasks": {
+                    "task_2": {
+                        "label": "Task 2",
+                        "duration": 3,
+                        "dependencies": ["task_1"],
+                    },
+                    "task_1": {"label": "Task 1", "duration": 5},
+                },
+            }
+        }
+        scheduler = FCFS({"cpus": 10, "ram": 10}, dags, ["user"], deserialize=False)
+
+        # nothing is ready before the DAG arrives
+        self.assertFalse(scheduler.perform_scheduling_round())
+        self.assertEqual(len(scheduler.running), 0)
+        self.assertEqual(scheduler.time, 2)
+
+        self.assertFalse(scheduler.perform_scheduling_round())
+        self.assertEqual(list(scheduler.running), [("user", "user,task_1")])
+
+        scheduler.run()
+        task = scheduler.dags["user"].tasks["user,task_2"]
+        self.assertEqual((task.start, task.end), (7, 10))
+
 
 class TestPriorityScheduler(unittest.TestCase):
     def setUp(self):
@@ -140,7 +169,43 @@ class TestPreemptivePriorityScheduler(unittest.TestCase):
             data["cluster"], data["users"], users, deserialize=False
         )
         scheduler.run()
-        self.assertEqual(scheduler.time, 79)
+        # Test User 1 task_1 runs 4 of its 50 time units before being preempted
+        # at time 4, it resumes at 29 and finishes the remaining 46 at 75
+        self.assertEqual(scheduler.time, 75)
+
+    def test_no_preemption_when_task_cannot_fit(self):
+        def task(priority, cpus, duration):
+            return {
+                "label": "Task",
+                "priority": priority,
+                "cpus": cpus,
+                "duration": duration,
+            }
+
+        dags = {
+            "early": {
+                "name": "early",
+                "arrival_time": 0,
+                "tasks": {"low": task(1, 2, 10), "high": task(5, 2, 20)},
+            },
+            "late": {
+                "name": "late",
+                "arrival_time": 1,
+                "tasks": {"mid": task(3, 4, 1)},
+            },
+        }
+        scheduler = PreemptivePriorityScheduler(
+            {"cpus": 4, "ram": 10}, dags, ["early", "late"], deserialize=False
+        )
+        scheduler.run()
+
+        # preempting "low" alone can't make room for "mid", so nothing is
+        # preempted and "mid" waits for both tasks to finish
+        low = scheduler.dags["early"].tasks["early,low"]
+        mid = scheduler.dags["late"].tasks["late,mid"]
+        self.assertEqual((low.start, low.end), (0, 10))
+        self.assertEqual((mid.start, mid.end), (20, 21))
+        self.assertEqual(len(scheduler.running_index), 0)
 
 
 class TestSmallestServiceFirst(unittest.TestCase):
@@ -0,0 +1,97 @@
+import math
+import random
+import unittest
+from src.sketch import KLLSketch, merge_sketches
+
+
+def exact_quantile(values, q):
+    values = sorted(values)
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def rank_error(values, estimate, q):
+    """
+    |rank of estimate - q| as a fraction of the number of values
+    """
+    values = sorted(values)
+    below = sum(1 for v in values if v < estimate)
+    upto = sum(1 for v in values if v <= estimate)
+    target = q * len(values)
+    if below <= target <= upto:
+        return 0
+    return min(abs(below - target), abs(upto - target)) / len(values)
+
+
+class TestKLLSketch(unittest.TestCase):
+    def test_empty(self):
+        sketch = KLLSketch()
+        self.assertEqual(len(sketch), 0)
+        self.assertTrue(math.isnan(sketch.quantile(0.5)))
+
+    def test_exact_when_small(self):
+        values = [random.Random(1).randint(0, 1000) for _ in range(150)]
+        sketch = KLLSketch()
+        for value in values:
+            sketch.update(value)
+        for q in (0.01, 0.5, 0.9, 0.99):
+            self.assertEqual(sketch.quantile(q), exact_quantile(values, q))
+        self.assertEqual(sketch.quantile(0), min(values))
+        self.assertEqual(sketch.quantile(1), max(values))
+
+    def test_accuracy_and_size(self):
+        rng = random.Random(2)
+        values = [rng.lognormvariate(2, 1) for _ in range(100_000)]
+        sketch = KLLSketch(k=200)
+        for value in values:
+            sketch.update(value)
+
+        self.assertEqual(len(sketch), len(values))
+        self.assertLess(sketch.size, 4 * 200)
+        for q in (0.5, 0.9, 0.99):
+            self.assertLess(rank_error(values, sketch.quantile(q), q), 0.02)
+
+    def test_merge(self):
+        rng = random.Random(3)
+        parts = [[rng.random() for _ in range(n)] for n in (20_000, 5_000, 50)]
+        sketches = []
+        for values in parts:
+            sketch = KLLSketch(seed=len(sketches))
+            for value in values:
+                sketch.update(value)
+            sketches.append(sketch)
+
+        merged = merge_sketches(sketches)
+        values = [value for values in parts for value in values]
+        self.assertEqual(len(merged), len(values))
+        self.assertEqual(merged.quantile(1), max(values))
+        for q in (0.5, 0.9, 0.99):
+            self.assertLess(rank_error(values, merged.quantile(q), q), 0.02)
+        # inputs are left unchanged
+        self.assertEqual([len(sketch) for sketch in sketches], [20_000, 5_000, 50])
+
+    def test_serialization(self):
+        sketch = KLLSketch(k=50)
+        for value in range(10_000):
+            sketch.update(value)
+        restored = KLLSketch.from_dict(sketch.to_dict())
+        self.assertEqual(restored.percentiles(), sketch.percentiles())
+        self.assertEqual(len(restored), 10_000)
+
+        merged = merge_sketches([sketch.to_dict(), restored.to_dict()])
+        self.assertEqual(len(merged), 20_000)
+        self.assertEqual(merged.quantile(0), 0)
+
+
+class TestSketchSize(unittest.TestCase):
+    def test_many_updates(self):
+        rng = random.Random(4)
+        values = [rng.random() for _ in range(200_000)]
+        sketch = KLLSketch()
+        for value in values:
+            sketch.update(value)
+        self.assertEqual(len(sketch), len(values))
+        self.assertLess(sketch.size, len(values) / 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
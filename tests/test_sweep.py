@@ -0,0 +1,84 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import orjson
+from src.simulation import simulate
+from src.read_graph import read_yaml
+from src.sweep import ResultTable, make_grid, parse_cluster, run_sweep
+
+WORKLOADS = ["data/simple_dag.yml", "data/simple_prio_dag.yml"]
+
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cells = make_grid(WORKLOADS, ["FCFS", "SJF"], [(20, 100), (40, 100)])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def read_csv(self, path):
+        with open(path, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def test_grid(self):
+        self.assertEqual(len(self.cells), 8)
+        self.assertEqual(self.cells[0], ("data/simple_dag.yml", "FCFS", 20, 100))
+        self.assertEqual(len(make_grid(WORKLOADS)), 10)
+        self.assertRaises(ValueError, make_grid, WORKLOADS, ["RR"])
+
+    def test_parse_cluster(self):
+        self.assertEqual(parse_cluster("20x100"), (20, 100))
+        self.assertRaises(ValueError, parse_cluster, "20")
+
+    def test_parallel_sweep(self):
+        output = self.path("results.csv")
+        report = run_sweep(self.cells, output, jobs=2)
+        self.assertEqual(report["completed"], 8)
+
+        rows = {row["cell"]: row for row in self.read_csv(output)}
+        self.assertEqual(len(rows), 8)
+
+        # same results as running the cell on its own
+        data = read_yaml("data/simple_prio_dag.yml")
+        scheduler, _ = simulate(data, "SJF", {"cpus": 40, "ram": 100})
+        row = rows["data/simple_prio_dag.yml|SJF|40|100"]
+        self.assertEqual(int(row["end_time"]), scheduler.time)
+
+    def test_resume(self):
+        output = self.path("results.jsonl")
+        run_sweep(self.cells[:3], output, jobs=1)
+
+        # simulate a sweep killed while writing a row
+        with open(output, "ab") as f:
+            f.write(b'{"cell": "data/simple_prio')
+
+        report = run_sweep(self.cells, output, jobs=1)
+        self.assertEqual(report["skipped"], 3)
+        self.assertEqual(report["completed"], 5)
+
+        with open(output, "rb") as f:
+            cells = [orjson.loads(line)["cell"] for line in f]
+        self.assertEqual(len(cells), 8)
+        self.assertEqual(len(set(cells)), 8)
+        self.assertEqual(ResultTable(output).completed(), set(cells))
+
+    def test_failed_cells_not_recorded(self):
+        output = self.path("results.csv")
+        cells = make_grid(["data/missing.yml", WORKLOADS[0]], ["FCFS"])
+        report = run_sweep(cells, output, jobs=1)
+        self.assertEqual((report["completed"], report["failed"]), (1, 1))
+
+        # failed cells are retried when the sweep is resumed
+        report = run_sweep(cells, output, jobs=1)
+        self.assertEqual((report["skipped"], report["failed"]), (1, 1))
+        self.assertEqual(len(self.read_csv(output)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
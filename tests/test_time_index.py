@@ -0,0 +1,88 @@
+import unittest
+from src.history import SchedulerHistory
+from src.read_graph import read_yaml
+from src.scheduling import FCFS
+from src.time_index import TimeIndex, marks, snap
+from src.workload import build_workload
+
+import orjson
+
+
+class TestTimeIndex(unittest.TestCase):
+    def setUp(self):
+        # uneven event times, dense at the start
+        self.times = [-1] + list(range(0, 1000)) + list(range(1000, 100000, 97))
+        self.index = TimeIndex(reversed(self.times))
+
+    def test_bins(self):
+        stops = self.index.bins(count=100)
+        self.assertLessEqual(len(stops), 101)
+        self.assertEqual(stops, sorted(set(stops)))
+        self.assertEqual(stops[0], -1)
+        self.assertEqual(stops[-1], self.times[-1])
+        self.assertTrue(set(stops) <= set(self.times))
+        # stops are the last event time at or before each bin boundary
+        width = (self.times[-1] + 1) / 100
+        for stop, next_stop in zip(stops, stops[1:]):
+            self.assertLess(next_stop - stop, 2 * width + 97)
+
+    def test_zoom(self):
+        # small windows show every time in them
+        self.assertEqual(self.index.bins(10, 20, count=100), list(range(10, 21)))
+        stops = self.index.bins(500, 5000, count=50)
+        self.assertLessEqual(len(stops), 51)
+        self.assertEqual(stops[0], 500)
+        self.assertLessEqual(stops[-1], 5000)
+        self.assertEqual(self.index.bins(10**6, 10**7), [])
+        self.assertEqual(TimeIndex([]).bins(), [])
+
+    def test_snap_and_marks(self):
+        stops = [-1, 5, 10, 20]
+        self.assertEqual(snap(7, stops), 5)
+        self.assertEqual(snap(20, stops), 20)
+        self.assertEqual(snap(-5, stops), -1)
+        self.assertEqual(snap(None, stops), -1)
+        self.assertIsNone(snap(3, []))
+        self.assertEqual(
+            marks(stops, labels=2), {-1: "Initial", 5: "", 10: "10", 20: ""}
+        )
+
+    def test_history_index(self):
+        data = read_yaml("data/simple_prio_dag.yml")
+        scheduler = FCFS(
+            data["cluster"],
+            data["users"],
+            list(data["users"]),
+            deserialize=False,
+            history=SchedulerHistory(),
+        )
+        scheduler.perform_scheduling_round()
+        history = scheduler.history
+        index = history.get_time_index()
+        self.assertIs(history.get_time_index(), index)
+        scheduler.run()
+        # rebuilt once events were added
+        self.assertIsNot(history.get_time_index(), index)
+        self.assertEqual(history.get_time_index().times, sorted(history.times))
+
+
+class TestSliderPayload(unittest.TestCase):
+    def test_slider_payload(self):
+        data = build_workload(users=100, tasks=100, rate=0.05, seed=3)
+        users = list(data["users"].keys())
+        scheduler = FCFS(data["cluster"], data["users"], users, deserialize=False)
+        scheduler.run()
+        history = scheduler.history
+
+        options = [
+            {"label": "Initial" if t == -1 else f"Time={t}", "value": t}
+            for t in sorted(history.times)
+        ]
+        dropdown = len(orjson.dumps(options))
+        stops = history.get_time_index().bins()
+        slider = len(orjson.dumps(marks(stops), option=orjson.OPT_NON_STR_KEYS))
+        self.assertLess(slider, dropdown)
+
+
+if __name__ == "__main__":
+    unittest.main()
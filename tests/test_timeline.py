@@ -0,0 +1,124 @@
+import unittest
+from unittest import mock
+from src import timeline as timeline_module
+from src.history import SchedulerHistory, Stride
+from src.read_graph import read_yaml
+from src.scheduling import PreemptivePriorityScheduler
+from src.timeline import (
+    STATUS_NAMES,
+    build_timeline,
+    global_metrics,
+    led_value,
+    table_rows,
+    utilization_percent,
+)
+
+import orjson
+
+
+def replay(timeline, step):
+    codes = [0] * len(timeline["tasks"])
+    for changes in timeline["changes"][: step + 1]:
+        for i in range(0, len(changes), 2):
+            codes[changes[i]] = changes[i + 1]
+    return {
+        task_id: STATUS_NAMES[code] for task_id, code in zip(timeline["tasks"], codes)
+    }
+
+
+def replay_table(timeline, step):
+    rows = {}
+    for changes in timeline["table_changes"][: step + 1]:
+        rows.update(changes)
+    return [rows[position] for position in sorted(rows)]
+
+
+class TestTimeline(unittest.TestCase):
+    def run_scheduler(self, users=None, history=None):
+        data = read_yaml("data/simple_prio_dag.yml")
+        if users is None:
+            users = list(data["users"])
+        scheduler = PreemptivePriorityScheduler(
+            data["cluster"], data["users"], users, deserialize=False, history=history
+        )
+        scheduler.run()
+        return scheduler
+
+    def assert_matches_history(self, scheduler, timeline):
+        history = scheduler.history
+        self.assertEqual(timeline["times"], sorted(history.times))
+        for step, t in enumerate(timeline["times"]):
+            self.assertEqual(replay(timeline, step), history.get_status_changes(t))
+            messages, _, utilization = scheduler.get_history(t)
+            metrics = scheduler.get_history_metrics_at_t(t)
+            end = timeline["message_ends"][step]
+            window = timeline["message_window"]
+            self.assertEqual(
+                timeline["messages"][max(0, end - window) : end], messages[-window:]
+            )
+            percent = utilization_percent(scheduler.cluster, utilization)
+            self.assertEqual(timeline["utilization"]["cpus"][step], percent["cpus"])
+            self.assertEqual(timeline["utilization"]["ram"][step], percent["ram"])
+            self.assertEqual(timeline["metrics"][step], global_metrics(metrics))
+            self.assertEqual(
+                replay_table(timeline, step), table_rows(scheduler, metrics)
+            )
+
+    def test_timeline(self):
+        scheduler = self.run_scheduler()
+        timeline = build_timeline(scheduler, "key")
+        self.assertEqual(timeline["run"], "key")
+        self.assertEqual(len(timeline["tasks"]), 9)
+        self.assertEqual(timeline["jobcount"], 9)
+        self.assert_matches_history(scheduler, timeline)
+
+        # only tasks whose status changed are sent
+        self.assertEqual(timeline["changes"][0], [])
+        self.assertEqual(len(timeline["changes"][1]), 2 * 9)
+        for changes in timeline["changes"][2:]:
+            self.assertLess(len(changes), 2 * 9)
+
+        # every row at the first step, then the rows that changed
+        self.assertEqual(len(timeline["table_changes"][0]), 2)
+        for step in range(1, len(timeline["times"])):
+            previous = replay_table(timeline, step - 1)
+            for position, row in timeline["table_changes"][step]:
+                self.assertNotEqual(previous[position], row)
+        last = replay_table(timeline, len(timeline["times"]) - 1)
+        self.assertEqual(last[0][:4], ["test_user", 4, 0, 1])
+        orjson.dumps(timeline)
+
+    def test_retention(self):
+        scheduler = self.run_scheduler(history=SchedulerHistory(3, Stride(3)))
+        self.assertGreater(scheduler.history.dropped_events, 0)
+        self.assert_matches_history(scheduler, build_timeline(scheduler))
+
+    def test_message_window(self):
+        scheduler = self.run_scheduler()
+        full = build_timeline(scheduler)
+        with mock.patch.object(timeline_module, "MESSAGE_WINDOW", 2):
+            timeline = build_timeline(scheduler)
+        self.assertEqual(timeline["message_window"], 2)
+        self.assertLess(len(timeline["messages"]), len(full["messages"]))
+        self.assert_matches_history(scheduler, timeline)
+
+    def test_app_users(self):
+        users = [
+            {"user": "test_user", "name": "first"},
+            {"user": "test_user2", "name": "second"},
+        ]
+        scheduler = self.run_scheduler(users)
+        timeline = build_timeline(scheduler)
+        self.assert_matches_history(scheduler, timeline)
+        self.assertEqual(
+            [row[0] for row in replay_table(timeline, 0)], ["first", "second"]
+        )
+
+    def test_led_value(self):
+        self.assertEqual(led_value(float("nan")), -1.0)
+        self.assertEqual(led_value(float("inf")), 9999.0)
+        self.assertEqual(led_value(3), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import io
+import random
+import tracemalloc
+import unittest
+
+import yaml
+from src.dag import DAG
+from src.scheduling import FCFS
+from src.workload import (
+    Distribution,
+    SHAPE_FUNCS,
+    bursty_arrivals,
+    generate_workload,
+    mapreduce,
+    poisson_arrivals,
+)
+
+
+def generate(**kwargs):
+    out = io.StringIO()
+    generate_workload(out, **kwargs)
+    return yaml.safe_load(out.getvalue())
+
+
+class NullWriter:
+    def write(self, data):
+        pass
+
+
+class TestWorkload(unittest.TestCase):
+    def test_shapes_are_dags(self):
+        for name, shape in SHAPE_FUNCS.items():
+            tasks = list(shape(200, random.Random(0), width=6, edge_prob=0.05))
+            self.assertEqual(len(tasks), 200, name)
+            for i, (_, parents) in enumerate(tasks):
+                self.assertTrue(all(0 <= p < i for p in parents), name)
+
+    def test_mapreduce(self):
+        tasks = list(mapreduce(11, random.Random(0), width=4))
+        labels = [label for label, _ in tasks]
+        self.assertEqual(
+            labels[:6], ["Map 1", "Map 2", "Map 3", "Map 4", "Reduce 5", "All Reduce 6"]
+        )
+        self.assertEqual(tasks[4][1], [0, 1, 2, 3])
+        # maps of the next stage wait for the all reduce
+        self.assertEqual(tasks[6][1], [5])
+
+    def test_schema(self):
+        data = generate(users=3, tasks=20, shape="layered", priority="uniform:0,5")
+        self.assertEqual(data["cluster"], {"cpus": 20, "ram": 100})
+        self.assertEqual(len(data["users"]), 3)
+        for user, dag in data["users"].items():
+            dag = DAG(dag)
+            self.assertEqual(len(dag.tasks), 20)
+            self.assertEqual(dag.unresolved, {})
+            for task in dag.tasks.values():
+                self.assertGreaterEqual(task.duration, 1)
+                self.assertIsNotNone(task.priority)
+
+    def test_seeded(self):
+        options = {"users": 4, "tasks": 30, "shape": "erdos", "arrival": "bursty"}
+        self.assertEqual(generate(seed=1, **options), generate(seed=1, **options))
+        self.assertNotEqual(generate(seed=1, **options), generate(seed=2, **options))
+
+        # a user's DAG doesn't depend on how many users are generated
+        fewer = generate(seed=1, **dict(options, users=2))
+        self.assertEqual(
+            fewer["users"]["user_2"]["tasks"],
+            generate(seed=1, **options)["users"]["user_2"]["tasks"],
+        )
+
+    def test_arrivals(self):
+        rng = random.Random(0)
+        times = [t for t, _ in zip(poisson_arrivals(rng, 0.5), range(2000))]
+        self.assertEqual(times, sorted(times))
+        self.assertAlmostEqual(times[-1] / len(times), 2, delta=0.3)
+
+        times = [t for t, _ in zip(bursty_arrivals(rng, 0.5, burst=10), range(2000))]
+        self.assertEqual(times, sorted(times))
+        # users of a burst arrive together
+        self.assertLess(len(set(times)), len(times) / 4)
+
+    def test_distributions(self):
+        rng = random.Random(0)
+        self.assertEqual(Distribution.parse("const:5").sample(rng), 5)
+        samples = [Distribution.parse("uniform:2,4").sample(rng) for _ in range(100)]
+        self.assertEqual(set(samples), {2, 3, 4})
+        samples = [Distribution.parse("exp:0.1").sample(rng) for _ in range(100)]
+        self.assertEqual(min(samples), 1)
+        self.assertRaises(ValueError, Distribution.parse, "normal:1,2")
+        self.assertRaises(ValueError, Distribution.parse, "uniform:1")
+
+    def test_runs(self):
+        data = generate(users=5, tasks=40, shape="mapreduce", arrival="bursty")
+        scheduler = FCFS(
+            data["cluster"], data["users"], list(data["users"]), deserialize=False
+        )
+        scheduler.run()
+        for dag in scheduler.dags.values():
+            self.assertTrue(all(task.end is not None for task in dag.tasks.values()))
+
+    def test_streaming(self):
+        # memory doesn't grow with the number of tasks
+        tracemalloc.start()
+        generate_workload(
+            NullWriter(), users=1, tasks=5000, shape="erdos", edge_prob=0.001
+        )
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertLess(peak, 200_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,10 @@
+import base64
+import os
+import tempfile
 import unittest
-from src.read_graph import read_yaml
+from unittest import mock
+from src import read_graph
+from src.read_graph import parse_contents, read_dag_specs, read_yaml
 
 
 class TestSimpleDag(unittest.TestCase):
@@ -8,5 +13,78 @@ class TestSimpleDag(unittest.TestCase):
         self.assertEqual(data["users"]["test_user"]["name"], "Test User 1")
 
 
+class TestSpecCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "spec.yml")
+        with open("data/simple_dag.yml") as f:
+            self.content = f.read()
+        with open(self.path, "w") as f:
+            f.write(self.content)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def parsed(self):
+        # fails if the file is parsed again
+        return mock.patch.object(read_graph.yaml, "load", side_effect=AssertionError)
+
+    def test_cached_until_changed(self):
+        data = read_yaml(self.path)
+        with self.parsed():
+            self.assertEqual(read_yaml(self.path), data)
+
+            # touched but unchanged: same content hash
+            os.utime(self.path, ns=(0, 0))
+            self.assertEqual(read_yaml(self.path), data)
+
+        with open(self.path, "w") as f:
+            f.write(self.content.replace("Test User 1", "Changed User"))
+        changed = read_yaml(self.path)
+        self.assertEqual(changed["users"]["test_user"]["name"], "Changed User")
+
+    def test_loads_are_copies(self):
+        data = read_yaml(self.path)
+        data["users"]["test_user"]["name"] = "Modified"
+        del data["cluster"]
+        again = read_yaml(self.path)
+        self.assertEqual(again["users"]["test_user"]["name"], "Test User 1")
+        self.assertIn("cluster", again)
+        self.assertIsNot(read_yaml(self.path)["users"], again["users"])
+
+        with open(self.path, "rb") as f:
+            _, loaded = read_graph.load_spec(f.read())
+        self.assertEqual(loaded, again)
+        self.assertIsNot(loaded, again)
+
+    def test_validation(self):
+        with open(self.path, "w") as f:
+            f.write(self.content.replace("label:", "name:"))
+        self.assertRaises(ValueError, read_yaml, self.path)
+        self.assertRaises(ValueError, read_graph.validate_spec, {"cluster": {}})
+        self.assertRaises(
+            ValueError,
+            read_graph.validate_spec,
+            {"cluster": {"cpus": 1}, "users": {}},
+        )
+        read_graph.validate_spec({"users": {"user": {"tasks": {}}}})
+
+        contents = "data:application/x-yaml;base64," + base64.b64encode(
+            b"users: []"
+        ).decode("ascii")
+        self.assertEqual(parse_contents(contents, "spec.yml", 0), ("spec.yml", None))
+
+    def test_read_dag_specs(self):
+        with open(os.path.join(self.dir.name, "other.yml"), "w") as f:
+            f.write(self.content.replace("Test User 1", "Other User"))
+        specs = read_dag_specs(self.dir.name, jobs=2)
+        self.assertEqual(set(specs), {"spec.yml", "other.yml"})
+        self.assertEqual(specs["other.yml"]["users"]["test_user"]["name"], "Other User")
+        # parsed in worker processes, then served from the cache
+        with self.parsed():
+            self.assertEqual(read_yaml(self.path), specs["spec.yml"])
+            self.assertEqual(read_dag_specs(self.dir.name, jobs=1), specs)
+
+
 if __name__ == "__main__":
     unittest.main()